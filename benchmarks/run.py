@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+"""
+Benchmarks for GrandFatherSon's rotation functions.
+
+Times, and measures the peak memory of, ``to_keep``, ``to_delete``,
+``dates_to_keep`` and each filter's ``filter`` over generated
+workloads of increasing size, then writes the results as JSON::
+
+    python benchmarks/run.py --sizes 1e3,1e4,1e5 --output before.json
+
+Two result files can be compared to catch regressions; the exit
+status is non-zero if any benchmark got slower than ``--threshold``::
+
+    python benchmarks/run.py --output after.json --compare before.json
+"""
+from __future__ import print_function
+
+import argparse
+from datetime import datetime, timedelta
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import grandfatherson
+from grandfatherson import dates_to_keep, to_delete, to_keep
+from grandfatherson.filters import FILTERS, UTC
+
+
+NOW = datetime(2000, 1, 1, 0, 0, 0)
+
+POLICY = dict(years=5, months=12, weeks=4, days=7,
+              hours=24, minutes=60, seconds=60)
+
+
+def dense(size):
+    """One backup per second, up to ``NOW``."""
+    return [NOW - timedelta(seconds=i) for i in range(size)]
+
+
+def irregular(size, seed=0):
+    """Backups at random intervals averaging ten minutes, with gaps."""
+    rng = random.Random(seed)
+    dt = NOW
+    datetimes = []
+    for i in range(size):
+        datetimes.append(dt)
+        if rng.random() < 0.001:
+            # A failed job leaves a gap of up to a week
+            dt -= timedelta(days=rng.random() * 7)
+        dt -= timedelta(seconds=rng.expovariate(1 / 600.0))
+    return datetimes
+
+
+def aware(size):
+    """One timezone-aware backup per second, up to ``NOW``."""
+    utc = UTC()
+    return [dt.replace(tzinfo=utc) for dt in dense(size)]
+
+
+def unsorted(size, seed=0):
+    """The ``dense`` workload in random order."""
+    datetimes = dense(size)
+    random.Random(seed).shuffle(datetimes)
+    return datetimes
+
+
+WORKLOADS = {
+    'dense': dense,
+    'irregular': irregular,
+    'aware': aware,
+    'unsorted': unsorted,
+}
+
+
+def now_for(workload):
+    if workload == 'aware':
+        return NOW.replace(tzinfo=UTC())
+    return NOW
+
+
+def unchanged(data, now):
+    return data, now
+
+
+def benchmarks():
+    """
+    Yield ``(name, prepare, function)``.  ``prepare`` takes a workload
+    and now, and returns the arguments of ``function``; it is not timed,
+    so that every benchmark only times the rotation itself.
+    """
+    yield ('to_keep', unchanged,
+           lambda data, now: to_keep(data, now=now, **POLICY))
+    yield ('to_delete', unchanged,
+           lambda data, now: to_delete(data, now=now, **POLICY))
+    for plan in ('filters', 'tiers'):
+        yield ('to_keep[%s]' % plan, unchanged,
+               lambda data, now, plan=plan: to_keep(data, now=now, plan=plan,
+                                                    **POLICY))
+    yield ('to_keep[sorted]',
+           lambda data, now: (sorted(data), now),
+           lambda data, now: to_keep(data, now=now, presorted=True,
+                                     **POLICY))
+    yield ('dates_to_keep',
+           lambda data, now: (set(dt.date() for dt in data), now.date()),
+           lambda dates, today: dates_to_keep(
+               dates, now=today,
+               years=POLICY['years'], months=POLICY['months'],
+               weeks=POLICY['weeks'], days=POLICY['days']))
+    for name, cls in FILTERS:
+        yield ('filters.%s.filter' % cls.__name__, unchanged,
+               lambda data, now, cls=cls, name=name: cls.filter(
+                   data, number=POLICY[name], now=now))
+
+
+def measure(function, arguments, repeat):
+    """Return the best time out of ``repeat`` runs and the peak memory."""
+    times = []
+    for i in range(repeat):
+        gc.collect()
+        start = timeit.default_timer()
+        function(*arguments)
+        times.append(timeit.default_timer() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(*arguments)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def run(sizes, workloads, names, repeat, log=None):
+    results = []
+    for workload in workloads:
+        for size in sizes:
+            data = WORKLOADS[workload](size)
+            now = now_for(workload)
+            for name, prepare, function in benchmarks():
+                if names and name not in names:
+                    continue
+                seconds, peak = measure(function, prepare(data, now), repeat)
+                result = {'benchmark': name, 'workload': workload,
+                          'size': size, 'seconds': seconds,
+                          'peak_bytes': peak}
+                results.append(result)
+                if log is not None:
+                    print('%-24s %-10s %10d %12.6fs %14d bytes' %
+                          (name, workload, size, seconds, peak), file=log)
+            del data
+    return {
+        'version': grandfatherson.__version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'date': datetime.now().isoformat(),
+        'results': results,
+    }
+
+
+def compare(old, new, threshold):
+    """
+    Return a list of ``(benchmark, workload, size, ratio)`` for every
+    result in ``new`` that is more than ``threshold`` times slower
+    than in ``old``.
+    """
+    baseline = dict(((r['benchmark'], r['workload'], r['size']),
+                     r['seconds']) for r in old['results'])
+    regressions = []
+    for r in new['results']:
+        key = (r['benchmark'], r['workload'], r['size'])
+        if baseline.get(key):
+            ratio = r['seconds'] / baseline[key]
+            if ratio > threshold:
+                regressions.append(key + (ratio,))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='1e3,1e4,1e5',
+                        help='input sizes, separated by commas '
+                             '(up to 1e7; default: %(default)s)')
+    parser.add_argument('--workloads', default=','.join(sorted(WORKLOADS)),
+                        help='workloads, separated by commas '
+                             '(default: %(default)s)')
+    parser.add_argument('--benchmarks', default='',
+                        help='only run these benchmarks, '
+                             'separated by commas')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timing runs per benchmark (default: 3)')
+    parser.add_argument('--output', help='write JSON results to this file')
+    parser.add_argument('--compare', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='slowdown ratio counted as a regression '
+                             '(default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(float(s)) for s in args.sizes.split(',')]
+    workloads = args.workloads.split(',')
+    for workload in workloads:
+        if workload not in WORKLOADS:
+            parser.error('Unknown workload: %s' % workload)
+    names = set(filter(None, args.benchmarks.split(',')))
+
+    results = run(sizes, workloads, names, args.repeat, log=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        for benchmark, workload, size, ratio in regressions:
+            print('REGRESSION %s %s %d: %.2fx slower' %
+                  (benchmark, workload, size, ratio), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
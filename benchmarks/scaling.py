@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Scaling benchmark for ``grandfatherson.batch``.
+
+Rotates a batch of series with 1, 2, 4, ... workers, on threads and on
+processes, and reports the speedup over a single worker as JSON::
+
+    python benchmarks/scaling.py --series 2000 --size 1000 --workers 1,2,4,8
+
+On a free-threaded build, threads should scale with the workers; with
+the GIL, only processes do, less the cost of pickling the series.
+"""
+from __future__ import print_function
+
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import grandfatherson
+from grandfatherson.batch import gil_enabled, to_delete_many
+
+
+NOW = datetime(2000, 1, 1, 0, 0, 0)
+
+POLICY = dict(years=5, months=12, weeks=4, days=7, hours=24)
+
+
+def batch(series, size, seed=0):
+    """``series`` series of ``size`` hourly backups, with random gaps."""
+    rng = random.Random(seed)
+    return dict(('series%d' % i,
+                 [NOW - timedelta(hours=j, minutes=rng.randint(0, 59))
+                  for j in range(size) if rng.random() > 0.05])
+                for i in range(series))
+
+
+def run(series, workers, modes, repeat, log=None):
+    policies = dict((name, POLICY) for name in series)
+    results = []
+    for mode in modes:
+        baseline = None
+        for count in workers:
+            seconds = min(timeit.repeat(
+                lambda: to_delete_many(series, policies, now=NOW, mode=mode,
+                                       workers=count),
+                number=1, repeat=repeat))
+            if baseline is None:
+                baseline = seconds
+            result = {'mode': mode, 'workers': count, 'seconds': seconds,
+                      'speedup': baseline / seconds}
+            results.append(result)
+            if log is not None:
+                print('%-10s %4d workers %10.4fs %6.2fx' %
+                      (mode, count, seconds, baseline / seconds), file=log)
+    return {
+        'version': grandfatherson.__version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'gil_enabled': gil_enabled(),
+        'cpus': os.cpu_count(),
+        'date': datetime.now().isoformat(),
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--series', type=int, default=1000,
+                        help='number of series (default: %(default)s)')
+    parser.add_argument('--size', type=int, default=1000,
+                        help='backups per series (default: %(default)s)')
+    parser.add_argument('--workers', default='1,2,4,8',
+                        help='worker counts, separated by commas '
+                             '(default: %(default)s)')
+    parser.add_argument('--modes', default='threads,processes',
+                        help='modes, separated by commas '
+                             '(default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timing runs per measurement (default: 3)')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+
+    workers = [int(w) for w in args.workers.split(',')]
+    modes = args.modes.split(',')
+    for mode in modes:
+        if mode not in ('threads', 'processes'):
+            parser.error('Unknown mode: %s' % mode)
+
+    series = batch(args.series, args.size)
+    results = run(series, workers, modes, args.repeat, log=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
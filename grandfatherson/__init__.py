@@ -137,12 +137,12 @@ Finally, if you need to rotate backups that have timestamps in
      datetime.datetime(1999, 12, 31, 23, 59, 49)]
 """
 
-from calendar import (MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY,
-                      SUNDAY)
+from bisect import bisect_left, bisect_right
 from datetime import datetime, time
-import os
 
-from grandfatherson import filters
+from grandfatherson import filters, planner
+from grandfatherson.filters import (MONDAY, TUESDAY, WEDNESDAY, THURSDAY,
+                                    FRIDAY, SATURDAY, SUNDAY)
 
 __version__ = "1.3"
 
@@ -150,7 +150,8 @@ __version__ = "1.3"
 def to_keep(datetimes,
             years=0, months=0, weeks=0, days=0,
             hours=0, minutes=0, seconds=0,
-            firstweekday=SATURDAY, now=None):
+            firstweekday=SATURDAY, now=None, tiers=None, holds=None,
+            presorted=False, plan=None):
     """
     Return a set of datetimes that should be kept, out of ``datetimes``.
 
@@ -161,35 +162,207 @@ def to_keep(datetimes,
     defaults to Saturday.
 
     If ``now`` is None, it will base its calculations on
-    ``datetime.datetime.now()``. Datetimes after this point will always be
-    kept.
+    ``datetime.datetime.now()``, read once for all the tiers. Datetimes
+    after this point will always be kept.
+
+    ``tiers`` is an optional list of ``(name, number)`` for more tiers,
+    such as ``('quarters', 4)``, out of those registered in
+    ``grandfatherson.tiers``.  All the tiers are then evaluated in one
+    pass; see ``grandfatherson.tiers.to_keep``.
+
+    Datetimes held by ``holds``, a ``grandfatherson.holds.Holds``, are
+    always kept.
+
+    The result is computed by whichever plan of ``grandfatherson.planner``
+    suits ``datetimes`` best, unless ``plan`` names one.  If
+    ``datetimes`` is already sorted, pass ``presorted=True`` so that it
+    is not sorted again.  ``datetimes`` may also be dates, in which case
+    dates are returned; only the ``dates`` plan may be named for them,
+    and it may not be named for datetimes, or ValueError is raised.
+
+    To time each stage of the calculation, see
+    ``grandfatherson.filters.observe``.
+
+    This keeps no state between calls, so it may be called from several
+    threads at once, as long as no other thread is changing
+    ``datetimes`` meanwhile.  To rotate many series at once, see
+    ``grandfatherson.batch``.
     """
-    datetimes = set(datetimes)
-    return (filters.Years.filter(datetimes, number=years, now=now) |
-            filters.Months.filter(datetimes, number=months, now=now) |
-            filters.Weeks.filter(datetimes, number=weeks,
-                                 firstweekday=firstweekday, now=now) |
-            filters.Days.filter(datetimes, number=days, now=now) |
-            filters.Hours.filter(datetimes, number=hours, now=now) |
-            filters.Minutes.filter(datetimes, number=minutes, now=now) |
-            filters.Seconds.filter(datetimes, number=seconds, now=now))
+    numbers = filters.tier_numbers(years=years, months=months, weeks=weeks,
+                                   days=days, hours=hours, minutes=minutes,
+                                   seconds=seconds)
+
+    observed = filters.observed()
+    if observed:
+        started = filters.clock()
+
+    if not hasattr(datetimes, '__len__'):
+        datetimes = list(datetimes)
+
+    # Resolve now once, so that every tier, and the planner, agree on it
+    now = filters.resolve_now_for(datetimes, now)
+
+    if plan is None:
+        plan = planner.choose(datetimes, tiers, presorted, numbers,
+                              firstweekday, now)
+    elif plan not in planner.PLANS:
+        raise ValueError('Unknown plan: %s' % plan)
+    elif datetimes:
+        # Only the dates plan keeps dates, and it would truncate datetimes
+        if hasattr(next(iter(datetimes)), 'hour'):
+            if plan == 'dates':
+                raise ValueError('The dates plan cannot keep datetimes')
+        elif plan != 'dates':
+            raise ValueError('The %s plan cannot keep dates' % plan)
+
+    dates = plan == 'dates'
+    if dates:
+        datetimes = [datetime.combine(d, time()) for d in datetimes]
+        plan = planner.choose(datetimes, tiers, presorted, numbers,
+                              firstweekday, now)
+    if tiers is not None and plan != 'tiers':
+        raise ValueError('Custom tiers need the tiers plan')
+    if plan == 'filters':
+        datetimes = set(datetimes)
+    elif plan == 'sorted' and not (presorted or
+                                   planner.is_timeline(datetimes)):
+        # The sorted plan bisects its input, which must be sorted
+        datetimes = sorted(datetimes)
+
+    if observed:
+        copied = filters.clock()
+
+    # The number kept by each tier, for plans that do not report it
+    # through filter events
+    counts = {} if observed and plan != 'filters' else None
+    if plan == 'filters':
+        kept = (filters.Years.filter(datetimes, number=years, now=now) |
+                filters.Months.filter(datetimes, number=months, now=now) |
+                filters.Weeks.filter(datetimes, number=weeks,
+                                     firstweekday=firstweekday, now=now) |
+                filters.Days.filter(datetimes, number=days, now=now) |
+                filters.Hours.filter(datetimes, number=hours, now=now) |
+                filters.Minutes.filter(datetimes, number=minutes, now=now) |
+                filters.Seconds.filter(datetimes, number=seconds, now=now))
+        if holds is not None:
+            # The filters sweep once each, so holds are checked apart
+            kept |= holds.held(datetimes)
+    elif plan == 'tiers':
+        from grandfatherson.tiers import to_keep as fused_to_keep
+        kept = fused_to_keep(datetimes,
+                             [(name, numbers[name])
+                              for name, cls in filters.FILTERS] +
+                             list(tiers or ()),
+                             firstweekday=firstweekday, now=now,
+                             counts=counts, holds=holds)
+    else:
+        kept = planner.sorted_to_keep(datetimes, numbers, firstweekday, now,
+                                      counts=counts, holds=holds)
+
+    if observed:
+        event = dict(event='to_keep', plan='dates' if dates else plan,
+                     input=len(datetimes), kept=len(kept),
+                     future=sum(1 for dt in kept if dt > now),
+                     seconds=filters.clock() - started,
+                     copy_seconds=copied - started)
+        if counts is not None:
+            event['tiers'] = counts
+        filters.notify(**event)
+
+    if dates:
+        kept = set(dt.date() for dt in kept)
+    return kept
 
 
 def to_delete(datetimes,
               years=0, months=0, weeks=0, days=0,
               hours=0, minutes=0, seconds=0,
-              firstweekday=SATURDAY, now=None):
+              firstweekday=SATURDAY, now=None, tiers=None, holds=None,
+              presorted=False, plan=None):
     """
     Return a set of datetimes that should be deleted, out of ``datetimes``.
 
     See ``to_keep`` for a description of arguments.
     """
-    datetimes = set(datetimes)
-    return datetimes - to_keep(datetimes,
-                               years=years, months=months,
-                               weeks=weeks, days=days,
-                               hours=hours, minutes=minutes, seconds=seconds,
-                               firstweekday=firstweekday, now=now)
+    if not hasattr(datetimes, '__len__'):
+        datetimes = list(datetimes)
+    return set(datetimes) - to_keep(datetimes,
+                                    years=years, months=months,
+                                    weeks=weeks, days=days,
+                                    hours=hours, minutes=minutes,
+                                    seconds=seconds,
+                                    firstweekday=firstweekday, now=now,
+                                    tiers=tiers, holds=holds,
+                                    presorted=presorted, plan=plan)
+
+
+def explain(datetimes,
+            years=0, months=0, weeks=0, days=0,
+            hours=0, minutes=0, seconds=0,
+            firstweekday=SATURDAY, now=None, presorted=False, holds=None):
+    """
+    Return a dict mapping each of ``datetimes`` to the reasons it
+    should be kept.
+
+    Each reason is a ``(tier, bucket)`` tuple: ``tier`` is the name of
+    the filter class that keeps the datetime, as the first one in its
+    ``bucket``, which is the masked datetime the tier groups it under.
+    Datetimes held by ``holds`` first have the reason
+    ``('hold', None)``, and datetimes after ``now`` the reason
+    ``('future', None)``, before those of the tiers, from the coarsest
+    to the finest.  Datetimes that should be deleted have no reasons.
+
+    See ``to_keep`` for a description of arguments; the datetimes with
+    reasons are exactly those it would return::
+
+        >>> reasons = explain([datetime(1999, 12, 25, 1),
+        ...                    datetime(1999, 12, 25, 2),
+        ...                    datetime(1999, 12, 31, 1)],
+        ...                   weeks=2, days=1, now=datetime(1999, 12, 31))
+        >>> reasons[datetime(1999, 12, 25, 1)]
+        [('Weeks', datetime.datetime(1999, 12, 25, 0, 0))]
+        >>> reasons[datetime(1999, 12, 25, 2)]
+        []
+        >>> reasons[datetime(1999, 12, 31, 1)]
+        [('future', None)]
+
+    Rather than filtering the datetimes once per tier, they are sorted
+    once, and each tier only walks through its own window.  If
+    ``datetimes`` is already a sorted sequence without duplicates, such
+    as a ``grandfatherson.timestamps.Timeline``, pass ``presorted=True``
+    to skip sorting it.
+    """
+    numbers = filters.tier_numbers(years=years, months=months, weeks=weeks,
+                                   days=days, hours=hours, minutes=minutes,
+                                   seconds=seconds)
+
+    if not presorted:
+        datetimes = sorted(set(datetimes))
+    reasons = dict((dt, []) for dt in datetimes)
+
+    now = filters.resolve_now_for(datetimes, now)
+
+    if holds is not None:
+        for dt in holds.held(datetimes, presorted=True):
+            reasons[dt].append(('hold', None))
+
+    # Always keep datetimes from the future
+    end = bisect_right(datetimes, now)
+    for dt in datetimes[end:]:
+        reasons[dt].append(('future', None))
+
+    for name, cls in filters.FILTERS:
+        number = numbers[name]
+        if number == 0:
+            continue
+        start = cls.start(now, number, firstweekday=firstweekday)
+        buckets = set()
+        for dt in datetimes[bisect_left(datetimes, start):end]:
+            bucket = cls.mask(dt, firstweekday=firstweekday)
+            if bucket not in buckets:
+                buckets.add(bucket)
+                reasons[dt].append((cls.__name__, bucket))
+    return reasons
 
 
 def dates_to_keep(dates,
@@ -0,0 +1,6 @@
+import sys
+
+from grandfatherson.cli import main
+
+
+sys.exit(main())
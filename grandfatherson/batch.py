@@ -0,0 +1,78 @@
+"""
+Rotation of many series at once, in parallel.
+
+On free-threaded builds of Python, 3.13t and later, threads rotate
+series truly in parallel, sharing their inputs without copying them.
+With the GIL, threads would only take turns, so the series are sent
+to a pool of processes instead, at the cost of pickling them::
+
+    deleted = to_delete_many({'db': db_backups, 'web': web_backups},
+                             {'db': {'days': 7}, 'web': {'weeks': 4}},
+                             now=now)
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import sys
+
+from grandfatherson import to_delete
+
+
+MODES = ('auto', 'threads', 'processes')
+
+
+def gil_enabled():
+    """Return whether this interpreter runs with the GIL."""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    if is_gil_enabled is None:
+        # Builds before 3.13 always have the GIL
+        return True
+    return is_gil_enabled()
+
+
+def executor(mode='auto', workers=None):
+    """
+    Return a ``concurrent.futures`` executor of ``workers`` for
+    ``mode``: ``'threads'``, ``'processes'``, or ``'auto'`` to use
+    threads only when the GIL is disabled.
+    """
+    if mode not in MODES:
+        raise ValueError('Unknown mode: %s' % mode)
+    if mode == 'threads' or (mode == 'auto' and not gil_enabled()):
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _to_delete(job):
+    # A module-level function, so that process pools can pickle it
+    name, datetimes, policy, now, holds = job
+    return name, to_delete(datetimes, now=now, holds=holds, **policy)
+
+
+def to_delete_many(series, policies, now=None, mode='auto', workers=None,
+                   holds=None):
+    """
+    Return a dict mapping the name of each of ``series`` to the set of
+    its datetimes that should be deleted.
+
+    ``series`` maps names to datetimes, and ``policies`` maps them to
+    ``to_delete`` arguments; it is either a dict or a function.  Series
+    without a policy are left out.  Pass ``now`` so that every series
+    is rotated as of the same time, and ``holds``, a
+    ``grandfatherson.holds.Holds``, for every series to keep what it
+    holds.  ``mode`` and ``workers`` choose the pool, as for
+    ``executor``.
+    """
+    lookup = policies.get if hasattr(policies, 'get') else policies
+    jobs = []
+    for name, datetimes in series.items():
+        policy = lookup(name)
+        if policy is not None:
+            jobs.append((name, datetimes, policy, now, holds))
+
+    workers = workers or os.cpu_count() or 1
+    with executor(mode, workers) as pool:
+        if isinstance(pool, ProcessPoolExecutor):
+            # Amortise the cost of sending each job to another process
+            chunksize = max(1, len(jobs) // (4 * workers))
+            return dict(pool.map(_to_delete, jobs, chunksize=chunksize))
+        return dict(pool.map(_to_delete, jobs))
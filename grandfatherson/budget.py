@@ -0,0 +1,59 @@
+"""
+Rotation within a byte budget.
+
+After the grandfather-father-son policy has had its say, the backups
+it keeps may still not fit on their volume.  ``to_delete_within_budget``
+then evicts kept backups by priority: those kept only by the finest
+tier go first, oldest first, and grandfathers go last.  A backup kept
+by several tiers counts as part of the coarsest one, and held backups
+are never evicted.
+"""
+import heapq
+
+from grandfatherson import explain
+from grandfatherson.filters import FILTERS
+
+
+# Coarsest first; a lower rank is evicted later
+RANKS = dict((cls.__name__, rank) for rank, (name, cls) in enumerate(FILTERS))
+RANKS['future'] = -1
+
+
+def to_delete_within_budget(datetimes, sizes, budget, **options):
+    """
+    Return a set of datetimes that should be deleted, out of
+    ``datetimes``, for the rest to fit within ``budget`` bytes.
+
+    ``sizes`` maps each datetime to its size in bytes; it is either a
+    dict or a function.  ``options`` are the ``grandfatherson.to_keep``
+    arguments.  Everything ``to_delete`` would delete is deleted, then
+    kept backups are evicted by priority until the total size of the
+    rest is within the budget.  Backups held by the ``holds`` option
+    are never evicted, even if they alone exceed the budget.
+    """
+    if budget < 0:
+        raise ValueError('Invalid budget: %s' % budget)
+    size_of = sizes.__getitem__ if hasattr(sizes, '__getitem__') else sizes
+
+    reasons = explain(datetimes, **options)
+    deleted = set()
+    retained = []
+    total = 0
+    for dt, why in reasons.items():
+        if not why:
+            deleted.add(dt)
+            continue
+        size = size_of(dt)
+        total += size
+        if why[0][0] == 'hold':
+            continue
+        rank = min(RANKS[tier] for tier, bucket in why)
+        # Finest tier first, then oldest first
+        retained.append((-rank, dt, size))
+
+    heapq.heapify(retained)
+    while total > budget and retained:
+        rank, dt, size = heapq.heappop(retained)
+        deleted.add(dt)
+        total -= size
+    return deleted
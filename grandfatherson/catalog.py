@@ -0,0 +1,195 @@
+"""
+A persistent catalog of backups, kept in an SQLite database.
+
+The catalog remembers the backups of each series between runs, so a
+rotation only has to fetch what changed in the store.  Keep decisions
+are computed with one indexed range query per tier window, rather than
+by loading every backup the series has ever had.
+
+Timestamps are stored as integers, as ``grandfatherson.timestamps``
+describes; timezone-aware datetimes are therefore kept in UTC.
+"""
+import sqlite3
+
+from grandfatherson import SATURDAY
+from grandfatherson.filters import FILTERS, resolve_now, tier_numbers, utc
+from grandfatherson.timestamps import from_micros, to_micros
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    series TEXT NOT NULL,
+    key TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    aware INTEGER NOT NULL,
+    kept INTEGER,
+    PRIMARY KEY (series, key)
+);
+CREATE INDEX IF NOT EXISTS backups_timestamp ON backups (series, timestamp);
+CREATE INDEX IF NOT EXISTS backups_kept ON backups (series, kept);
+"""
+
+
+class Catalog(object):
+    """
+    Backups of any number of series, stored in the SQLite database at
+    ``path``.  By default, the catalog only lives in memory.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, series, entries):
+        """Record ``(key, datetime)`` ``entries`` as part of ``series``."""
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO backups '
+                '(series, key, timestamp, aware, kept) '
+                'VALUES (?, ?, ?, ?, NULL)',
+                ((series, key, to_micros(dt), dt.tzinfo is not None)
+                 for key, dt in entries)
+            )
+
+    def remove(self, series, keys):
+        """Forget the backups of ``series`` named by ``keys``."""
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM backups WHERE series = ? AND key = ?',
+                ((series, key) for key in keys)
+            )
+
+    def keys(self, series):
+        """Return the set of keys recorded for ``series``."""
+        return set(key for key, in self.connection.execute(
+            'SELECT key FROM backups WHERE series = ?', (series,)))
+
+    def entries(self, series):
+        """Return the ``(key, datetime)`` pairs of ``series``, oldest first."""
+        return self._select(series, '', ())
+
+    def sync(self, series, entries):
+        """
+        Bring ``series`` up to date with ``entries``: the complete
+        ``(key, datetime)`` listing of its store, such as
+        ``Store.entries()``.
+
+        Only keys that are not in the catalog yet, or whose datetime
+        changed, such as objects that were overwritten, are written.
+        Return a tuple of the added or re-dated keys and of the removed
+        keys.
+        """
+        known = dict((key, (timestamp, aware))
+                     for key, timestamp, aware in self.connection.execute(
+                         'SELECT key, timestamp, aware FROM backups '
+                         'WHERE series = ?', (series,)))
+        added = []
+        seen = set()
+        for key, dt in entries:
+            seen.add(key)
+            if known.get(key) != (to_micros(dt), dt.tzinfo is not None):
+                added.append((key, dt))
+        removed = set(known) - seen
+        self.add(series, added)
+        self.remove(series, removed)
+        return [key for key, dt in added], removed
+
+    def to_keep(self, series,
+                years=0, months=0, weeks=0, days=0,
+                hours=0, minutes=0, seconds=0,
+                firstweekday=SATURDAY, now=None, holds=None):
+        """
+        Return the set of keys of ``series`` that should be kept.
+
+        See ``grandfatherson.to_keep`` for a description of arguments;
+        backups held by ``holds`` by their key, as well as by their
+        datetime, are kept.  The decision is recorded in the catalog.
+        """
+        numbers = tier_numbers(years=years, months=months, weeks=weeks,
+                               days=days, hours=hours, minutes=minutes,
+                               seconds=seconds)
+
+        row = self.connection.execute(
+            'SELECT aware FROM backups WHERE series = ? LIMIT 1', (series,)
+        ).fetchone()
+        if row is None:
+            return set()
+        now = resolve_now(now, utc if row[0] else None)
+        end = to_micros(now)
+
+        # Always keep datetimes from the future
+        kept = set(key for key, dt in self._select(
+            series, 'AND timestamp > ?', (end,)))
+
+        for name, cls in FILTERS:
+            number = numbers[name]
+            if number == 0:
+                continue
+            start = cls.start(now, number, firstweekday=firstweekday)
+            window = self._select(series, 'AND timestamp BETWEEN ? AND ?',
+                                  (to_micros(start), end))
+            keys = {}
+            for key, dt in window:
+                keys.setdefault(dt, []).append(key)
+            for dt in cls.filter(keys, number=number, now=now,
+                                 firstweekday=firstweekday):
+                kept.update(keys[dt])
+
+        if holds is not None:
+            # One indexed query per held interval and datetime
+            for start, end in zip(holds.starts, holds.ends):
+                kept.update(key for key, dt in self._select(
+                    series, 'AND timestamp BETWEEN ? AND ?',
+                    (to_micros(start), to_micros(end))))
+            for held in holds.datetimes:
+                kept.update(key for key, dt in self._select(
+                    series, 'AND timestamp = ?', (to_micros(held),)))
+            for key in holds.keys:
+                if self.connection.execute(
+                        'SELECT 1 FROM backups WHERE series = ? AND key = ?',
+                        (series, key)).fetchone():
+                    kept.add(key)
+
+        # Only write the rows whose decision changed, so that a run
+        # against an unchanged store writes nothing
+        previous = self._kept(series, 1)
+        with self.connection:
+            self.connection.executemany(
+                'UPDATE backups SET kept = 1 WHERE series = ? AND key = ?',
+                ((series, key) for key in kept - previous)
+            )
+            self.connection.execute(
+                'UPDATE backups SET kept = 0 '
+                'WHERE series = ? AND kept IS NULL', (series,))
+            self.connection.executemany(
+                'UPDATE backups SET kept = 0 WHERE series = ? AND key = ?',
+                ((series, key) for key in previous - kept)
+            )
+        return kept
+
+    def to_delete(self, series, **options):
+        """
+        Return the set of keys of ``series`` that should be deleted.
+
+        See ``grandfatherson.to_keep`` for a description of arguments.
+        Only the backups that ``to_keep`` records as deleted are read.
+        """
+        self.to_keep(series, **options)
+        return self._kept(series, 0)
+
+    def _kept(self, series, kept):
+        return set(key for key, in self.connection.execute(
+            'SELECT key FROM backups WHERE series = ? AND kept = ?',
+            (series, kept)))
+
+    def _select(self, series, condition, parameters):
+        cursor = self.connection.execute(
+            'SELECT key, timestamp, aware FROM backups WHERE series = ? ' +
+            condition + ' ORDER BY timestamp',
+            (series,) + tuple(parameters)
+        )
+        return [(key, from_micros(timestamp, utc if aware else None))
+                for key, timestamp, aware in cursor]
@@ -0,0 +1,209 @@
+"""
+Command line interface, for rotation run from cron or similar.
+
+Reads one backup timestamp per line, from the files named or from
+standard input, and prints the lines to delete::
+
+    ls /backups | python -m grandfatherson --format %Y%m%d.tar \\
+        --days 7 --weeks 4 --months 12
+
+or, with ``--fleet``, rotates a whole ``grandfatherson.fleet``
+configuration and prints the keys deleted from each source.
+
+Each run is a short-lived process, so startup time matters more than
+the rotation itself: options are parsed by hand, as ``getopt`` and
+``argparse`` both import ``gettext`` and ``locale``; timestamps are
+parsed with ``datetime.fromisoformat`` unless a ``--format`` is
+given, and the fleet machinery is only imported when it is used.
+"""
+import sys
+
+from grandfatherson import to_delete, to_keep
+
+
+USAGE = """\
+usage: python -m grandfatherson [OPTIONS] [FILE...]
+       python -m grandfatherson --fleet CONFIG [--dry-run] [--workers N]
+
+Print the lines of FILE, or of standard input, whose timestamps should
+be deleted.
+
+  --years N, --months N, --weeks N, --days N,
+  --hours N, --minutes N, --seconds N
+                        number of backups to keep in each tier
+  --firstweekday DAY    weekday preferred for weekly backups, as a name
+                        or a number from 0 for Monday (default: saturday)
+  --now DATETIME        rotate as of DATETIME, in ISO 8601 format
+  --format FORMAT       parse lines with this strptime format instead
+                        of as ISO 8601
+  --keep                print the lines to keep instead
+  --fleet CONFIG        rotate the fleet configured in CONFIG
+  --dry-run             with --fleet, only print what would be deleted
+  --workers N           with --fleet, rotate N series at once (default: 4)
+  -h, --help            show this help
+"""
+
+TIERS = ('years', 'months', 'weeks', 'days', 'hours', 'minutes', 'seconds')
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday',
+            'saturday', 'sunday')
+
+# Options taking a value, and flags
+OPTIONS = TIERS + ('firstweekday', 'now', 'format', 'fleet', 'workers')
+FLAGS = ('keep', 'dry-run', 'help')
+
+
+def parse_args(argv):
+    """
+    Return ``(options, files)`` from the arguments ``argv``: a list of
+    ``(name, value)``, with a value of None for flags, and a list of
+    the other arguments.  Options may be given as ``--name value`` or
+    ``--name=value``.
+    """
+    options = []
+    files = []
+    argv = list(argv)
+    while argv:
+        argument = argv.pop(0)
+        if argument == '--':
+            files.extend(argv)
+            break
+        if argument == '-h':
+            argument = '--help'
+        if not argument.startswith('--'):
+            files.append(argument)
+            continue
+        name, equals, value = argument[2:].partition('=')
+        if name in FLAGS and not equals:
+            options.append((name, None))
+        elif name in OPTIONS:
+            if not equals:
+                if not argv:
+                    raise ValueError('Option --%s needs a value' % name)
+                value = argv.pop(0)
+            options.append((name, value))
+        else:
+            raise ValueError('Unknown option: %s' % argument)
+    return options, files
+
+
+def parse_number(value):
+    """Parse a non-negative integer option."""
+    if not value.isdigit():
+        raise ValueError('Invalid number: %s' % value)
+    return int(value)
+
+
+def parse_weekday(value):
+    """Parse a weekday, given as a name or a number."""
+    if value.lower() in WEEKDAYS:
+        return WEEKDAYS.index(value.lower())
+    if value.isdigit() and int(value) < 7:
+        return int(value)
+    raise ValueError('Invalid firstweekday: %s' % value)
+
+
+def parser(format=None):
+    """Return a function parsing a line into a datetime."""
+    from datetime import datetime
+    if format is None:
+        return datetime.fromisoformat
+    return lambda line: datetime.strptime(line, format)
+
+
+def read(files, parse, stdin):
+    """Return the ``(line, datetime)`` pairs read from ``files``."""
+    lines = []
+    for path in files or ['-']:
+        f = stdin if path == '-' else open(path)
+        try:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                try:
+                    dt = parse(line)
+                except ValueError:
+                    raise ValueError('Invalid datetime: %s' % line)
+                lines.append((line, dt))
+        finally:
+            if f is not stdin:
+                f.close()
+    return lines
+
+
+def rotate_fleet(config, dry_run, workers, now, stdout):
+    # Only fleet rotation needs threads and configuration parsing
+    from grandfatherson.fleet import Fleet, load
+    plan = Fleet(load(config)).plan()
+    deleted = plan.execute(workers=workers, dry_run=dry_run, now=now)
+    for source in sorted(deleted):
+        for key in deleted[source]:
+            stdout.write('%s: %s\n' % (source, key))
+
+
+def main(argv=None, stdin=None, stdout=None, stderr=None):
+    """Run the command line interface, and return its exit status."""
+    argv = sys.argv[1:] if argv is None else argv
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    try:
+        options, files = parse_args(argv)
+    except ValueError as e:
+        stderr.write('%s\n%s' % (e, USAGE))
+        return 2
+
+    policy = {}
+    now = None
+    format = None
+    keep = False
+    fleet = None
+    dry_run = False
+    workers = 4
+    try:
+        for name, value in options:
+            if name == 'help':
+                stdout.write(USAGE)
+                return 0
+            elif name in TIERS:
+                policy[name] = parse_number(value)
+            elif name == 'firstweekday':
+                policy['firstweekday'] = parse_weekday(value)
+            elif name == 'now':
+                now = parser()(value)
+            elif name == 'format':
+                format = value
+            elif name == 'keep':
+                keep = True
+            elif name == 'fleet':
+                fleet = value
+            elif name == 'dry-run':
+                dry_run = True
+            elif name == 'workers':
+                workers = parse_number(value) or 1
+
+        if fleet is not None:
+            rotate_fleet(fleet, dry_run, workers, now, stdout)
+            return 0
+
+        lines = read(files, parser(format), stdin)
+        datetimes = [dt for line, dt in lines]
+        if keep:
+            selected = to_keep(datetimes, now=now, **policy)
+        else:
+            selected = to_delete(datetimes, now=now, **policy)
+    except TypeError as e:
+        # Naive and timezone-aware datetimes, in the input or in --now,
+        # cannot be compared
+        stderr.write('%s\n%s' % (e, USAGE))
+        return 2
+    except (IOError, OSError, ValueError) as e:
+        stderr.write('grandfatherson: %s\n' % e)
+        return 1
+
+    for line, dt in lines:
+        if dt in selected:
+            stdout.write(line + '\n')
+    return 0
@@ -0,0 +1,64 @@
+"""
+Checks that retained backups actually cover a policy.
+
+Failed backup jobs leave holes that rotation cannot fill: a day with
+no backup, or a week whose only backup was lost.  ``check`` reports,
+for each tier, which of its last ``number`` buckets are empty and the
+largest gap between backups within its window, using the same buckets
+as ``grandfatherson.filters``.
+"""
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from grandfatherson import SATURDAY
+from grandfatherson.filters import FILTERS, resolve_now_for, tier_numbers
+
+
+Coverage = namedtuple('Coverage', ['tier', 'number', 'empty', 'largest_gap'])
+
+
+def check(datetimes,
+          years=0, months=0, weeks=0, days=0,
+          hours=0, minutes=0, seconds=0,
+          firstweekday=SATURDAY, now=None):
+    """
+    Return a list of ``Coverage(tier, number, empty, largest_gap)``,
+    one per tier with a non-zero number, coarsest first.
+
+    ``empty`` is a sorted list of the buckets, as masked datetimes,
+    without any backup among the last ``number`` buckets up to
+    ``now``.  ``largest_gap`` is the longest timedelta without a backup
+    between the start of the tier's window and ``now``.
+
+    See ``grandfatherson.to_keep`` for a description of arguments.
+    The datetimes are sorted once, and each tier only looks at its own
+    window.
+    """
+    numbers = tier_numbers(years=years, months=months, weeks=weeks,
+                           days=days, hours=hours, minutes=minutes,
+                           seconds=seconds)
+
+    datetimes = sorted(set(datetimes))
+
+    now = resolve_now_for(datetimes, now)
+    end = bisect_right(datetimes, now)
+
+    report = []
+    for name, cls in FILTERS:
+        number = numbers[name]
+        if number == 0:
+            continue
+        start = cls.start(now, number, firstweekday=firstweekday)
+        window = datetimes[bisect_left(datetimes, start):end]
+
+        present = set(cls.mask(dt, firstweekday=firstweekday)
+                      for dt in window)
+        # The start of a window of n units is the nth bucket back
+        buckets = [cls.start(now, n, firstweekday=firstweekday)
+                   for n in range(number, 0, -1)]
+        empty = [bucket for bucket in buckets if bucket not in present]
+
+        points = [start] + window + [now]
+        largest_gap = max(b - a for a, b in zip(points, points[1:]))
+        report.append(Coverage(cls.__name__, number, empty, largest_gap))
+    return report
@@ -0,0 +1,275 @@
+"""
+Rotation of a shared backup store by several nodes at once.
+
+Series are spread over the nodes with consistent hashing, so adding or
+removing a node only moves the series it gains or loses.  Before
+rotating a series, a node takes a lease on it from a lock backend;
+nodes that disagree about who owns a series, for instance while
+membership is changing, therefore never rotate it at the same time.
+
+``FileLockBackend`` keeps the leases as files in a shared directory.
+Other backends only need to implement ``LockBackend``.
+"""
+from bisect import bisect
+import errno
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from grandfatherson.stores import rotate
+
+
+LEASE = '.lease'
+
+
+def _hash(value):
+    # Only for spreading names over the ring, so that FIPS-enabled
+    # builds, which refuse MD5 for security, still allow it
+    return int(hashlib.md5(value.encode('utf-8'),
+                           usedforsecurity=False).hexdigest()[:16], 16)
+
+
+class HashRing(object):
+    """
+    A consistent hash ring of ``nodes``, each placed on it ``replicas``
+    times to even out the load.
+    """
+
+    def __init__(self, nodes, replicas=100):
+        if not nodes:
+            raise ValueError('A hash ring needs at least one node')
+        points = sorted((_hash('%s#%d' % (node, i)), node)
+                        for node in set(nodes) for i in range(replicas))
+        self.hashes = [h for h, node in points]
+        self.nodes = [node for h, node in points]
+
+    def node_for(self, key):
+        """Return the node that owns ``key``."""
+        i = bisect(self.hashes, _hash(key)) % len(self.hashes)
+        return self.nodes[i]
+
+
+class LockBackend(object):
+    """Base class."""
+
+    def acquire(self, name, owner, ttl):
+        """
+        Take, or renew, the lease on ``name`` for ``owner``, for ``ttl``
+        seconds.  Return False if someone else holds it.
+        """
+        raise NotImplementedError
+
+    def release(self, name, owner):
+        """Give up ``owner``'s lease on ``name``, if it holds it."""
+        raise NotImplementedError
+
+
+class FileLockBackend(LockBackend):
+    """
+    Leases kept as small JSON files in ``directory``.
+
+    Every change to a lease, whether taking it, renewing it or releasing
+    it, writes a new generation of it, numbered one after the last seen,
+    with ``os.link``, which fails if that generation already exists.  Of
+    several nodes taking over the same expired lease, only one can
+    therefore succeed.  Older generations are removed once a newer one
+    exists, but the last is never removed, so generation numbers only
+    grow: a node that recreates a removed generation from a stale view
+    sees a newer one and gives up.
+    """
+
+    def __init__(self, directory, clock=time.time):
+        self.directory = directory
+        self.clock = clock
+
+    def path(self, name):
+        """Return the directory holding the generations of ``name``."""
+        digest = hashlib.sha1(name.encode('utf-8'),
+                              usedforsecurity=False).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    def holder(self, name):
+        """Return ``(owner, expires)`` for the lease on ``name``, or None."""
+        generation, lease = self._last(self.path(name))
+        if lease is None or lease['owner'] is None:
+            return None
+        return lease['owner'], lease['expires']
+
+    def acquire(self, name, owner, ttl):
+        now = self.clock()
+        path = self.path(name)
+        generation, lease = self._last(path)
+        if (lease is not None and lease['owner'] not in (None, owner) and
+                lease['expires'] > now):
+            return False
+        return self._create(path, generation + 1,
+                            {'owner': owner, 'expires': now + ttl})
+
+    def release(self, name, owner):
+        path = self.path(name)
+        generation, lease = self._last(path)
+        if lease is not None and lease['owner'] == owner:
+            # If the lease expired and was taken over meanwhile, this
+            # generation exists already and nothing is released
+            self._create(path, generation + 1, {'owner': None, 'expires': 0})
+
+    def _generations(self, path):
+        try:
+            names = os.listdir(path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return []
+        return sorted(int(name[:-len(LEASE)]) for name in names
+                      if name.endswith(LEASE) and
+                      name[:-len(LEASE)].isdigit())
+
+    def _last(self, path):
+        """Return the last generation in ``path`` and its lease."""
+        while True:
+            generations = self._generations(path)
+            if not generations:
+                return -1, None
+            try:
+                with open(os.path.join(path, '%d%s' % (generations[-1],
+                                                       LEASE))) as f:
+                    return generations[-1], json.load(f)
+            except (IOError, OSError) as e:
+                if e.errno != errno.ENOENT:
+                    raise
+                # A newer generation replaced it meanwhile: look again
+
+    def _create(self, path, generation, lease):
+        """Create ``generation`` in ``path``; return whether it is last."""
+        if not os.path.isdir(path):
+            try:
+                os.mkdir(path)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+        target = os.path.join(path, '%d%s' % (generation, LEASE))
+        fd, temporary = tempfile.mkstemp(dir=path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(lease, f)
+            try:
+                os.link(temporary, target)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+                return False
+        finally:
+            os.unlink(temporary)
+
+        generations = self._generations(path)
+        if generations[-1] != generation:
+            # Created from a stale view, after this generation had
+            # been removed; the newer one stands
+            _remove(target)
+            return False
+        for older in generations[:-1]:
+            _remove(os.path.join(path, '%d%s' % (older, LEASE)))
+        return True
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+class _Renewal(threading.Thread):
+    """Renews the lease on ``series`` every third of its ``ttl``."""
+
+    def __init__(self, backend, series, owner, ttl):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.backend = backend
+        self.series = series
+        self.owner = owner
+        self.ttl = ttl
+        self.stopped = threading.Event()
+        # Renewing from two threads at once would race for the same
+        # generation, and one would think the lease lost
+        self.lock = threading.Lock()
+        self.lost = False
+
+    def run(self):
+        while not self.stopped.wait(self.ttl / 3.0):
+            if not self.held():
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def held(self):
+        """Renew the lease once more, and return whether it is held."""
+        with self.lock:
+            if not self.lost:
+                self.lost = not self.backend.acquire(self.series, self.owner,
+                                                     self.ttl)
+            return not self.lost
+
+
+class Worker(object):
+    """
+    The rotation work of ``node``, out of the live ``nodes``, taking
+    leases of ``ttl`` seconds from ``backend``.
+    """
+
+    def __init__(self, node, nodes, backend, ttl=300, replicas=100):
+        if node not in nodes:
+            raise ValueError('Node %s is not one of the nodes' % node)
+        self.node = node
+        self.ring = HashRing(nodes, replicas)
+        self.backend = backend
+        self.ttl = ttl
+
+    def owned(self, series):
+        """Return the names in ``series`` that this node owns."""
+        return [name for name in series if self.ring.node_for(name) ==
+                self.node]
+
+    def run(self, stores, policies, dry_run=False):
+        """
+        Rotate the series this node owns and can lease.
+
+        ``stores`` maps series names to ``grandfatherson.stores.Store``
+        objects, and ``policies`` maps them to ``to_delete`` arguments;
+        it is either a dict or a function.
+
+        The lease on each series is renewed while it is rotated, and
+        once more before deleting anything; a series whose lease was
+        lost meanwhile is left alone.
+
+        Return a dict mapping each series rotated to the keys deleted.
+        """
+        lookup = policies.get if hasattr(policies, 'get') else policies
+        deleted = {}
+        for name in sorted(self.owned(stores)):
+            policy = lookup(name)
+            if policy is None:
+                continue
+            if not self.backend.acquire(name, self.node, self.ttl):
+                continue
+            renewal = _Renewal(self.backend, name, self.node, self.ttl)
+            renewal.start()
+            try:
+                keys = rotate(stores[name], dry_run=True, **policy)
+                # Only delete while still holding the lease, in case
+                # listing the store took longer than it lasts
+                if keys and not dry_run:
+                    if not renewal.held():
+                        continue
+                    stores[name].delete(keys)
+                deleted[name] = keys
+            finally:
+                renewal.stop()
+                self.backend.release(name, self.node)
+        return deleted
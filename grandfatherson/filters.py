@@ -1,10 +1,21 @@
 """
 Filters used by GrandFatherSon to decide which datetimes to keep.
+
+The filters keep no state between calls, so they may be used from
+several threads at once, as may ``grandfatherson.to_keep`` and
+``grandfatherson.to_delete``.  Callbacks registered through
+``observe`` are kept in a context variable, so each thread, or
+asyncio task, only notifies its own.
 """
 from __future__ import division
 
-import calendar
+from contextvars import ContextVar
 from datetime import datetime, time, timedelta, tzinfo
+from time import perf_counter as clock
+
+
+# The weekday numbers of the calendar module, which is slow to import
+MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = range(7)
 
 
 # As gleefully stolen from the python datetime docs
@@ -22,6 +33,128 @@ class UTC(tzinfo):
         return self.ZERO
 
 
+# UTC is immutable, so one instance serves every call
+utc = UTC()
+
+# Callbacks registered through observe(), as a tuple that is replaced
+# rather than changed, in the context of each thread
+_observers = ContextVar('grandfatherson.observers', default=())
+
+
+class observe(object):
+    """
+    Call ``callback`` with a dict describing each ``Filter.filter``
+    and ``to_keep`` call made within the ``with`` block::
+
+        >>> from grandfatherson.filters import Days, observe
+        >>> events = []
+        >>> with observe(events.append):
+        ...     kept = Days.filter([datetime(1999, 12, 31)], number=7,
+        ...                        now=datetime(2000, 1, 1))
+        >>> events[0]['tier'], events[0]['input'], events[0]['kept']
+        ('Days', 1, 1)
+
+    Events from ``Filter.filter`` have an ``event`` of ``'filter'``,
+    the ``tier`` class name and its ``number``; the sizes of the
+    ``input``, of the ``future`` datetimes, of the ``window`` between
+    the start and ``now``, and of the ``kept`` result; and the
+    ``seconds`` spent in total and in each stage: ``copy_seconds``,
+    ``future_seconds``, ``sort_seconds`` and ``dedupe_seconds``.
+
+    Events from ``to_keep`` have an ``event`` of ``'to_keep'``, the
+    ``plan`` of ``grandfatherson.planner`` that it took, the ``input``,
+    ``kept`` and ``future`` sizes, the ``seconds`` spent in total and
+    the ``copy_seconds`` spent copying the input.  Only the ``filters``
+    plan sends events from ``Filter.filter``; the others add a
+    ``tiers`` dict of the number kept by each tier instead.
+
+    Only calls made by the thread that entered the ``with`` block are
+    observed.  When nothing is being observed, no timing is done at
+    all.
+    """
+    # A plain class rather than contextlib.contextmanager, which would
+    # slow down importing grandfatherson
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.tokens = []
+
+    def __enter__(self):
+        self.tokens.append(_observers.set(_observers.get() +
+                                          (self.callback,)))
+        return self.callback
+
+    def __exit__(self, *exc_info):
+        _observers.reset(self.tokens.pop())
+
+
+def observed():
+    """Return whether any callback is registered with ``observe``."""
+    return bool(_observers.get())
+
+
+def notify(**event):
+    """Pass ``event`` to every callback registered with ``observe``."""
+    for callback in _observers.get():
+        callback(event)
+
+
+def resolve_now(now, tzinfo=None):
+    """
+    Return the datetime that filters should treat as ``now``.
+
+    If ``now`` is None, use the current time in ``tzinfo``.  If
+    ``now`` is a date, use the last moment of that day.
+    """
+    if now is None:
+        return datetime.now(tzinfo)
+
+    if not hasattr(now, 'second'):
+        # now looks like a date, so convert it into a datetime
+        return datetime.combine(now, time(23, 59, 59, 999999, tzinfo=tzinfo))
+
+    return now
+
+
+def check_number(number):
+    """Raise ValueError unless ``number`` is a valid number to keep."""
+    if not isinstance(number, int) or number < 0:
+        raise ValueError('Invalid number: %s' % number)
+
+
+def tier_numbers(years=0, months=0, weeks=0, days=0,
+                 hours=0, minutes=0, seconds=0):
+    """
+    Return a dict mapping the names of ``FILTERS`` to the number of
+    each to keep, after checking them.
+    """
+    numbers = {'years': years, 'months': months, 'weeks': weeks,
+               'days': days, 'hours': hours, 'minutes': minutes,
+               'seconds': seconds}
+    for number in numbers.values():
+        check_number(number)
+    return numbers
+
+
+def sample_tzinfo(datetimes):
+    """
+    Return ``utc`` if the first of ``datetimes``, a collection, is
+    timezone-aware, and None otherwise, as for dates.
+    """
+    sample = next(iter(datetimes), None)
+    if getattr(sample, 'tzinfo', None) is not None:
+        return utc
+    return None
+
+
+def resolve_now_for(datetimes, now):
+    """
+    Return ``now`` resolved as ``resolve_now`` does, in UTC if
+    ``datetimes`` are timezone-aware.
+    """
+    return resolve_now(now, sample_tzinfo(datetimes))
+
+
 class Filter(object):
     """Base class."""
 
@@ -53,40 +186,62 @@ class Filter(object):
         If there are ``datetimes`` after ``now``, they will be
         returned unfiltered.
         """
-        if not isinstance(number, int) or number < 0:
-            raise ValueError('Invalid number: %s' % number)
+        check_number(number)
 
-        datetimes = tuple(datetimes)
+        is_observed = observed()
+        if is_observed:
+            started = clock()
 
-        # Sample the first datetime to see if it is timezone-aware
-        tzinfo = None
-        if datetimes and datetimes[0].tzinfo is not None:
-            tzinfo = UTC()
+        datetimes = tuple(datetimes)
 
-        if now is None:
-            now = datetime.now(tzinfo)
+        if is_observed:
+            copied = clock()
 
-        if not hasattr(now, 'second'):
-            # now looks like a date, so convert it into a datetime
-            now = datetime.combine(now, time(23, 59, 59, 999999, tzinfo=tzinfo))
+        now = resolve_now_for(datetimes, now)
 
         # Always keep datetimes from the future
         future = set(dt for dt in datetimes if dt > now)
 
+        if is_observed:
+            scanned = clock()
+
         if number == 0:
+            if is_observed:
+                notify(event='filter', tier=cls.__name__, number=number,
+                       input=len(datetimes), future=len(future), window=0,
+                       kept=len(future), seconds=scanned - started,
+                       copy_seconds=copied - started,
+                       future_seconds=scanned - copied,
+                       sort_seconds=0.0, dedupe_seconds=0.0)
             return future
 
         # Don't consider datetimes from before the start
         start = cls.start(now, number, **options)
-        valid = (dt for dt in datetimes if start <= dt <= now)
+        valid = sorted(dt for dt in datetimes if start <= dt <= now)
+
+        if is_observed:
+            ordered = clock()
 
         # Deduplicate datetimes with the same mask() value by keeping
         # the oldest.
         kept = {}
-        for dt in sorted(valid):
+        for dt in valid:
             kept.setdefault(cls.mask(dt, **options), dt)
 
-        return set(kept.values()) | future
+        result = set(kept.values()) | future
+
+        if is_observed:
+            finished = clock()
+            notify(event='filter', tier=cls.__name__, number=number,
+                   input=len(datetimes), future=len(future),
+                   window=len(valid), kept=len(result),
+                   seconds=finished - started,
+                   copy_seconds=copied - started,
+                   future_seconds=scanned - copied,
+                   sort_seconds=ordered - scanned,
+                   dedupe_seconds=finished - ordered)
+
+        return result
 
 
 class Seconds(Filter):
@@ -133,7 +288,7 @@ class Weeks(Filter):
     DAYS_IN_WEEK = 7
 
     @classmethod
-    def start(cls, now, number, firstweekday=calendar.SATURDAY, **options):
+    def start(cls, now, number, firstweekday=SATURDAY, **options):
         """
         Return the starting datetime: ``number`` of weeks before ``now``.
 
@@ -145,7 +300,7 @@ class Weeks(Filter):
         return week - timedelta(days=days)
 
     @classmethod
-    def mask(cls, dt, firstweekday=calendar.SATURDAY, **options):
+    def mask(cls, dt, firstweekday=SATURDAY, **options):
         """
         Return a datetime with the same value as ``dt``, to a
         resolution of weeks.
@@ -204,3 +359,9 @@ class Years(Filter):
         """
         return dt.replace(month=1, day=1,
                           hour=0, minute=0, second=0, microsecond=0)
+
+
+# Every filter, by the ``to_keep`` keyword that sets its number
+FILTERS = (('years', Years), ('months', Months), ('weeks', Weeks),
+           ('days', Days), ('hours', Hours), ('minutes', Minutes),
+           ('seconds', Seconds))
@@ -0,0 +1,210 @@
+"""
+Rotation of a whole fleet of backups, from one configuration file.
+
+The configuration, in JSON or TOML, names the stores to rotate and
+the rules giving each backup its policy::
+
+    {
+        "sources": {
+            "local": {"path": "/backups", "format": "%Y%m%d.tar"}
+        },
+        "rules": [
+            {"source": "local", "match": "db*/*",
+             "policy": {"days": 7, "weeks": 4, "months": 12}},
+            {"source": "s3", "prefix": "hostA/",
+             "policy": {"days": 30, "firstweekday": "sunday"}}
+        ]
+    }
+
+Sources in the configuration are ``DirectoryStore`` arguments; other
+stores, such as an ``S3Store``, are given to ``Fleet.plan`` by name.
+
+Each rule matches backup keys within its source, either by ``match``,
+an ``fnmatch`` pattern, or by ``prefix``; the first matching rule
+wins.  Backups matched by a pattern form one series per directory,
+while those matched by a prefix form one series per prefix.  Backups
+that no rule matches are left alone.
+
+The rules are compiled once into a matching table per source, each
+source is listed only once however many rules use it, and the series
+are rotated on a pool of threads.
+"""
+import calendar
+from concurrent.futures import ThreadPoolExecutor
+import fnmatch
+import json
+import re
+
+from grandfatherson import to_delete
+from grandfatherson.stores import DirectoryStore
+
+
+POLICY_KEYS = frozenset(['years', 'months', 'weeks', 'days', 'hours',
+                         'minutes', 'seconds', 'firstweekday'])
+
+WEEKDAYS = dict((name.lower(), number)
+                for number, name in enumerate(calendar.day_name))
+
+
+def load(path):
+    """Load a configuration from a ``.toml`` or JSON file at ``path``."""
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError('Reading %s needs Python 3.11 or later' % path)
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+def compile_policy(policy):
+    """
+    Return ``policy`` as ``to_delete`` keyword arguments, with
+    ``firstweekday`` converted from a day name if need be.
+    """
+    unknown = set(policy) - POLICY_KEYS
+    if unknown:
+        raise ValueError('Unknown policy keys: %s' %
+                         ', '.join(sorted(unknown)))
+    policy = dict(policy)
+    firstweekday = policy.get('firstweekday')
+    if isinstance(firstweekday, str):
+        try:
+            policy['firstweekday'] = WEEKDAYS[firstweekday.lower()]
+        except KeyError:
+            raise ValueError('Invalid firstweekday: %s' % firstweekday)
+    return policy
+
+
+class Rules(object):
+    """
+    The matching table for one source: its rules, in order, compiled
+    into a single regular expression.
+    """
+
+    def __init__(self, rules):
+        self.policies = []
+        self.prefixes = []
+        patterns = []
+        for i, rule in enumerate(rules):
+            if ('match' in rule) == ('prefix' in rule):
+                raise ValueError('Rule %d needs either match or prefix' % i)
+            self.policies.append(compile_policy(rule.get('policy', {})))
+            if 'match' in rule:
+                self.prefixes.append(None)
+                pattern = fnmatch.translate(rule['match'])
+            else:
+                self.prefixes.append(rule['prefix'])
+                pattern = re.escape(rule['prefix']) + '.*'
+            patterns.append('(?P<rule%d>%s)' % (i, pattern))
+        self.regex = re.compile('|'.join(patterns) or '(?!)', re.DOTALL)
+
+    def match(self, key):
+        """
+        Return ``(series, policy)`` for the first rule matching ``key``,
+        or None.
+        """
+        match = self.regex.match(key)
+        if match is None:
+            return None
+        # Alternatives are tried in order, so the first rule wins
+        i = next(int(name[4:])
+                 for name, value in match.groupdict().items()
+                 if value is not None and name.startswith('rule'))
+        prefix = self.prefixes[i]
+        if prefix is None:
+            prefix = key.rpartition('/')[0]
+        return (i, prefix), self.policies[i]
+
+
+class Fleet(object):
+    """A compiled ``config``: the sources and their matching tables."""
+
+    def __init__(self, config):
+        self.sources = dict(
+            (name, DirectoryStore(**options))
+            for name, options in config.get('sources', {}).items())
+        by_source = {}
+        for rule in config.get('rules', []):
+            if 'source' not in rule:
+                raise ValueError('Rule without a source: %r' % (rule,))
+            by_source.setdefault(rule['source'], []).append(rule)
+        self.rules = dict((source, Rules(rules))
+                          for source, rules in by_source.items())
+
+    def plan(self, stores=None):
+        """
+        Return a ``Plan`` covering every source that has rules.
+        ``stores`` adds or overrides sources by name.
+        """
+        sources = dict(self.sources, **(stores or {}))
+        missing = set(self.rules) - set(sources)
+        if missing:
+            raise ValueError('Unknown sources: %s' %
+                             ', '.join(sorted(missing)))
+        return Plan(dict((name, sources[name]) for name in self.rules),
+                     self.rules)
+
+
+class Plan(object):
+    """The rotation of ``stores``, by name, according to ``rules``."""
+
+    def __init__(self, stores, rules):
+        self.stores = stores
+        self.rules = rules
+
+    def series(self, name):
+        """
+        List source ``name`` once, and return its matched entries as a
+        dict mapping each series to its policy and a dict of
+        ``{datetime: [key, ...]}``.
+        """
+        rules = self.rules[name]
+        series = {}
+        for key, dt in self.stores[name].entries():
+            matched = rules.match(key)
+            if matched is None:
+                continue
+            identity, policy = matched
+            if identity not in series:
+                series[identity] = (policy, {})
+            series[identity][1].setdefault(dt, []).append(key)
+        return series
+
+    def execute(self, workers=4, dry_run=False, now=None, holds=None):
+        """
+        Rotate every series of every source, using up to ``workers``
+        threads.  If ``dry_run`` is true, nothing is deleted.  Backups
+        held by ``holds``, a ``grandfatherson.holds.Holds``, by their
+        datetime or their key, are never deleted.
+
+        Return a dict mapping each source name to the sorted list of
+        keys that were, or would have been, deleted from it.
+        """
+        held = holds.keys if holds is not None else ()
+
+        def rotate(name, policy, keys_by_datetime):
+            keys = sorted(key
+                          for dt in to_delete(keys_by_datetime, now=now,
+                                              holds=holds, **policy)
+                          for key in keys_by_datetime[dt] if key not in held)
+            if keys and not dry_run:
+                self.stores[name].delete(keys)
+            return keys
+
+        deleted = dict((name, []) for name in self.stores)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            listings = dict((name, executor.submit(self.series, name))
+                            for name in self.stores)
+            rotations = []
+            for name, listing in listings.items():
+                for policy, keys_by_datetime in listing.result().values():
+                    rotations.append((name, executor.submit(
+                        rotate, name, policy, keys_by_datetime)))
+            for name, rotation in rotations:
+                deleted[name].extend(rotation.result())
+        for keys in deleted.values():
+            keys.sort()
+        return deleted
@@ -0,0 +1,66 @@
+"""
+Forecasts of how many backups, and how many bytes, a policy retains
+over time.
+
+Rather than calling ``to_keep`` over the whole history at every
+simulated step, ``forecast`` feeds each new backup into an
+``grandfatherson.incremental.Rotation`` and prunes what it rejects, so
+every step only costs as much as the backups it adds and the buckets
+in the tiers' windows.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from grandfatherson.incremental import Rotation
+
+
+Step = namedtuple('Step', ['now', 'count', 'bytes'])
+
+
+def forecast(policy, cadence, start, end, step=None, existing=(),
+             size=0):
+    """
+    Return a list of ``Step(now, count, bytes)``, giving the backups
+    retained by ``policy`` after each rotation from ``start`` until
+    ``end``.
+
+    ``policy`` holds the ``grandfatherson.to_keep`` arguments, except
+    for ``now``.  A backup is taken every ``cadence``, a timedelta,
+    starting at ``start``, on top of the ``existing`` datetimes.  The
+    backups are rotated every ``step``, which defaults to ``cadence``;
+    a coarser step makes for a quicker forecast.
+
+    ``size`` is the size of every backup in bytes, or a function
+    returning the size of the backup taken at a given datetime.
+    """
+    if cadence <= timedelta(0):
+        raise ValueError('Invalid cadence: %s' % cadence)
+    if step is None:
+        step = cadence
+    elif step <= timedelta(0):
+        raise ValueError('Invalid step: %s' % step)
+    size_of = size if callable(size) else (lambda dt: size)
+
+    rotation = Rotation(**policy)
+    sizes = {}
+    total = 0
+    for dt in existing:
+        if rotation.add(dt):
+            sizes[dt] = size_of(dt)
+            total += sizes[dt]
+
+    steps = []
+    backup = start
+    now = start
+    while now <= end:
+        while backup <= now:
+            if rotation.add(backup):
+                sizes[backup] = size_of(backup)
+                total += sizes[backup]
+            backup += cadence
+        for dt in rotation.to_delete(now):
+            rotation.remove(dt)
+            total -= sizes.pop(dt)
+        steps.append(Step(now, len(rotation), total))
+        now += step
+    return steps
@@ -0,0 +1,243 @@
+"""
+rsnapshot-style rotation of directory-tree backups.
+
+Backups live in slots named after the tier that keeps them and their
+rank in it, newest first: ``daily.0``, ``daily.1``, ..., ``weekly.0``,
+``monthly.0`` and so on.  Rotating promotes a backup from one slot to
+the next by renaming it, so no backup is ever copied, and a new backup
+is started with ``link_tree``, which shares every file of the newest
+backup through hard links; a tool such as ``rsync`` then only writes
+the files that changed.
+
+A typical run, with the new backup written into ``incoming``::
+
+    link_tree(os.path.join(root, newest), os.path.join(root, 'incoming'))
+    # rsync --delete source/ root/incoming/
+    entries = scan(root) + [('incoming', datetime.now())]
+    execute(root, plan(entries, days=7, weeks=4, months=12))
+
+The datetime of each slot is recorded in an index file in the root,
+as a tool like ``rsync`` resets the times of the directories it
+writes.  ``execute`` journals the plan before applying it, so that
+``recover`` can finish a run that was interrupted.
+"""
+from collections import namedtuple
+from datetime import datetime
+import errno
+import json
+import os
+import re
+import shutil
+
+from grandfatherson import explain
+
+
+# Slot names of each tier, by filter class name
+SLOTS = {'Years': 'yearly', 'Months': 'monthly', 'Weeks': 'weekly',
+         'Days': 'daily', 'Hours': 'hourly', 'Minutes': 'minutely',
+         'Seconds': 'secondly', 'future': 'future', 'hold': 'held'}
+
+SLOT = re.compile(r'^(%s)\.(\d+)$' % '|'.join(sorted(SLOTS.values())))
+
+INDEX = '.grandfatherson-slots'
+JOURNAL = '.grandfatherson-journal'
+MOVING = '.grandfatherson-moving.%d'
+DOOMED = '.grandfatherson-doomed.%d'
+
+
+Plan = namedtuple('Plan', ['renames', 'deletes', 'slots'])
+
+
+def scan(root):
+    """
+    Return ``(name, datetime)`` for every slot in ``root``.  Slots
+    missing from the index are dated by the modification time of their
+    directory.
+    """
+    try:
+        with open(os.path.join(root, INDEX)) as f:
+            index = json.load(f)
+    except (IOError, OSError) as e:
+        if e.errno != errno.ENOENT:
+            raise
+        index = {}
+    entries = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if SLOT.match(name) and os.path.isdir(path):
+            if name in index:
+                dt = datetime.fromisoformat(index[name])
+            else:
+                dt = datetime.fromtimestamp(os.stat(path).st_mtime)
+            entries.append((name, dt))
+    return sorted(entries)
+
+
+def plan(entries, **options):
+    """
+    Return a ``Plan(renames, deletes, slots)`` rotating ``entries``, a
+    list of ``(name, datetime)`` for the backups in a directory.
+
+    Each backup that is kept goes into a slot of the finest tier that
+    keeps it, so that a daily backup becomes a weekly one when it ages
+    out of the daily tier; backups kept only by the ``holds`` option go
+    into ``held`` slots.  ``renames`` is a list of ``(name, slot)``
+    for the backups whose slot changes, and ``deletes`` a sorted list
+    of the names of the backups that should be deleted, including all
+    but the smallest name of backups sharing a datetime.  ``slots`` maps
+    every slot after the rotation to its datetime.  ``options`` are
+    passed on to ``grandfatherson.explain``.
+    """
+    names = dict(entries)
+    if len(names) != len(entries):
+        raise ValueError('Backup names must be unique')
+    reasons = explain(set(names.values()), **options)
+
+    tiers = {}
+    deletes = []
+    slotted = set()
+    # Of the backups sharing a datetime, only the one with the smallest
+    # name takes the slot, as to_keep keeps one backup per datetime
+    for name, dt in sorted(names.items()):
+        if reasons[dt] and dt not in slotted:
+            slotted.add(dt)
+            # explain lists the tiers from the coarsest to the finest
+            tier = reasons[dt][-1][0]
+            tiers.setdefault(SLOTS[tier], []).append((dt, name))
+        else:
+            deletes.append(name)
+
+    renames = []
+    slots = {}
+    for prefix, backups in tiers.items():
+        # The newest backup of each tier is in its slot 0
+        backups.sort(reverse=True)
+        for rank, (dt, name) in enumerate(backups):
+            slot = '%s.%d' % (prefix, rank)
+            slots[slot] = dt
+            if slot != name:
+                renames.append((name, slot))
+
+    return Plan(sorted(renames), sorted(deletes), slots)
+
+
+def link_tree(source, destination):
+    """
+    Recreate the tree at ``source`` as ``destination``, with hard links
+    to its files, in the manner of ``cp -al``.  Only directories are
+    actually written.
+    """
+    for directory, dirnames, filenames in os.walk(source):
+        target = os.path.normpath(
+            os.path.join(destination, os.path.relpath(directory, source)))
+        os.mkdir(target)
+        for name in filenames:
+            os.link(os.path.join(directory, name), os.path.join(target, name),
+                    follow_symlinks=False)
+        for name in dirnames:
+            path = os.path.join(directory, name)
+            if os.path.islink(path):
+                # os.walk does not follow links to directories
+                os.symlink(os.readlink(path), os.path.join(target, name))
+    # Copy the directories' times once nothing more is written to them
+    for directory, dirnames, filenames in os.walk(source):
+        shutil.copystat(directory, os.path.join(
+            destination, os.path.relpath(directory, source)))
+
+
+def execute(root, plan):
+    """
+    Apply ``plan`` to the backups in ``root``.  Raises ValueError if a
+    backup would be renamed into a slot held by a backup the plan does
+    not know about.
+
+    Every rename is atomic, but a plan may take several of them; the
+    plan is therefore written to a journal in ``root`` first, and
+    ``recover`` completes it if this is interrupted.  Backups are first
+    moved aside, then into their new slots, so no slot is ever
+    overwritten, and deleted backups are only removed once every
+    other backup is in place.
+    """
+    moving = set(name for name, slot in plan.renames) | set(plan.deletes)
+    for name, slot in plan.renames:
+        if slot not in moving and os.path.lexists(os.path.join(root, slot)):
+            raise ValueError('Slot %s is taken' % slot)
+
+    slots = dict((slot, dt.isoformat()) for slot, dt in plan.slots.items())
+    _write(root, JOURNAL, {'renames': plan.renames, 'deletes': plan.deletes,
+                           'slots': slots, 'phase': 1})
+    _apply(root, plan.renames, plan.deletes, slots, 1)
+
+
+def recover(root):
+    """
+    Complete the plan interrupted in ``root``, if any.  Return True if
+    there was one.
+    """
+    try:
+        with open(os.path.join(root, JOURNAL)) as f:
+            journal = json.load(f)
+    except (IOError, OSError) as e:
+        if e.errno != errno.ENOENT:
+            raise
+        # Deleted backups may still be waiting to be removed
+        _purge(root)
+        return False
+    _apply(root, [tuple(rename) for rename in journal['renames']],
+           journal['deletes'], journal['slots'], journal['phase'])
+    return True
+
+
+def _apply(root, renames, deletes, slots, phase):
+    moves = [(name, MOVING % i) for i, (name, slot) in enumerate(renames)]
+    moves += [(name, DOOMED % i) for i, name in enumerate(deletes)]
+    if phase == 1:
+        for name, temporary in moves:
+            # After an interruption, some may have been moved already
+            if os.path.lexists(os.path.join(root, name)):
+                os.rename(os.path.join(root, name),
+                          os.path.join(root, temporary))
+        _write(root, JOURNAL, {'renames': renames, 'deletes': deletes,
+                               'slots': slots, 'phase': 2})
+
+    for i, (name, slot) in enumerate(renames):
+        temporary = os.path.join(root, MOVING % i)
+        if os.path.lexists(temporary):
+            os.rename(temporary, os.path.join(root, slot))
+    _write(root, INDEX, slots)
+    os.unlink(os.path.join(root, JOURNAL))
+    _purge(root)
+
+
+def _purge(root):
+    for name in os.listdir(root):
+        if name.startswith(DOOMED.split('%')[0]):
+            path = os.path.join(root, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+
+def _write(root, name, data):
+    path = os.path.join(root, name)
+    temporary = path + '.tmp'
+    try:
+        with open(temporary, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    _sync(root)
+
+
+def _sync(root):
+    # Make the renames in root durable
+    fd = os.open(root, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,72 @@
+"""
+Legal holds and pins: backups that must never be deleted.
+
+A ``Holds`` index holds backups by time range, or by identifier.
+``grandfatherson.to_keep`` and ``grandfatherson.to_delete`` take it as
+their ``holds`` argument, and always keep what it holds::
+
+    >>> from datetime import datetime
+    >>> from grandfatherson import to_delete
+    >>> holds = Holds([(datetime(1999, 6, 1), datetime(1999, 6, 30))])
+    >>> sorted(to_delete([datetime(1999, 5, 1), datetime(1999, 6, 1)],
+    ...                  days=1, now=datetime(1999, 12, 31),
+    ...                  holds=holds))
+    [datetime.datetime(1999, 5, 1, 0, 0)]
+
+The ranges are merged into sorted, non-overlapping intervals when the
+index is built, so that each datetime is checked by bisection, in the
+same sweep that computes the keep set, and a sorted rotation only
+bisects its datetimes once per interval.
+"""
+from bisect import bisect_left, bisect_right
+
+
+class Holds(object):
+    """
+    An index of ``ranges``, ``(start, end)`` datetimes held inclusively,
+    of held ``datetimes``, which ``to_keep`` keeps, and of held
+    ``keys``, which ``grandfatherson.stores.rotate`` never deletes.
+    """
+
+    def __init__(self, ranges=(), datetimes=(), keys=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(ranges):
+            if end < start:
+                raise ValueError('Invalid range: %s to %s' % (start, end))
+            if self.ends and start <= self.ends[-1]:
+                # Overlaps the previous interval, so extend it
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+        self.datetimes = frozenset(datetimes)
+        self.keys = frozenset(keys)
+
+    def __len__(self):
+        """Return the number of intervals, after merging."""
+        return len(self.starts)
+
+    def __contains__(self, dt):
+        if dt in self.datetimes:
+            return True
+        i = bisect_right(self.starts, dt) - 1
+        return i >= 0 and dt <= self.ends[i]
+
+    def held(self, datetimes, presorted=False):
+        """
+        Return the set of ``datetimes`` that are held.  If ``datetimes``
+        is a sorted sequence, pass ``presorted=True`` so that only the
+        intervals and held datetimes are looked up in it.
+        """
+        if not presorted:
+            return set(dt for dt in datetimes if dt in self)
+        held = set()
+        for start, end in zip(self.starts, self.ends):
+            held.update(datetimes[bisect_left(datetimes, start):
+                                  bisect_right(datetimes, end)])
+        for dt in self.datetimes:
+            i = bisect_left(datetimes, dt)
+            if i < len(datetimes) and datetimes[i] == dt:
+                held.add(dt)
+        return held
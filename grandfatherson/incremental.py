@@ -0,0 +1,101 @@
+"""
+Incremental rotation, for backups that arrive and leave one at a time.
+
+``Rotation`` keeps the backups in a sorted index, along with the first
+backup of every bucket of every tier.  Adding or removing a backup
+only touches the buckets it belongs to, and deciding what to keep
+only looks at the buckets inside each tier's window, so neither
+depends on how many backups there are.
+"""
+from bisect import bisect_left, bisect_right, insort
+
+from grandfatherson import SATURDAY
+from grandfatherson.filters import FILTERS, resolve_now_for, tier_numbers
+
+
+class Rotation(object):
+    """
+    An index of datetimes, rotated with the same arguments as
+    ``grandfatherson.to_keep``.
+    """
+
+    def __init__(self, datetimes=(),
+                 years=0, months=0, weeks=0, days=0,
+                 hours=0, minutes=0, seconds=0,
+                 firstweekday=SATURDAY):
+        numbers = tier_numbers(years=years, months=months, weeks=weeks,
+                               days=days, hours=hours, minutes=minutes,
+                               seconds=seconds)
+        self.firstweekday = firstweekday
+        self.tiers = [(cls, numbers[name]) for name, cls in FILTERS
+                      if numbers[name]]
+        self.datetimes = []
+        # The oldest datetime in each bucket, by tier
+        self.firsts = dict((cls, {}) for cls, number in self.tiers)
+        for dt in sorted(set(datetimes)):
+            self.add(dt)
+
+    def __len__(self):
+        return len(self.datetimes)
+
+    def __contains__(self, dt):
+        i = bisect_left(self.datetimes, dt)
+        return i < len(self.datetimes) and self.datetimes[i] == dt
+
+    def add(self, dt):
+        """Add ``dt`` to the index. Return False if it was already there."""
+        if dt in self:
+            return False
+        insort(self.datetimes, dt)
+        for cls, number in self.tiers:
+            bucket = cls.mask(dt, firstweekday=self.firstweekday)
+            firsts = self.firsts[cls]
+            if bucket not in firsts or dt < firsts[bucket]:
+                firsts[bucket] = dt
+        return True
+
+    def remove(self, dt):
+        """Remove ``dt`` from the index. Return False if it was not there."""
+        i = bisect_left(self.datetimes, dt)
+        if i == len(self.datetimes) or self.datetimes[i] != dt:
+            return False
+        del self.datetimes[i]
+        for cls, number in self.tiers:
+            bucket = cls.mask(dt, firstweekday=self.firstweekday)
+            firsts = self.firsts[cls]
+            if firsts.get(bucket) != dt:
+                continue
+            # The next datetime, if any, becomes the first of the bucket
+            if (i < len(self.datetimes) and
+                    cls.mask(self.datetimes[i],
+                             firstweekday=self.firstweekday) == bucket):
+                firsts[bucket] = self.datetimes[i]
+            else:
+                del firsts[bucket]
+        return True
+
+    def resolve_now(self, now=None):
+        """Return ``now`` as ``Filter.filter`` would resolve it."""
+        return resolve_now_for(self.datetimes, now)
+
+    def to_keep(self, now=None):
+        """Return the set of datetimes that should be kept at ``now``."""
+        now = self.resolve_now(now)
+        # Always keep datetimes from the future
+        kept = set(self.datetimes[bisect_right(self.datetimes, now):])
+        for cls, number in self.tiers:
+            firsts = self.firsts[cls]
+            for n in range(1, number + 1):
+                # The start of a window of n units is the nth bucket back
+                bucket = cls.start(now, n, firstweekday=self.firstweekday)
+                dt = firsts.get(bucket)
+                if dt is not None and dt <= now:
+                    kept.add(dt)
+        return kept
+
+    def to_delete(self, now=None):
+        """Return the set of datetimes that should be deleted at ``now``."""
+        now = self.resolve_now(now)
+        kept = self.to_keep(now)
+        end = bisect_right(self.datetimes, now)
+        return set(dt for dt in self.datetimes[:end] if dt not in kept)
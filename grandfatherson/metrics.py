@@ -0,0 +1,132 @@
+"""
+Metrics about rotation runs, in the Prometheus text format.
+
+The metrics are meant for node exporter's textfile collector: write
+them into its directory after each run, and they are scraped along
+with the rest of the host's metrics::
+
+    metrics = Metrics(labels={'series': 'db'})
+    with metrics.computing():
+        doomed = to_delete(backups, days=7, weeks=4, now=now)
+    with metrics.deleting():
+        remove(doomed)
+    metrics.write('/var/lib/node_exporter/textfile/grandfatherson.prom')
+"""
+from contextlib import contextmanager
+import os
+import tempfile
+
+from grandfatherson.filters import FILTERS, clock, observe
+
+
+PREFIX = 'grandfatherson_'
+
+
+def escape(value):
+    """Escape ``value`` for use as a Prometheus label value."""
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+class Metrics(object):
+    """
+    Metrics of one rotation run, with ``labels`` added to every sample.
+    """
+
+    def __init__(self, labels=None):
+        self.labels = dict(labels or {})
+        self.entries = 0
+        self.kept = dict((cls.__name__, 0) for name, cls in FILTERS)
+        self.future = 0
+        self.deleted = 0
+        self.compute_seconds = 0.0
+        self.delete_seconds = 0.0
+
+    def record(self, event):
+        """Update the metrics from a ``grandfatherson.filters`` event."""
+        if event['event'] == 'filter':
+            self.kept[event['tier']] = event['kept'] - event['future']
+            self.future = event['future']
+        elif event['event'] == 'to_keep':
+            self.entries = event['input']
+            self.deleted = event['input'] - event['kept']
+            self.future = event['future']
+            # Plans other than the filters one count each tier here
+            self.kept.update(event.get('tiers', {}))
+
+    @contextmanager
+    def computing(self):
+        """
+        Time the keep decision made within the ``with`` block, and
+        count the entries it saw, kept and rejected.
+        """
+        started = clock()
+        try:
+            with observe(self.record):
+                yield self
+        finally:
+            self.compute_seconds += clock() - started
+
+    @contextmanager
+    def deleting(self):
+        """Time the deletions made within the ``with`` block."""
+        started = clock()
+        try:
+            yield self
+        finally:
+            self.delete_seconds += clock() - started
+
+    def samples(self):
+        """Yield ``(name, type, help, labels, value)`` for every sample."""
+        yield ('entries', 'gauge', 'Backups seen by the last rotation.',
+               {}, self.entries)
+        for tier in sorted(self.kept):
+            yield ('kept', 'gauge', 'Backups kept by each tier.',
+                   {'tier': tier}, self.kept[tier])
+        yield ('future', 'gauge', 'Backups kept for being in the future.',
+               {}, self.future)
+        yield ('deleted', 'gauge', 'Backups deleted by the last rotation.',
+               {}, self.deleted)
+        yield ('compute_seconds', 'gauge',
+               'Time spent deciding which backups to keep.',
+               {}, self.compute_seconds)
+        yield ('delete_seconds', 'gauge',
+               'Time spent deleting backups.',
+               {}, self.delete_seconds)
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+        described = set()
+        for name, kind, help, labels, value in self.samples():
+            name = PREFIX + name
+            if name not in described:
+                described.add(name)
+                lines.append('# HELP %s %s' % (name, help))
+                lines.append('# TYPE %s %s' % (name, kind))
+            labels = dict(self.labels, **labels)
+            if labels:
+                name += '{%s}' % ','.join(
+                    '%s="%s"' % (key, escape(labels[key]))
+                    for key in sorted(labels))
+            lines.append('%s %s' % (name, repr(float(value))
+                                    if isinstance(value, float)
+                                    else value))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        Write the metrics to ``path`` atomically, so that a collector
+        never reads a partially written file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix='.',
+                                         suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.render())
+            os.chmod(temporary, 0o644)
+            os.rename(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
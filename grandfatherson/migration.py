@@ -0,0 +1,54 @@
+"""
+Plans for moving backups to cold storage instead of deleting them.
+
+Given a hot policy and a cold policy, each a set of
+``grandfatherson.to_keep`` arguments, ``plan_migration`` sorts the
+catalog once and splits it into backups to keep in hot storage, to
+migrate to cold storage, and to delete.
+"""
+from collections import namedtuple
+
+from grandfatherson import explain
+from grandfatherson.filters import resolve_now_for
+
+
+Migration = namedtuple('Migration', ['hot', 'cold', 'delete'])
+
+
+def plan_migration(datetimes, hot, cold, now=None, holds=None):
+    """
+    Return a ``Migration`` of three sets of datetimes, out of
+    ``datetimes``:
+
+    ``hot``
+        kept by the ``hot`` policy, whether or not ``cold`` keeps
+        them too.
+
+    ``cold``
+        kept by the ``cold`` policy only, so they should be migrated.
+
+    ``delete``
+        kept by neither policy.
+
+    Both policies are evaluated at the same ``now``, which defaults to
+    the current time.  Backups held by ``holds``, a
+    ``grandfatherson.holds.Holds``, are neither migrated nor deleted,
+    so they are all in ``hot``.
+    """
+    datetimes = sorted(set(datetimes))
+    if now is None and datetimes:
+        # Resolve now once, so that both policies agree on it
+        now = resolve_now_for(datetimes, now)
+    hot_reasons = explain(datetimes, now=now, presorted=True, holds=holds,
+                          **hot)
+    cold_reasons = explain(datetimes, now=now, presorted=True, **cold)
+
+    migration = Migration(set(), set(), set())
+    for dt in datetimes:
+        if hot_reasons[dt]:
+            migration.hot.add(dt)
+        elif cold_reasons[dt]:
+            migration.cold.add(dt)
+        else:
+            migration.delete.add(dt)
+    return migration
@@ -0,0 +1,133 @@
+"""
+Choice of the fastest way to compute ``to_keep`` for a given input.
+
+``grandfatherson.to_keep`` can compute the same result in several
+ways, each the cheapest for some inputs:
+
+``filters``
+    The reference: each ``grandfatherson.filters`` class filters the
+    whole input in turn.  Used for small inputs, where its setup costs
+    least.
+
+``tiers``
+    The integer bucket engine of ``grandfatherson.tiers``, which
+    evaluates every tier in one pass without sorting.  Used for large
+    inputs, and whenever custom tiers are given.
+
+``sorted``
+    For inputs that are already sorted, such as a
+    ``grandfatherson.timestamps.Timeline`` or a list passed with
+    ``presorted=True``: each tier only walks its own window, found by
+    bisection, and nothing is sorted or copied.  Masking a datetime
+    costs more than bucketing an integer, so this is only used when the
+    windows of the tiers hold a small share of the input, as they do
+    for a long history rotated with short tiers.
+
+``dates``
+    For ``datetime.date`` inputs, which are converted to datetimes, and
+    back, around another plan.
+
+``choose`` returns the plan ``to_keep`` would use; each ``to_keep``
+event seen through ``grandfatherson.filters.observe`` also names the
+``plan`` taken::
+
+    >>> from datetime import date, datetime, timedelta
+    >>> history = [datetime(1999, 1, 1) + timedelta(hours=i)
+    ...            for i in range(24 * 365)]
+    >>> choose(history, presorted=True, numbers={'days': 7},
+    ...        now=datetime(1999, 12, 31, 23))
+    'sorted'
+    >>> choose(history, presorted=True, numbers={'years': 1},
+    ...        now=datetime(1999, 12, 31, 23))
+    'tiers'
+    >>> choose([date(2000, 1, 1)])
+    'dates'
+"""
+from bisect import bisect_left, bisect_right
+import sys
+
+from grandfatherson.filters import FILTERS, SATURDAY, resolve_now_for
+
+
+PLANS = ('filters', 'tiers', 'sorted', 'dates')
+
+# Below this many datetimes, the reference plan is cheapest
+TIERS_THRESHOLD = 500
+
+# The sorted plan is cheapest when its tiers' windows hold, together,
+# fewer datetimes than this share of a sorted input
+SORTED_SHARE = 0.4
+
+
+def is_timeline(datetimes):
+    """
+    Return whether ``datetimes`` is a
+    ``grandfatherson.timestamps.Timeline``, which is always sorted.
+    """
+    # A Timeline can only have been made if its module was imported,
+    # so it is not imported here just to check
+    timestamps = sys.modules.get('grandfatherson.timestamps')
+    return (timestamps is not None and
+            isinstance(datetimes, timestamps.Timeline))
+
+
+def choose(datetimes, tiers=None, presorted=False, numbers=None,
+           firstweekday=SATURDAY, now=None):
+    """
+    Return the name of the cheapest plan for ``datetimes``, a sized
+    collection, kept with ``numbers``, a dict mapping the
+    ``grandfatherson.filters.FILTERS`` names to the number of each to
+    keep.  See ``grandfatherson.to_keep`` for the other arguments.
+    """
+    if not datetimes:
+        return 'filters'
+    if is_timeline(datetimes):
+        presorted = True
+    elif not hasattr(next(iter(datetimes)), 'hour'):
+        return 'dates'
+    if tiers is not None:
+        return 'tiers'
+    if presorted:
+        now = resolve_now_for(datetimes, now)
+        end = bisect_right(datetimes, now)
+        window = 0
+        for name, cls in FILTERS:
+            number = (numbers or {}).get(name, 0)
+            if number:
+                start = cls.start(now, number, firstweekday=firstweekday)
+                window += end - bisect_left(datetimes, start)
+        if window < SORTED_SHARE * len(datetimes):
+            return 'sorted'
+    if len(datetimes) >= TIERS_THRESHOLD:
+        return 'tiers'
+    return 'filters'
+
+
+def sorted_to_keep(datetimes, numbers, firstweekday, now, counts=None,
+                   holds=None):
+    """
+    Return a set of datetimes that should be kept, out of ``datetimes``,
+    a sorted sequence, as of ``now``, which must already be resolved.
+
+    ``numbers`` maps the ``grandfatherson.filters.FILTERS`` names to
+    the number of each to keep.  If ``counts`` is a dict, it is filled
+    with the number of datetimes each tier keeps.  Datetimes held by
+    ``holds`` are found by bisection, as for the tiers' windows.
+    """
+    end = bisect_right(datetimes, now)
+    # Always keep datetimes from the future
+    kept = set(datetimes[end:])
+    for name, cls in FILTERS:
+        number = numbers[name]
+        if number == 0:
+            continue
+        start = cls.start(now, number, firstweekday=firstweekday)
+        firsts = {}
+        for dt in datetimes[bisect_left(datetimes, start):end]:
+            firsts.setdefault(cls.mask(dt, firstweekday=firstweekday), dt)
+        kept.update(firsts.values())
+        if counts is not None:
+            counts[cls.__name__] = len(firsts)
+    if holds is not None:
+        kept.update(holds.held(datetimes, presorted=True))
+    return kept
@@ -0,0 +1,88 @@
+"""
+Consistent rotation of replicated copies of the same backups.
+
+Replicas' listings differ slightly, through replication lag or lost
+objects, so rotating each one on its own can keep a different first
+backup of a week on each, and replication then copies back what was
+meant to be pruned.  Here the listings are merged into one, a single
+keep set is computed from it, and each replica deletes whatever it
+has outside of that set::
+
+    >>> from datetime import datetime
+    >>> deleted = to_delete_by_replica(
+    ...     {'eu': [datetime(2000, 1, 3), datetime(2000, 1, 4)],
+    ...      'us': [datetime(2000, 1, 4)]},
+    ...     weeks=1, now=datetime(2000, 1, 5))
+    >>> deleted['eu']
+    [datetime.datetime(2000, 1, 4, 0, 0)]
+    >>> deleted['us']
+    [datetime.datetime(2000, 1, 4, 0, 0)]
+
+``us`` lacks the backup of the 3rd that is kept, and gets it from the
+next replication, while both replicas prune the 4th.
+"""
+from heapq import merge
+
+from grandfatherson import to_keep
+
+
+def merged(listings):
+    """
+    Return the union of ``listings``, sorted iterables of datetimes, as
+    a sorted list without duplicates.
+    """
+    union = []
+    for dt in merge(*listings):
+        if not union or dt != union[-1]:
+            union.append(dt)
+    return union
+
+
+def to_delete_by_replica(listings, presorted=False, **options):
+    """
+    Return a dict mapping each replica to a sorted list of its
+    datetimes to delete.
+
+    ``listings`` maps replicas to their datetimes, which are sorted
+    first unless ``presorted`` is true.  ``options`` are passed on to
+    ``grandfatherson.to_keep``, which is called once for all replicas.
+    """
+    if not presorted:
+        listings = dict((name, sorted(datetimes))
+                        for name, datetimes in listings.items())
+    kept = to_keep(merged(listings.values()), **options)
+    return dict((name, [dt for dt in datetimes if dt not in kept])
+                for name, datetimes in listings.items())
+
+
+def rotate_replicas(stores, dry_run=False, **options):
+    """
+    Rotate ``stores``, a dict mapping replicas to
+    ``grandfatherson.stores.Store`` objects, with one keep set.
+
+    The stores should date each backup the same way, for instance by
+    parsing its key rather than by its modification time, which differs
+    from one replica to the next.  Backups among the ``keys`` of the
+    ``holds`` option are never deleted.  If ``dry_run`` is true,
+    nothing is deleted.
+
+    Return a dict mapping each replica to the keys that were, or would
+    have been, deleted.
+    """
+    keys = {}
+    for name, store in stores.items():
+        keys[name] = by_datetime = {}
+        for key, dt in store.entries():
+            by_datetime.setdefault(dt, []).append(key)
+
+    held = ()
+    if options.get('holds') is not None:
+        held = options['holds'].keys
+    doomed = to_delete_by_replica(keys, **options)
+    deleted = {}
+    for name, store in stores.items():
+        deleted[name] = [key for dt in doomed[name]
+                         for key in keys[name][dt] if key not in held]
+        if deleted[name] and not dry_run:
+            store.delete(deleted[name])
+    return deleted
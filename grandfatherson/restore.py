@@ -0,0 +1,124 @@
+"""
+An index of retained backups for restore tooling.
+
+``RestoreIndex`` answers "which kept backup is nearest at or before
+time T" by bisecting a sorted array of timestamps, rather than
+scanning the set returned by ``to_keep``.  Built from ``explain``, it
+also has a view per tier, and it serializes to a compact binary form
+that restore jobs can load without parsing a datetime::
+
+    index = RestoreIndex.from_explain(explain(backups, days=7, weeks=4))
+    index.before(incident)
+    index.tier('Weeks').before(incident)
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+import json
+import sys
+
+from grandfatherson.filters import sample_tzinfo, utc
+from grandfatherson.timestamps import Timeline
+
+
+class RestoreIndex(object):
+    """
+    The sorted ``datetimes`` available to restore from.  ``tiers``
+    maps tier names to the datetimes each tier keeps.
+    """
+    MAGIC = b'GFSRI1\n'
+
+    def __init__(self, datetimes=(), tiers=None):
+        datetimes = list(datetimes)
+        self.timeline = self._timeline(datetimes)
+        self.tiers = dict((name, self._timeline(list(tier)))
+                          for name, tier in (tiers or {}).items())
+
+    @classmethod
+    def from_explain(cls, reasons):
+        """Build an index of the datetimes kept in ``explain`` output."""
+        tiers = {}
+        for dt, why in reasons.items():
+            for tier, bucket in why:
+                tiers.setdefault(tier, []).append(dt)
+        return cls((dt for dt, why in reasons.items() if why), tiers)
+
+    @staticmethod
+    def _timeline(datetimes):
+        return Timeline(datetimes, tzinfo=sample_tzinfo(datetimes))
+
+    def __len__(self):
+        return len(self.timeline)
+
+    def __iter__(self):
+        return iter(self.timeline)
+
+    def tier(self, name):
+        """Return an index of the datetimes kept by the tier ``name``."""
+        index = RestoreIndex()
+        index.timeline = self.tiers.get(name, Timeline())
+        return index
+
+    def before(self, dt):
+        """Return the latest datetime at or before ``dt``, or None."""
+        i = bisect_right(self.timeline, dt)
+        return self.timeline[i - 1] if i else None
+
+    def after(self, dt):
+        """Return the earliest datetime at or after ``dt``, or None."""
+        i = bisect_left(self.timeline, dt)
+        return self.timeline[i] if i < len(self.timeline) else None
+
+    def between(self, start, end):
+        """Return a sorted list of the datetimes from ``start`` to ``end``."""
+        return self.timeline[bisect_left(self.timeline, start):
+                             bisect_right(self.timeline, end)]
+
+    def dumps(self):
+        """Return the index serialized as bytes."""
+        names = sorted(self.tiers)
+        header = {
+            'aware': self.timeline.tzinfo is not None,
+            'byteorder': sys.byteorder,
+            'sizes': [len(self.timeline)] + [len(self.tiers[name])
+                                             for name in names],
+            'tiers': names,
+        }
+        return b''.join(
+            [self.MAGIC, json.dumps(header).encode('utf-8'), b'\n',
+             self.timeline.micros.tobytes()] +
+            [self.tiers[name].micros.tobytes() for name in names])
+
+    @classmethod
+    def loads(cls, data):
+        """Return the index serialized in ``data`` by ``dumps``."""
+        if not data.startswith(cls.MAGIC):
+            raise ValueError('Not a serialized RestoreIndex')
+        end = data.index(b'\n', len(cls.MAGIC))
+        header = json.loads(data[len(cls.MAGIC):end].decode('utf-8'))
+        tzinfo = utc if header['aware'] else None
+
+        timelines = []
+        offset = end + 1
+        for size in header['sizes']:
+            micros = array('q')
+            micros.frombytes(data[offset:offset + size * micros.itemsize])
+            if header['byteorder'] != sys.byteorder:
+                micros.byteswap()
+            offset += size * micros.itemsize
+            timeline = Timeline(tzinfo=tzinfo)
+            timeline.micros = micros
+            timelines.append(timeline)
+
+        index = cls()
+        index.timeline = timelines[0]
+        index.tiers = dict(zip(header['tiers'], timelines[1:]))
+        return index
+
+    def dump(self, f):
+        """Write the index to the binary file ``f``."""
+        f.write(self.dumps())
+
+    @classmethod
+    def load(cls, f):
+        """Read an index from the binary file ``f``."""
+        return cls.loads(f.read())
@@ -0,0 +1,116 @@
+"""
+Rotation of many series of backups mixed together in one listing.
+
+``to_delete_by_series`` takes a listing such as a whole bucket, where
+backups of ``hostA/db1-...`` and ``hostB/db2-...`` are interleaved,
+and decides what to delete in every series in a single pass.  Each
+series keeps its own state: the first backup of each bucket inside
+its tiers' windows, so nothing needs to be grouped or sorted first.
+"""
+from datetime import datetime
+
+from grandfatherson import SATURDAY
+from grandfatherson.filters import (FILTERS, check_number, resolve_now,
+                                    sample_tzinfo, utc)
+
+
+class SeriesState(object):
+    """
+    The running keep decision for one series, rotated with the
+    ``grandfatherson.to_keep`` arguments in ``policy``, never deleting
+    what ``holds``, a ``grandfatherson.holds.Holds``, holds.
+    """
+
+    def __init__(self, policy, now=None, tzinfo=None, holds=None):
+        policy = dict(policy)
+        firstweekday = policy.pop('firstweekday', SATURDAY)
+        if 'now' in policy:
+            raise ValueError('Policies cannot set now; pass it to '
+                             'to_delete_by_series instead')
+        unknown = set(policy) - set(name for name, cls in FILTERS)
+        if unknown:
+            raise ValueError('Unknown policy keys: %s' %
+                             ', '.join(sorted(unknown)))
+        self.options = {'firstweekday': firstweekday}
+        self.now = resolve_now(now, tzinfo)
+        self.tiers = []
+        for name, cls in FILTERS:
+            number = policy.get(name, 0)
+            check_number(number)
+            if number:
+                self.tiers.append(
+                    (cls, cls.start(self.now, number, **self.options), {}))
+        self.holds = holds
+        self.keys = {}
+
+    def add(self, key, dt):
+        """Add the backup ``key``, taken at ``dt``."""
+        self.keys.setdefault(dt, []).append(key)
+        if dt > self.now:
+            return
+        for cls, start, firsts in self.tiers:
+            if dt >= start:
+                bucket = cls.mask(dt, **self.options)
+                first = firsts.get(bucket)
+                if first is None or dt < first:
+                    firsts[bucket] = dt
+
+    def to_keep(self):
+        """Return the set of datetimes to keep."""
+        kept = set(dt for dt in self.keys if dt > self.now)
+        for cls, start, firsts in self.tiers:
+            kept.update(firsts.values())
+        if self.holds is not None:
+            kept.update(self.holds.held(self.keys))
+        return kept
+
+    def to_delete(self):
+        """Return a sorted list of the keys to delete."""
+        kept = self.to_keep()
+        held = self.holds.keys if self.holds is not None else ()
+        return sorted(key for dt, keys in self.keys.items()
+                      if dt not in kept for key in keys if key not in held)
+
+
+def to_delete_by_series(entries, series, policies, now=None, holds=None):
+    """
+    Return a dict mapping each series to a sorted list of the keys to
+    delete from it.
+
+    ``entries`` is an iterable of ``(key, datetime)``.  ``series`` is
+    called with each key and returns the key of its series, or None to
+    leave the backup alone.  ``policies`` maps each series key to the
+    ``grandfatherson.to_keep`` arguments for that series; it is either
+    a dict or a function, and series without a policy are left alone.
+
+    If ``now`` is None, the current time is read once and used for
+    every series, in UTC for series whose first backup is
+    timezone-aware, and in local time for the others.  Policies may not
+    set ``now`` themselves.  Backups held by ``holds``, a
+    ``grandfatherson.holds.Holds``, by their datetime or their key, are
+    never deleted.
+    """
+    lookup = policies.get if hasattr(policies, 'get') else policies
+    nows = None
+    if now is None:
+        # Read the clock once, so that every series is rotated as of
+        # the same instant
+        current = datetime.now(utc)
+        nows = {utc: current, None: current.astimezone().replace(tzinfo=None)}
+    states = {}
+    skipped = set()
+    for key, dt in entries:
+        name = series(key)
+        if name is None or name in skipped:
+            continue
+        state = states.get(name)
+        if state is None:
+            policy = lookup(name)
+            if policy is None:
+                skipped.add(name)
+                continue
+            tzinfo = sample_tzinfo([dt])
+            state = states[name] = SeriesState(
+                policy, now if nows is None else nows[tzinfo], tzinfo, holds)
+        state.add(key, dt)
+    return dict((name, state.to_delete()) for name, state in states.items())
@@ -0,0 +1,243 @@
+"""
+A local HTTP service answering rotation queries.
+
+The service keeps the backups of each series in memory, in a compact
+``grandfatherson.timestamps.Timeline``, so that tools asking which
+backups to keep neither import GrandFatherSon themselves nor list
+their storage again.  All requests and responses are JSON, with
+datetimes in ISO 8601 format:
+
+``POST /series/<name>/append``
+    Add ``{"datetimes": [...]}`` to the series.
+
+``POST /series/<name>/keep``, ``/delete`` and ``/explain``
+    Return ``{"datetimes": [...]}`` to keep or delete, or
+    ``{"reasons": {datetime: [[tier, bucket], ...]}}``, for the
+    ``{"policy": {...}, "now": ..., "holds": {...}}`` given.  The
+    policy holds the ``grandfatherson.to_keep`` arguments; ``now``
+    defaults to the current time.  The optional holds are
+    ``{"ranges": [[start, end], ...], "datetimes": [...]}``, which are
+    always kept.
+
+``DELETE /series/<name>``
+    Forget the series.
+
+Series that have not been used for a while are evicted from memory
+once there are more than ``capacity`` of them.  If the cache was given
+a ``loader``, evicted series are loaded again on their next use.
+"""
+from collections import OrderedDict
+from datetime import datetime
+import json
+import re
+import threading
+from urllib.parse import unquote
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from grandfatherson import explain, to_keep
+from grandfatherson.filters import sample_tzinfo
+from grandfatherson.holds import Holds
+from grandfatherson.timestamps import Timeline, from_micros, to_micros
+
+
+class SeriesCache(object):
+    """
+    Timelines by series name, evicting the least recently used beyond
+    ``capacity``.
+
+    ``loader``, if given, is called with the name of a series that is
+    not in memory and should return its datetimes, or None if there is
+    no such series.
+    """
+
+    def __init__(self, capacity=1024, loader=None):
+        self.capacity = capacity
+        self.loader = loader
+        self.series = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.series)
+
+    def get(self, name):
+        """Return the timeline of ``name``, or None."""
+        loaded = self._load(name)
+        with self.lock:
+            timeline = self.series.pop(name, loaded)
+            if timeline is not None:
+                self._insert(name, timeline)
+            return timeline
+
+    def append(self, name, datetimes):
+        """
+        Add ``datetimes`` to the series ``name``, creating it if needed.
+        Raises ValueError if naive and timezone-aware datetimes would be
+        mixed in the series.
+
+        The series is replaced rather than updated in place, so that
+        queries already running on it are not disturbed.
+        """
+        datetimes = list(datetimes)
+        loaded = self._load(name)
+        with self.lock:
+            # Look up, copy and replace the series at once, so that
+            # concurrent appends each see the other's datetimes
+            timeline = self.series.get(name, loaded)
+            if timeline is None:
+                timeline = self._timeline(datetimes)
+            else:
+                _check_tzinfo(datetimes, timeline.tzinfo)
+                timeline = timeline.copy()
+                timeline.update(datetimes)
+            self.series.pop(name, None)
+            self._insert(name, timeline)
+            return timeline
+
+    def discard(self, name):
+        """Forget the series ``name``."""
+        with self.lock:
+            self.series.pop(name, None)
+
+    def _load(self, name):
+        # The loader may be slow, so it is called without holding the
+        # lock; if another thread inserts the series meanwhile, the
+        # series in memory wins over the one loaded
+        with self.lock:
+            if self.loader is None or name in self.series:
+                return None
+        datetimes = self.loader(name)
+        if datetimes is None:
+            return None
+        return self._timeline(list(datetimes))
+
+    def _timeline(self, datetimes):
+        tzinfo = sample_tzinfo(datetimes)
+        _check_tzinfo(datetimes, tzinfo)
+        return Timeline(datetimes, tzinfo=tzinfo)
+
+    def _insert(self, name, timeline):
+        self.series[name] = timeline
+        while len(self.series) > self.capacity:
+            self.series.popitem(last=False)
+
+
+def _check_tzinfo(datetimes, tzinfo):
+    # Timelines store UTC timestamps, which would silently turn naive
+    # datetimes into aware ones, and the reverse
+    aware = tzinfo is not None
+    for dt in datetimes:
+        if (dt.tzinfo is not None) != aware:
+            raise ValueError('Cannot mix naive and timezone-aware '
+                             'datetimes: %s' % dt.isoformat())
+
+
+def parse_datetime(value):
+    """Parse an ISO 8601 ``value`` into a datetime."""
+    if not isinstance(value, str):
+        raise ValueError('Invalid datetime: %r' % (value,))
+    return datetime.fromisoformat(value)
+
+
+def parse_holds(value):
+    """
+    Parse ``{"ranges": [[start, end], ...], "datetimes": [...]}`` into a
+    ``grandfatherson.holds.Holds``.
+    """
+    if not isinstance(value, dict):
+        raise ValueError('Invalid holds: %r' % (value,))
+    ranges = []
+    for held in value.get('ranges', []):
+        if not isinstance(held, list) or len(held) != 2:
+            raise ValueError('Invalid range: %r' % (held,))
+        ranges.append((parse_datetime(held[0]), parse_datetime(held[1])))
+    return Holds(ranges, [parse_datetime(v)
+                          for v in value.get('datetimes', [])])
+
+
+def query(timeline, action, policy=None, now=None, holds=None):
+    """
+    Answer the ``keep``, ``delete`` or ``explain`` ``action`` for
+    ``timeline``, returning a JSON-serializable dict.  ``holds`` is
+    parsed by ``parse_holds``.
+    """
+    policy = dict(policy or {})
+    if now is not None:
+        policy['now'] = parse_datetime(now)
+    if holds is not None:
+        policy['holds'] = parse_holds(holds)
+    if action not in ('keep', 'delete', 'explain'):
+        raise ValueError('Unknown action: %s' % action)
+    if action != 'explain':
+        # The planner bisects the timeline, so only the datetimes kept
+        # are converted, and those deleted as they are returned
+        kept = to_keep(timeline, **policy)
+        if action == 'keep':
+            return {'datetimes': [dt.isoformat() for dt in sorted(kept)]}
+        kept = set(to_micros(dt) for dt in kept)
+        return {'datetimes': [from_micros(m, timeline.tzinfo).isoformat()
+                              for m in timeline.micros if m not in kept]}
+    # explain() returns the datetimes in the order of the timeline
+    reasons = explain(timeline, presorted=True, **policy)
+    return {'reasons': dict(
+        (dt.isoformat(),
+         [[tier, bucket and bucket.isoformat()] for tier, bucket in why])
+        for dt, why in reasons.items())}
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answers requests using the ``cache`` of its server."""
+    PATH = re.compile(r'^/series/([^/]+)(?:/(append|keep|delete|explain))?$')
+
+    def do_POST(self):
+        match = self.PATH.match(self.path)
+        if match is None or match.group(2) is None:
+            return self.respond(404, {'error': 'Not found'})
+        name, action = match.groups()
+        name = unquote(name)
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length).decode('utf-8')
+                              or '{}')
+            if action == 'append':
+                timeline = self.server.cache.append(
+                    name, (parse_datetime(v) for v in body['datetimes']))
+                return self.respond(200, {'size': len(timeline)})
+            timeline = self.server.cache.get(name)
+            if timeline is None:
+                return self.respond(404, {'error': 'No such series'})
+            return self.respond(200, query(timeline, action,
+                                           body.get('policy'),
+                                           body.get('now'),
+                                           body.get('holds')))
+        except (KeyError, TypeError, ValueError) as e:
+            return self.respond(400, {'error': str(e)})
+
+    def do_DELETE(self):
+        match = self.PATH.match(self.path)
+        if match is None or match.group(2) is not None:
+            return self.respond(404, {'error': 'Not found'})
+        self.server.cache.discard(unquote(match.group(1)))
+        return self.respond(200, {})
+
+    def respond(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), cache=None, verbose=False):
+        HTTPServer.__init__(self, address, Handler)
+        self.cache = cache if cache is not None else SeriesCache()
+        self.verbose = verbose
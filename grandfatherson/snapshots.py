@@ -0,0 +1,173 @@
+"""
+Rotation of filesystem snapshots: ZFS, btrfs and LVM.
+
+The ``parse_*`` functions read the output of each tool's listing
+command line by line, without holding it all in memory, and yield
+``(dataset, name, datetime)`` for every snapshot.  ``to_delete_by_dataset``
+rotates each dataset separately, and the ``*_commands`` functions turn
+the result into as few destroy commands as possible, as argument lists
+ready for ``subprocess``.
+"""
+from datetime import datetime
+
+from grandfatherson import to_delete
+from grandfatherson.filters import utc
+from grandfatherson.timestamps import MICROSECONDS, from_micros
+
+
+# Keep each command line well below the usual ARG_MAX
+MAX_COMMAND_LENGTH = 64 * 1024
+
+
+def parse_zfs(lines, tzinfo=None):
+    """
+    Parse the output of ``zfs list -Hp -t snapshot -o name,creation``.
+
+    Creation times are converted straight from their integer form; the
+    datetimes are timezone-aware, in UTC or converted to ``tzinfo`` if
+    it is given, so that ``now`` defaults to the same clock.
+    """
+    tzinfo = tzinfo or utc
+    for line in lines:
+        line = line.rstrip('\n')
+        if not line:
+            continue
+        name, creation = line.split('\t')
+        dataset, _, snapshot = name.partition('@')
+        yield dataset, snapshot, from_micros(int(creation) * MICROSECONDS,
+                                             tzinfo)
+
+
+def parse_btrfs(lines):
+    """
+    Parse the output of ``btrfs subvolume list -s``.
+
+    The dataset of a snapshot is the directory holding it, and its name
+    is its path; both are relative to the mount point that was listed.
+    Creation times are naive, in the local time btrfs prints them in.
+    """
+    for line in lines:
+        line = line.rstrip('\n')
+        if not line:
+            continue
+        # ID 257 gen 9 cgen 9 top level 5 otime 2020-01-01 10:00:00 path x
+        head, _, path = line.partition(' path ')
+        otime = head[head.index(' otime ') + 7:]
+        dataset = path.rpartition('/')[0]
+        yield dataset, path, datetime.strptime(otime, '%Y-%m-%d %H:%M:%S')
+
+
+def parse_lvm(lines):
+    """
+    Parse the output of
+    ``lvs --noheadings --separator '|' -o vg_name,lv_name,origin,lv_time``.
+
+    Only snapshots, which have an origin, are yielded.  The dataset of a
+    snapshot is its origin, as ``vg/origin``, and its name is
+    ``vg/lv``.  Creation times are timezone-aware.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        vg, lv, origin, lv_time = line.split('|')
+        if not origin:
+            continue
+        yield ('%s/%s' % (vg, origin), '%s/%s' % (vg, lv),
+               datetime.strptime(lv_time, '%Y-%m-%d %H:%M:%S %z'))
+
+
+def to_delete_by_dataset(snapshots, **options):
+    """
+    Return a dict mapping each dataset to the names of its snapshots to
+    delete, oldest first.
+
+    ``snapshots`` is an iterable of ``(dataset, name, datetime)``, as
+    yielded by the ``parse_*`` functions.  ``options`` are passed on to
+    ``grandfatherson.to_delete``.
+    """
+    datasets = {}
+    for dataset, name, dt in snapshots:
+        datasets.setdefault(dataset, {}).setdefault(dt, []).append(name)
+    deleted = {}
+    for dataset, names in datasets.items():
+        deleted[dataset] = [name
+                            for dt in sorted(to_delete(names, **options))
+                            for name in names[dt]]
+    return deleted
+
+
+def _batches(prefix, arguments, max_length):
+    """Split ``arguments`` into commands starting with ``prefix``."""
+    commands = []
+    command = None
+    length = 0
+    for argument in arguments:
+        if command is None or length + len(argument) + 1 > max_length:
+            command = list(prefix)
+            length = sum(len(a) + 1 for a in prefix)
+            commands.append(command)
+        command.append(argument)
+        length += len(argument) + 1
+    return commands
+
+
+def zfs_commands(dataset, snapshots, ordered=None,
+                 max_length=MAX_COMMAND_LENGTH):
+    """
+    Return ``zfs destroy`` commands destroying ``snapshots`` of
+    ``dataset``, named in comma-separated lists.
+
+    If ``ordered`` is given, runs of consecutive snapshots to destroy
+    are named as ``first%last`` ranges.  A range destroys every
+    snapshot ZFS has between its ends, so ``ordered`` must be the
+    complete list of the dataset's snapshots, in creation order, as
+    listed by ``zfs list -s createtxg``: a snapshot missing from it
+    could be destroyed by a range.  Only runs of snapshots which are all
+    in ``snapshots`` are collapsed, and ValueError is raised if any of
+    ``snapshots`` is missing from ``ordered``.
+    """
+    snapshots = list(snapshots)
+    if ordered is None:
+        names = snapshots
+    else:
+        ordered = list(ordered)
+        doomed = set(snapshots)
+        missing = doomed.difference(ordered)
+        if missing:
+            raise ValueError('Snapshots missing from ordered: %s' %
+                             ', '.join(sorted(missing)))
+        names = []
+        run = []
+        for name in ordered + [None]:
+            if name is not None and name in doomed:
+                run.append(name)
+                continue
+            if len(run) > 1:
+                names.append('%s%%%s' % (run[0], run[-1]))
+            else:
+                names.extend(run)
+            run = []
+
+    # Each command names one dataset, then its snapshots after the @
+    commands = []
+    head = len('zfs destroy %s@' % dataset)
+    for batch in _batches((), names, max_length - head):
+        commands.append(['zfs', 'destroy',
+                         '%s@%s' % (dataset, ','.join(batch))])
+    return commands
+
+
+def btrfs_commands(paths, mountpoint='', max_length=MAX_COMMAND_LENGTH):
+    """
+    Return ``btrfs subvolume delete`` commands deleting the subvolumes
+    at ``paths``, relative to ``mountpoint``.
+    """
+    if mountpoint:
+        paths = ('%s/%s' % (mountpoint.rstrip('/'), path) for path in paths)
+    return _batches(['btrfs', 'subvolume', 'delete'], paths, max_length)
+
+
+def lvm_commands(names, max_length=MAX_COMMAND_LENGTH):
+    """Return ``lvremove`` commands removing the ``vg/lv`` ``names``."""
+    return _batches(['lvremove', '-y'], names, max_length)
@@ -0,0 +1,124 @@
+"""
+Rotation inside the database that holds the backup catalog.
+
+``to_delete_query`` turns a policy and ``now`` into one SQL query that
+returns the IDs of the rows to delete, so the timestamps never have to
+leave the database.  Window functions mark the first row of each
+bucket of each tier, with buckets computed as ``Filter.mask`` computes
+them; the start of each tier's window is computed in Python with
+``Filter.start``, and passed in as a parameter.
+
+Two dialects are supported:
+
+``sqlite``
+    SQLite 3.25 or later, with timestamps stored as text in the format
+    of ``str(datetime)``, which is what the ``sqlite3`` module stores
+    by default.  Parameters use the ``named`` style.
+
+``postgresql``
+    PostgreSQL, with ``timestamp without time zone`` columns.
+    Parameters use the ``pyformat`` style, as ``psycopg2`` expects.
+
+Rows sharing a timestamp are kept or deleted together, as
+``to_delete`` would treat their single datetime.
+"""
+import re
+
+from grandfatherson import SATURDAY
+from grandfatherson.filters import FILTERS, resolve_now, tier_numbers
+
+
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$')
+
+
+def _sqlite_bucket(name, column, firstweekday):
+    if name == 'weeks':
+        # %w counts from Sunday, while Python's weekday() counts from Monday
+        return ("date(%s, '-' || ((CAST(strftime('%%w', %s) AS INTEGER) "
+                "+ %d) %% 7) || ' days')" %
+                (column, column, 6 - firstweekday + 7))
+    formats = {'years': '%Y', 'months': '%Y-%m', 'days': '%Y-%m-%d',
+               'hours': '%Y-%m-%d %H', 'minutes': '%Y-%m-%d %H:%M',
+               'seconds': '%Y-%m-%d %H:%M:%S'}
+    return "strftime('%s', %s)" % (formats[name], column)
+
+
+def _postgresql_bucket(name, column, firstweekday):
+    if name == 'weeks':
+        # ISODOW counts from 1 for Monday.  MOD() is used rather than
+        # %, which the pyformat parameter style reserves.
+        return ("date_trunc('day', %s) - "
+                "MOD(CAST(EXTRACT(ISODOW FROM %s) AS INTEGER) + %d, 7) "
+                "* INTERVAL '1 day'" %
+                (column, column, 6 - firstweekday + 7))
+    return "date_trunc('%s', %s)" % (name[:-1], column)
+
+
+DIALECTS = {
+    'sqlite': (_sqlite_bucket, ':%s', lambda dt: str(dt)),
+    'postgresql': (_postgresql_bucket, '%%(%s)s', lambda dt: dt),
+}
+
+
+def to_delete_query(table,
+                    years=0, months=0, weeks=0, days=0,
+                    hours=0, minutes=0, seconds=0,
+                    firstweekday=SATURDAY, now=None,
+                    id='id', timestamp='timestamp', where=None,
+                    dialect='sqlite'):
+    """
+    Return ``(sql, parameters)``: a query selecting the ``id`` of every
+    row of ``table`` that ``to_delete`` would delete, going by its
+    ``timestamp`` column.
+
+    ``where`` optionally maps column names to values that rows must
+    have, to rotate one series out of a shared table.
+
+    See ``grandfatherson.to_keep`` for a description of the other
+    arguments.  ``now`` must be naive, as the timestamps are.
+    """
+    if dialect not in DIALECTS:
+        raise ValueError('Unknown dialect: %s' % dialect)
+    bucket, placeholder, adapt = DIALECTS[dialect]
+    where = dict(where or {})
+    for name in [table, id, timestamp] + list(where):
+        if not IDENTIFIER.match(name):
+            raise ValueError('Invalid identifier: %s' % name)
+    if not isinstance(firstweekday, int) or not 0 <= firstweekday <= 6:
+        raise ValueError('Invalid firstweekday: %s' % firstweekday)
+
+    numbers = tier_numbers(years=years, months=months, weeks=weeks,
+                           days=days, hours=hours, minutes=minutes,
+                           seconds=seconds)
+
+    now = resolve_now(now)
+    parameters = {'now': adapt(now)}
+    firsts = []
+    kept = []
+    for name, cls in FILTERS:
+        number = numbers[name]
+        if number == 0:
+            continue
+        start = cls.start(now, number, firstweekday=firstweekday)
+        parameters['%s_start' % name] = adapt(start)
+        firsts.append('%s = MIN(%s) OVER (PARTITION BY %s) AS first_%s' %
+                      (timestamp, timestamp,
+                       bucket(name, timestamp, firstweekday), name))
+        kept.append('(first_%s AND ts >= %s)' %
+                    (name, placeholder % ('%s_start' % name)))
+
+    conditions = []
+    for i, column in enumerate(sorted(where)):
+        parameters['where_%d' % i] = where[column]
+        conditions.append('%s = %s' %
+                          (column, placeholder % ('where_%d' % i)))
+
+    sql = ('SELECT id FROM (SELECT %s AS id, %s AS ts%s FROM %s%s) '
+           'AS ranked' %
+           (id, timestamp, ''.join(', ' + first for first in firsts), table,
+            ' WHERE ' + ' AND '.join(conditions) if conditions else ''))
+    # Always keep datetimes from the future
+    sql += ' WHERE ts <= %s' % (placeholder % 'now')
+    if kept:
+        sql += ' AND NOT (%s)' % ' OR '.join(kept)
+    return sql, parameters
@@ -0,0 +1,200 @@
+"""
+Backup stores that GrandFatherSon can rotate directly.
+
+A store lists its backups as ``(key, datetime)`` pairs and deletes
+them by key, so that ``rotate`` can apply ``to_delete`` without the
+caller having to keep track of which key belongs to which datetime.
+"""
+from datetime import datetime
+import errno
+import os
+import shutil
+
+from grandfatherson import to_delete
+
+
+class StoreError(Exception):
+    """Raised when a store fails to delete some of its backups."""
+
+    def __init__(self, message, errors=()):
+        Exception.__init__(self, message)
+        self.errors = list(errors)
+
+
+class Store(object):
+    """Base class."""
+
+    def entries(self):
+        """Yield ``(key, datetime)`` for every backup in the store."""
+        raise NotImplementedError
+
+    def delete(self, keys):
+        """Delete the backups named by ``keys``."""
+        raise NotImplementedError
+
+
+def rotate(store, dry_run=False, metrics=None, **options):
+    """
+    Delete the backups in ``store`` that ``to_delete`` rejects.
+
+    ``options`` are passed on to ``to_delete``.  Backups sharing the
+    same datetime are kept or deleted together, and backups among the
+    ``keys`` of the ``holds`` option are never deleted.  If ``dry_run``
+    is true, nothing is deleted.
+
+    If ``metrics``, a ``grandfatherson.metrics.Metrics``, is given,
+    the run is recorded in it.
+
+    Return a list of the keys that were, or would have been, deleted.
+    """
+    if metrics is None:
+        keys = _to_delete(store, options)
+        if keys and not dry_run:
+            store.delete(keys)
+        return keys
+
+    with metrics.computing():
+        keys = _to_delete(store, options)
+    if keys and not dry_run:
+        with metrics.deleting():
+            store.delete(keys)
+    metrics.deleted = len(keys)
+    return keys
+
+
+def _to_delete(store, options):
+    keys_by_datetime = {}
+    for key, dt in store.entries():
+        keys_by_datetime.setdefault(dt, []).append(key)
+
+    held = ()
+    if options.get('holds') is not None:
+        held = options['holds'].keys
+    return [key
+            for dt in sorted(to_delete(keys_by_datetime, **options))
+            for key in keys_by_datetime[dt] if key not in held]
+
+
+class S3Store(Store):
+    """
+    Backups stored as objects in an S3-compatible bucket.
+
+    ``client`` is a ``boto3`` S3 client, or anything implementing its
+    ``list_objects_v2`` and ``delete_objects`` methods.  Only objects
+    under ``prefix`` are considered.
+
+    Each object is dated by its ``LastModified`` time, unless ``parse``
+    is given: it is then called with the object key and should return
+    a datetime, or None to leave the object out of the rotation.
+    """
+    # S3 refuses multi-object deletes of more keys than this
+    MAX_DELETE = 1000
+
+    def __init__(self, client, bucket, prefix='', parse=None,
+                 page_size=1000):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.parse = parse
+        self.page_size = page_size
+
+    def pages(self):
+        """Yield the listing of the bucket, one page of objects at a time."""
+        kwargs = {'Bucket': self.bucket, 'Prefix': self.prefix,
+                  'MaxKeys': self.page_size}
+        while True:
+            response = self.client.list_objects_v2(**kwargs)
+            yield response.get('Contents', [])
+            if not response.get('IsTruncated'):
+                break
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+    def entries(self):
+        parse = self.parse
+        for page in self.pages():
+            for obj in page:
+                if parse is None:
+                    dt = obj['LastModified']
+                else:
+                    dt = parse(obj['Key'])
+                    if dt is None:
+                        continue
+                yield obj['Key'], dt
+
+    def delete(self, keys):
+        """
+        Delete ``keys`` using as few multi-object deletes as possible.
+
+        Raises ``StoreError`` listing every key S3 failed to delete.
+        """
+        keys = list(keys)
+        errors = []
+        for i in range(0, len(keys), self.MAX_DELETE):
+            batch = keys[i:i + self.MAX_DELETE]
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in batch],
+                        'Quiet': True},
+            )
+            errors.extend(response.get('Errors', []))
+        if errors:
+            raise StoreError('Failed to delete %d of %d objects from %s' %
+                             (len(errors), len(keys), self.bucket),
+                             errors)
+
+
+class DirectoryStore(Store):
+    """
+    Backups stored as files or directories under ``path``.
+
+    Keys are paths relative to ``path``, separated by ``/``.  ``parse``
+    is called with the name of each file and directory, and should
+    return its datetime, or None if it is not a backup.  Alternatively,
+    ``format`` is a ``strptime`` format that backup names match.
+    Directories that are not backups are searched for more backups.
+    """
+
+    def __init__(self, path, parse=None, format=None):
+        if (parse is None) == (format is None):
+            raise ValueError('Exactly one of parse and format is required')
+        self.path = path
+        if format is not None:
+            parse = self._strptime(format)
+        self.parse = parse
+
+    @staticmethod
+    def _strptime(format):
+        def parse(name):
+            try:
+                return datetime.strptime(name, format)
+            except ValueError:
+                return None
+        return parse
+
+    def entries(self):
+        for directory, dirnames, filenames in os.walk(self.path):
+            relative = os.path.relpath(directory, self.path)
+            prefix = '' if relative == os.curdir else \
+                relative.replace(os.sep, '/') + '/'
+            for name in filenames:
+                dt = self.parse(name)
+                if dt is not None:
+                    yield prefix + name, dt
+            # Backups that are directories are not searched any further
+            for name in list(dirnames):
+                dt = self.parse(name)
+                if dt is not None:
+                    dirnames.remove(name)
+                    yield prefix + name, dt
+
+    def delete(self, keys):
+        for key in keys:
+            path = os.path.join(self.path, *key.split('/'))
+            try:
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
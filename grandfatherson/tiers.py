@@ -0,0 +1,214 @@
+"""
+Tiers of any granularity, on an integer bucket engine.
+
+A tier is a function mapping a timestamp, in integer microseconds
+since the epoch, to the integer index of its bucket; consecutive
+buckets have consecutive indexes.  Keeping ``number`` of a tier keeps
+the first datetime of each of the last ``number`` buckets up to
+``now``, just as ``grandfatherson.filters`` does for the built-in
+units.  Besides those, quarter hours, six hours, fortnights and
+quarters are registered, and more can be added with ``register``::
+
+    >>> from datetime import datetime
+    >>> from grandfatherson import to_keep
+    >>> register('decades', lambda micros, firstweekday:
+    ...          civil_year(micros) // 10)
+    >>> sorted(to_keep([datetime(1985, 1, 1), datetime(1990, 1, 1),
+    ...                 datetime(1995, 1, 1)],
+    ...                tiers=[('decades', 1)], now=datetime(1999, 1, 1)))
+    [datetime.datetime(1990, 1, 1, 0, 0)]
+    >>> del TIERS['decades']
+
+All the tiers of a rotation are evaluated together, in one pass over
+the datetimes, each converted to an integer once.  Buckets are taken
+from the wall clock of each datetime, as ``Filter.mask`` does, while
+the windows of the tiers, and the oldest datetime of each bucket, are
+found by comparing instants, as ``Filter.filter`` does.  Timezone-aware
+datetimes in different timezones share a bucket when their buckets
+start at the same instant, as masked datetimes compare equal then.
+"""
+from datetime import timedelta
+
+from grandfatherson.filters import FILTERS, check_number, resolve_now_for
+from grandfatherson.timestamps import EPOCH
+
+
+SECOND = 10 ** 6
+MINUTE = 60 * SECOND
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# 1970-01-01 was a Thursday
+EPOCH_WEEKDAY = 3
+
+
+def wall_micros(dt):
+    """Return the wall clock time of ``dt`` as microseconds since the epoch."""
+    if dt.tzinfo is not None:
+        dt = dt.replace(tzinfo=None)
+    delta = dt - EPOCH
+    return (delta.days * 86400 + delta.seconds) * SECOND + delta.microseconds
+
+
+def _offset(dt):
+    """Return the UTC offset of ``dt`` in microseconds, 0 if naive."""
+    offset = dt.utcoffset()
+    if offset is None:
+        return 0
+    return ((offset.days * 86400 + offset.seconds) * SECOND +
+            offset.microseconds)
+
+
+def _instant(micros, tzinfo):
+    """Return the instant of the wall clock time ``micros`` in ``tzinfo``."""
+    if tzinfo is None:
+        return micros
+    return micros - _offset((EPOCH + timedelta(microseconds=micros))
+                            .replace(tzinfo=tzinfo))
+
+
+def civil_month(micros):
+    """Return the month of ``micros``, counted as ``year * 12 + month - 1``."""
+    # Howard Hinnant's days-to-civil algorithm, in integers only
+    days = micros // DAY + 719468
+    era = days // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 -
+                   day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 -
+                                year_of_era // 100)
+    shifted_month = (5 * day_of_year + 2) // 153
+    month = shifted_month + 3 if shifted_month < 10 else shifted_month - 9
+    year = year_of_era + era * 400 + (month <= 2)
+    return year * 12 + month - 1
+
+
+def civil_year(micros):
+    """Return the year of ``micros``."""
+    return civil_month(micros) // 12
+
+
+def _fixed(length):
+    return lambda micros, firstweekday: micros // length
+
+
+def _weeks(length):
+    def bucket(micros, firstweekday):
+        return (micros // DAY + EPOCH_WEEKDAY - firstweekday) // length
+    return bucket
+
+
+# Tier bucket functions by name; each takes microseconds and firstweekday
+TIERS = {
+    'seconds': _fixed(SECOND),
+    'minutes': _fixed(MINUTE),
+    'quarter_hours': _fixed(15 * MINUTE),
+    'hours': _fixed(HOUR),
+    'six_hours': _fixed(6 * HOUR),
+    'days': _fixed(DAY),
+    'weeks': _weeks(7),
+    'fortnights': _weeks(14),
+    'months': lambda micros, firstweekday: civil_month(micros),
+    'quarters': lambda micros, firstweekday: civil_month(micros) // 3,
+    'years': lambda micros, firstweekday: civil_year(micros),
+}
+
+
+def register(name, bucket):
+    """
+    Register the tier ``name``, whose ``bucket`` function is called
+    with a timestamp in microseconds and the ``firstweekday``, and
+    returns the index of its bucket.  Register tiers before any other
+    thread starts rotating with them.
+    """
+    if not callable(bucket):
+        raise ValueError('Invalid bucket function for tier %s' % name)
+    TIERS[name] = bucket
+
+
+def _start(bucket, lowest, now_micros, firstweekday):
+    """
+    Return the first timestamp in bucket ``lowest``, which is at most
+    that of ``now_micros``, by bisection: buckets never decrease.
+    """
+    step = DAY
+    while bucket(now_micros - step, firstweekday) >= lowest:
+        step *= 2
+    low, high = now_micros - step, now_micros
+    while high - low > 1:
+        middle = (low + high) // 2
+        if bucket(middle, firstweekday) >= lowest:
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def to_keep(datetimes, tiers, firstweekday, now=None, counts=None,
+            holds=None):
+    """
+    Return a set of datetimes that should be kept, out of ``datetimes``.
+
+    ``tiers`` is an ordered list of ``(name, number)``, naming tiers
+    registered in ``TIERS``.  If ``counts`` is a dict, it is filled with
+    the number of datetimes each tier keeps, by filter class name for
+    the built-in units.  Datetimes held by ``holds`` are kept as they
+    are swept.  See ``grandfatherson.to_keep`` for a description of the
+    other arguments.
+    """
+    active = []
+    for name, number in tiers:
+        check_number(number)
+        if name not in TIERS:
+            raise ValueError('Unknown tier: %s' % name)
+        if number:
+            active.append((name, TIERS[name], number, {}))
+
+    datetimes = list(datetimes)
+
+    now = resolve_now_for(datetimes, now)
+    now_micros = wall_micros(now)
+
+    # The instant each tier's window starts, so that datetimes before
+    # it are skipped without computing their bucket.  The window starts
+    # on the wall clock of now, in its timezone.
+    windows = []
+    for name, bucket, number, firsts in active:
+        start = _start(bucket, bucket(now_micros, firstweekday) - number + 1,
+                       now_micros, firstweekday)
+        windows.append((bucket, _instant(start, now.tzinfo), firsts, {}))
+
+    kept = set()
+    for dt in datetimes:
+        if dt > now:
+            # Always keep datetimes from the future
+            kept.add(dt)
+            continue
+        if holds is not None and dt in holds:
+            kept.add(dt)
+        micros = wall_micros(dt)
+        offset = None if dt.tzinfo is None else _offset(dt)
+        instant = micros if offset is None else micros - offset
+        for bucket, start, firsts, starts in windows:
+            if instant >= start:
+                key = bucket(micros, firstweekday)
+                if offset is not None:
+                    # Key the bucket by the instant it starts in the
+                    # timezone of dt, found once per bucket and timezone
+                    index = key, dt.tzinfo
+                    if index not in starts:
+                        starts[index] = _instant(
+                            _start(bucket, key, micros, firstweekday),
+                            dt.tzinfo)
+                    key = starts[index]
+                first = firsts.get(key)
+                if first is None or instant < first[0]:
+                    firsts[key] = (instant, dt)
+
+    for bucket, start, firsts, starts in windows:
+        kept.update(dt for micros, dt in firsts.values())
+    if counts is not None:
+        labels = dict((name, cls.__name__) for name, cls in FILTERS)
+        for name, bucket, number, firsts in active:
+            counts[labels.get(name, name)] = len(firsts)
+    return kept
@@ -0,0 +1,87 @@
+"""
+Conversions between datetimes and integer timestamps.
+
+Integer timestamps are microseconds since the Unix epoch.  Naive
+datetimes are taken at face value; timezone-aware datetimes are
+converted to UTC first.
+"""
+from array import array
+from datetime import datetime, timedelta
+from heapq import merge
+
+from grandfatherson.filters import UTC
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECONDS = 10 ** 6
+
+
+def to_micros(dt):
+    """Return ``dt`` as microseconds since the epoch."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(UTC()).replace(tzinfo=None)
+    delta = dt - EPOCH
+    return ((delta.days * 86400 + delta.seconds) * MICROSECONDS +
+            delta.microseconds)
+
+
+def from_micros(micros, tzinfo=None):
+    """
+    Return the datetime ``micros`` microseconds after the epoch.
+
+    If ``tzinfo`` is given, the result is in UTC, converted to it.
+    """
+    dt = EPOCH + timedelta(microseconds=micros)
+    if tzinfo is not None:
+        dt = dt.replace(tzinfo=UTC()).astimezone(tzinfo)
+    return dt
+
+
+class Timeline(object):
+    """
+    A sorted sequence of unique datetimes, stored compactly as an array
+    of integer timestamps.
+
+    Items are converted back to datetimes as they are read, in
+    ``tzinfo`` if it is given, so a timeline can be searched with the
+    ``bisect`` module like a list of datetimes.
+    """
+
+    def __init__(self, datetimes=(), tzinfo=None):
+        self.tzinfo = tzinfo
+        self.micros = array('q', sorted(set(to_micros(dt)
+                                            for dt in datetimes)))
+
+    def __len__(self):
+        return len(self.micros)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [from_micros(m, self.tzinfo) for m in self.micros[index]]
+        return from_micros(self.micros[index], self.tzinfo)
+
+    def __iter__(self):
+        tzinfo = self.tzinfo
+        for m in self.micros:
+            yield from_micros(m, tzinfo)
+
+    def copy(self):
+        timeline = Timeline(tzinfo=self.tzinfo)
+        timeline.micros = array('q', self.micros)
+        return timeline
+
+    def update(self, datetimes):
+        """Add ``datetimes`` to the timeline, merging them in order."""
+        new = sorted(set(to_micros(dt) for dt in datetimes))
+        if not new:
+            return
+        if not self.micros or new[0] > self.micros[-1]:
+            # The common case: appending newer backups
+            self.micros.extend(new)
+            return
+        micros = array('q')
+        last = None
+        for m in merge(self.micros, new):
+            if m != last:
+                micros.append(m)
+                last = m
+        self.micros = micros
@@ -0,0 +1,210 @@
+"""
+Rotate a directory of backups as backups land in it.
+
+``Watcher`` keeps a ``grandfatherson.incremental.Rotation`` of the
+directory's backups up to date from inotify events, rather than
+listing the directory on every run, and deletes whatever the rotation
+rejects.  inotify is reached through ``ctypes``, so this only works on
+Linux.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import shutil
+import struct
+
+from grandfatherson.incremental import Rotation
+
+
+class Inotify(object):
+    """A minimal wrapper around the Linux inotify API."""
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p,
+                                    ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def add_watch(self, path, mask):
+        """Watch ``path`` for events in ``mask``. Return the watch."""
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def read(self, timeout=None):
+        """
+        Return a list of ``(wd, mask, name)`` events, waiting up to
+        ``timeout`` seconds for some to arrive.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Watcher(object):
+    """
+    Rotates the backups in ``directory``.
+
+    ``parse`` is called with the name of each file or subdirectory
+    and should return its datetime, or None to leave it alone.
+    ``options`` are the ``grandfatherson.to_keep`` arguments, except
+    for ``now``.  If ``dry_run`` is true, nothing is deleted, and the
+    index is left as it is.
+    """
+    # A backup has landed when it is closed after writing, moved in,
+    # or when it is a directory, created
+    LANDED = Inotify.IN_CLOSE_WRITE | Inotify.IN_MOVED_TO | Inotify.IN_CREATE
+    LEFT = Inotify.IN_DELETE | Inotify.IN_MOVED_FROM
+
+    def __init__(self, directory, parse, dry_run=False, **options):
+        self.directory = directory
+        self.parse = parse
+        self.dry_run = dry_run
+        self.options = options
+        self.rotation = Rotation(**options)
+        self.names = {}
+        self.inotify = None
+
+    def scan(self):
+        """Index every backup already in the directory."""
+        for name in os.listdir(self.directory):
+            self.created(name)
+
+    def rescan(self):
+        """
+        Index the directory again from scratch, as after inotify's queue
+        overflowed and events were lost.
+        """
+        self.rotation = Rotation(**self.options)
+        self.names = {}
+        self.scan()
+
+    def created(self, name):
+        """Index the backup ``name``. Return True if it is a backup."""
+        dt = self.parse(name)
+        if dt is None:
+            return False
+        self.names.setdefault(dt, set()).add(name)
+        self.rotation.add(dt)
+        return True
+
+    def removed(self, name):
+        """Forget the backup ``name``. Return True if it was a backup."""
+        dt = self.parse(name)
+        names = self.names.get(dt)
+        if not names or name not in names:
+            return False
+        names.discard(name)
+        if not names:
+            del self.names[dt]
+            self.rotation.remove(dt)
+        return True
+
+    def rotate(self, now=None):
+        """
+        Delete the backups that should not be kept at ``now``.
+
+        Return a sorted list of the names deleted.
+        """
+        deleted = []
+        for dt in sorted(self.rotation.to_delete(now)):
+            names = sorted(self.names[dt])
+            deleted.extend(names)
+            if self.dry_run:
+                continue
+            for name in names:
+                self.delete(os.path.join(self.directory, name))
+            # Only forget the backups once they are gone
+            del self.names[dt]
+            self.rotation.remove(dt)
+        return deleted
+
+    def delete(self, path):
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def start(self):
+        """Start watching the directory, then index what is already in it."""
+        self.inotify = Inotify()
+        self.inotify.add_watch(self.directory, self.LANDED | self.LEFT)
+        self.scan()
+
+    def poll(self, timeout=None, now=None):
+        """
+        Wait up to ``timeout`` seconds for backups to land or leave, then
+        rotate.  Return the names deleted.
+
+        If inotify's queue overflowed, the events are incomplete, so the
+        directory is indexed again instead.
+        """
+        if self.inotify is None:
+            self.start()
+        events = self.inotify.read(timeout)
+        if any(mask & Inotify.IN_Q_OVERFLOW for wd, mask, name in events):
+            self.rescan()
+            events = []
+        for wd, mask, name in events:
+            if mask & self.LEFT:
+                self.removed(name)
+            elif (mask & self.LANDED and
+                  (mask & Inotify.IN_ISDIR or
+                   not mask & Inotify.IN_CREATE)):
+                self.created(name)
+        return self.rotate(now)
+
+    def run(self, interval=60):
+        """
+        Rotate forever.  Even without any events, rotate at least every
+        ``interval`` seconds, as backups age out of their tiers.
+        """
+        try:
+            while True:
+                self.poll(interval)
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
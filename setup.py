@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 
-from distutils.core import setup
-from distutils.cmd import Command
+from setuptools import Command, setup
 
 import os
 import re
@@ -61,11 +60,12 @@ setup(name='GrandFatherSon',
           'License :: OSI Approved :: BSD License',
           'Operating System :: OS Independent',
           'Programming Language :: Python',
-          'Programming Language :: Python :: 2.6',
-          'Programming Language :: Python :: 2.7',
+          'Programming Language :: Python :: 3',
+          'Programming Language :: Python :: 3 :: Only',
           'Topic :: Software Development :: Libraries',
           'Topic :: System :: Archiving',
       ],
       license='BSD License',
+      python_requires='>=3',
       cmdclass={'test': test},
 )
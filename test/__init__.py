@@ -3,13 +3,44 @@ import doctest
 import os
 
 import grandfatherson
+import grandfatherson.filters
+import grandfatherson.holds
+import grandfatherson.planner
+import grandfatherson.replicas
+import grandfatherson.tiers
 
+from test.test_batch import *
+from test.test_budget import *
+from test.test_catalog import *
+from test.test_cli import *
+from test.test_coverage import *
+from test.test_distributed import *
+from test.test_explain import *
 from test.test_filters import *
+from test.test_fleet import *
+from test.test_forecast import *
+from test.test_hardlinks import *
+from test.test_holds import *
+from test.test_incremental import *
+from test.test_metrics import *
+from test.test_migration import *
+from test.test_planner import *
+from test.test_replicas import *
+from test.test_restore import *
+from test.test_series import *
+from test.test_service import *
+from test.test_snapshots import *
+from test.test_sql import *
+from test.test_stores import *
+from test.test_tiers import *
+from test.test_watch import *
 
 
 class Main(unittest.main):
     """Loads doctests with the rest of the TestSuite"""
-    doctests = [grandfatherson]
+    doctests = [grandfatherson, grandfatherson.filters,
+                grandfatherson.holds, grandfatherson.planner,
+                grandfatherson.replicas, grandfatherson.tiers]
 
     def parseArgs(self, *args, **kwargs):
         unittest.main.parseArgs(self, *args, **kwargs)
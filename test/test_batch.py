@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+import sys
+import threading
+import unittest
+from unittest import mock
+
+from grandfatherson import filters, to_delete, to_keep
+from grandfatherson.batch import executor, gil_enabled, to_delete_many
+from grandfatherson.filters import utc
+
+
+class TestExecutor(unittest.TestCase):
+    def test_gil_enabled(self):
+        with mock.patch.object(sys, '_is_gil_enabled', lambda: False,
+                               create=True):
+            self.assertFalse(gil_enabled())
+        with mock.patch.object(sys, '_is_gil_enabled', lambda: True,
+                               create=True):
+            self.assertTrue(gil_enabled())
+
+    def test_auto(self):
+        with mock.patch.object(sys, '_is_gil_enabled', lambda: False,
+                               create=True):
+            with executor('auto', 2) as pool:
+                self.assertEqual(type(pool).__name__, 'ThreadPoolExecutor')
+        with mock.patch.object(sys, '_is_gil_enabled', lambda: True,
+                               create=True):
+            with executor('auto', 2) as pool:
+                self.assertEqual(type(pool).__name__, 'ProcessPoolExecutor')
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, executor, 'fibers')
+
+
+class TestToDeleteMany(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 31, 12, 0, 0)
+        self.series = dict(('series%d' % i,
+                            [self.now - timedelta(hours=j * (i + 1))
+                             for j in range(200)])
+                           for i in range(8))
+        self.policies = dict((name, {'days': 3, 'hours': i})
+                             for i, name in enumerate(sorted(self.series)))
+
+    def expected(self):
+        return dict((name, to_delete(datetimes, now=self.now,
+                                     **self.policies[name]))
+                    for name, datetimes in self.series.items())
+
+    def test_threads(self):
+        self.assertEqual(to_delete_many(self.series, self.policies,
+                                        now=self.now, mode='threads',
+                                        workers=4),
+                         self.expected())
+
+    def test_processes(self):
+        self.assertEqual(to_delete_many(self.series, self.policies,
+                                        now=self.now, mode='processes',
+                                        workers=2),
+                         self.expected())
+
+    def test_policy_function(self):
+        deleted = to_delete_many(self.series,
+                                 lambda name: None if name == 'series0'
+                                 else self.policies[name],
+                                 now=self.now, mode='threads')
+        self.assertEqual(sorted(deleted), sorted(self.series)[1:])
+
+
+class TestThreadSafety(unittest.TestCase):
+    def test_concurrent_to_keep(self):
+        now = datetime(2000, 1, 31, 12, 0, 0, tzinfo=utc)
+        datetimes = [now - timedelta(minutes=7 * i) for i in range(3000)]
+        policy = dict(days=7, hours=24, minutes=60, now=now)
+        expected = to_keep(datetimes, **policy)
+        results = []
+
+        def rotate():
+            for i in range(5):
+                results.append(to_keep(datetimes, **policy))
+
+        threads = [threading.Thread(target=rotate) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 40)
+        for result in results:
+            self.assertEqual(result, expected)
+
+    def test_observers_per_thread(self):
+        now = datetime(2000, 1, 31, 12, 0, 0)
+        datetimes = [now - timedelta(hours=i) for i in range(100)]
+        observing = threading.Event()
+        rotated = threading.Event()
+        events = []
+
+        def rotate():
+            observing.wait(5)
+            to_keep(datetimes, days=3, now=now)
+            rotated.set()
+
+        thread = threading.Thread(target=rotate)
+        thread.start()
+        with filters.observe(events.append):
+            observing.set()
+            rotated.wait(5)
+            to_keep(datetimes[:10], days=3, now=now)
+        thread.join()
+        self.assertEqual([event['input'] for event in events
+                          if event['event'] == 'to_keep'], [10])
+
+    def test_now_resolved_once(self):
+        datetimes = [datetime(2000, 1, 1)]
+        calls = []
+        resolve_now = filters.resolve_now
+
+        def counting(now, tzinfo=None):
+            calls.append(now)
+            return resolve_now(now, tzinfo)
+
+        with mock.patch.object(filters, 'resolve_now', counting):
+            to_keep(datetimes, years=1, months=1, days=1)
+        self.assertIsNone(calls[0])
+        self.assertEqual([now for now in calls[1:] if now is None], [])
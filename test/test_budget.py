@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+import unittest
+
+from grandfatherson import to_delete
+from grandfatherson.budget import to_delete_within_budget
+
+
+class TestToDeleteWithinBudget(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 3, 1, 12, 0, 0)
+        self.datetimes = [self.now - timedelta(hours=6 * i)
+                          for i in range(-1, 200)]
+        self.options = dict(months=2, weeks=2, days=3, now=self.now)
+
+    def test_within_budget(self):
+        deleted = to_delete_within_budget(self.datetimes, lambda dt: 1,
+                                          10 ** 6, **self.options)
+        self.assertEqual(deleted, to_delete(self.datetimes, **self.options))
+
+    def test_evicts_finest_oldest_first(self):
+        kept = set(self.datetimes) - to_delete(self.datetimes,
+                                               **self.options)
+        self.assertEqual(sorted(kept), [
+            datetime(2000, 2, 1, 0, 0),     # Months
+            datetime(2000, 2, 19, 0, 0),    # Weeks
+            datetime(2000, 2, 26, 0, 0),    # Weeks
+            datetime(2000, 2, 28, 0, 0),    # Days
+            datetime(2000, 2, 29, 0, 0),    # Days
+            datetime(2000, 3, 1, 0, 0),     # Months and Days
+            datetime(2000, 3, 1, 18, 0),    # future
+        ])
+        sizes = dict((dt, 100) for dt in self.datetimes)
+        deleted = to_delete_within_budget(self.datetimes, sizes, 450,
+                                          **self.options)
+        self.assertEqual(sorted(kept - deleted), [
+            datetime(2000, 2, 1, 0, 0),
+            datetime(2000, 2, 26, 0, 0),
+            datetime(2000, 3, 1, 0, 0),
+            datetime(2000, 3, 1, 18, 0),
+        ])
+
+    def test_empty_budget(self):
+        self.assertEqual(to_delete_within_budget(self.datetimes, lambda dt: 1,
+                                                 0, **self.options),
+                         set(self.datetimes))
+
+    def test_invalid_budget(self):
+        self.assertRaises(ValueError, to_delete_within_budget,
+                          self.datetimes, lambda dt: 1, -1)
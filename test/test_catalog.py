@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+import os
+import shutil
+import tempfile
+import unittest
+
+from grandfatherson import to_keep
+from grandfatherson.catalog import Catalog
+from grandfatherson.filters import UTC
+
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 3, 1, 12, 0, 0)
+        self.datetimes = [self.now - timedelta(hours=5 * i)
+                          for i in range(-3, 500)]
+        self.entries = [(dt.isoformat(), dt) for dt in self.datetimes]
+        self.catalog = Catalog()
+
+    def tearDown(self):
+        self.catalog.close()
+
+    def test_to_keep(self):
+        self.catalog.sync('db', self.entries)
+        options = dict(months=2, weeks=3, days=4, hours=12, now=self.now)
+        self.assertEqual(self.catalog.to_keep('db', **options),
+                         set(dt.isoformat()
+                             for dt in to_keep(self.datetimes, **options)))
+
+    def test_to_delete(self):
+        self.catalog.sync('db', self.entries)
+        self.assertEqual(self.catalog.to_delete('db', days=1, now=self.now),
+                         set(key for key, dt in self.entries
+                             if dt.date() < self.now.date()) |
+                         set(key for key, dt in self.entries
+                             if dt.date() == self.now.date() and
+                             dt.hour != 2 and dt <= self.now))
+
+    def test_aware(self):
+        utc = UTC()
+        entries = [(key, dt.replace(tzinfo=utc)) for key, dt in self.entries]
+        self.catalog.sync('db', entries)
+        self.assertEqual(self.catalog.entries('db')[0], entries[-1])
+        now = self.now.replace(tzinfo=utc)
+        self.assertEqual(self.catalog.to_keep('db', weeks=2, now=now),
+                         set(dt.replace(tzinfo=None).isoformat() for dt in
+                             to_keep([dt for key, dt in entries],
+                                     weeks=2, now=now)))
+
+    def test_sync(self):
+        added, removed = self.catalog.sync('db', self.entries[:10])
+        self.assertEqual(len(added), 10)
+        self.assertEqual(removed, set())
+
+        added, removed = self.catalog.sync('db', self.entries[5:12])
+        self.assertEqual(added, [key for key, dt in self.entries[10:12]])
+        self.assertEqual(removed,
+                         set(key for key, dt in self.entries[:5]))
+        self.assertEqual(self.catalog.keys('db'),
+                         set(key for key, dt in self.entries[5:12]))
+
+        self.assertEqual(self.catalog.sync('db', self.entries[5:12]),
+                         ([], set()))
+
+    def test_sync_redated(self):
+        self.catalog.sync('s', [('k', datetime(2000, 1, 1))])
+        self.assertEqual(self.catalog.to_keep('s', days=1,
+                                              now=datetime(2000, 1, 1)),
+                         set(['k']))
+        # An overwritten object has a new datetime, and its decision
+        # is made again
+        self.assertEqual(self.catalog.sync('s', [('k',
+                                                  datetime(2000, 6, 1))]),
+                         (['k'], set()))
+        self.assertEqual(self.catalog.entries('s'),
+                         [('k', datetime(2000, 6, 1))])
+        self.assertEqual(self.catalog.to_delete('s', days=1,
+                                                now=datetime(2000, 7, 1)),
+                         set(['k']))
+        self.assertEqual(self.catalog.sync('s', [('k',
+                                                  datetime(2000, 6, 1))]),
+                         ([], set()))
+
+    def test_unchanged_store_writes_nothing(self):
+        self.catalog.sync('db', self.entries)
+        options = dict(weeks=3, days=4, now=self.now)
+        deleted = self.catalog.to_delete('db', **options)
+        changes = self.catalog.connection.total_changes
+        self.assertEqual(self.catalog.to_delete('db', **options), deleted)
+        self.assertEqual(self.catalog.connection.total_changes, changes)
+
+        # Only the decisions that change are written
+        kept = self.catalog.to_keep('db', weeks=3, days=8, now=self.now)
+        changed = len(kept & deleted)
+        self.assertTrue(changed)
+        self.assertEqual(self.catalog.connection.total_changes,
+                         changes + changed)
+
+    def test_series_are_separate(self):
+        self.catalog.sync('a', self.entries[:3])
+        self.catalog.sync('b', self.entries[3:4])
+        self.assertEqual(self.catalog.to_keep('b', now=self.now), set())
+        self.assertEqual(self.catalog.to_keep('a', now=self.now),
+                         set(key for key, dt in self.entries[:3]))
+        self.assertEqual(self.catalog.to_keep('missing', now=self.now), set())
+
+    def test_invalid_number(self):
+        self.catalog.sync('db', self.entries)
+        self.assertRaises(ValueError, self.catalog.to_keep, 'db', days=-1)
+
+    def test_persistence(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'catalog.sqlite')
+            catalog = Catalog(path)
+            catalog.sync('db', self.entries)
+            catalog.close()
+
+            catalog = Catalog(path)
+            self.assertEqual(catalog.keys('db'),
+                             set(key for key, dt in self.entries))
+            catalog.close()
+        finally:
+            shutil.rmtree(directory)
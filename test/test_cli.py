@@ -0,0 +1,143 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from grandfatherson.cli import main, parse_args
+
+
+# The only modules that starting up may import: the package's own, and
+# the standard library modules it needs, along with their dependencies
+PACKAGE_MODULES = ['grandfatherson', 'grandfatherson.cli',
+                   'grandfatherson.filters', 'grandfatherson.planner']
+STANDARD_MODULES = ['__future__', 'bisect', 'contextvars', 'datetime']
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(argv, stdin=''):
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    status = main(argv, stdin=io.StringIO(stdin), stdout=stdout,
+                  stderr=stderr)
+    return status, stdout.getvalue(), stderr.getvalue()
+
+
+class TestImport(unittest.TestCase):
+    def imported(self, statement):
+        """Return the set of modules that ``statement`` imports."""
+        script = ('import sys\n'
+                  'before = set(sys.modules)\n'
+                  '%s\n'
+                  'print(" ".join(sorted(set(sys.modules) - before)))\n'
+                  % statement)
+        output = subprocess.check_output([sys.executable, '-S', '-c', script],
+                                         cwd=ROOT, universal_newlines=True)
+        return set(output.split())
+
+    def test_cold_start(self):
+        # Startup time is mostly spent importing, so rather than timing
+        # it, which is unreliable on loaded machines, check that nothing
+        # else is imported
+        modules = self.imported('import grandfatherson.cli')
+        allowed = self.imported('import ' + ', '.join(STANDARD_MODULES))
+        allowed.update(PACKAGE_MODULES)
+        self.assertEqual(sorted(modules - allowed), [])
+
+
+class TestParseArgs(unittest.TestCase):
+    def test_parse_args(self):
+        self.assertEqual(parse_args(['--days', '7', '--weeks=4', 'a', '--keep',
+                                     '--', '--b']),
+                         ([('days', '7'), ('weeks', '4'), ('keep', None)],
+                          ['a', '--b']))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, parse_args, ['--decades', '1'])
+        self.assertRaises(ValueError, parse_args, ['--days'])
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self.lines = ''.join('2000-01-%02dT01:00:00\n' % day
+                             for day in range(1, 11))
+
+    def test_to_delete(self):
+        status, stdout, stderr = run(['--days', '3',
+                                      '--now', '2000-01-10T12:00'],
+                                     self.lines)
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout, self.lines[:7 * 20])
+
+    def test_to_keep(self):
+        status, stdout, stderr = run(['--days=3', '--keep',
+                                      '--now=2000-01-10T12:00'],
+                                     self.lines)
+        self.assertEqual(stdout, self.lines[7 * 20:])
+
+    def test_format(self):
+        status, stdout, stderr = run(['--format', 'db-%Y%m%d.tar',
+                                      '--weeks', '1',
+                                      '--firstweekday', 'monday',
+                                      '--now', '2000-01-05'],
+                                     'db-20000102.tar\ndb-20000103.tar\n'
+                                     'db-20000104.tar\n')
+        self.assertEqual(stdout, 'db-20000102.tar\ndb-20000104.tar\n')
+
+    def test_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'listing')
+        with open(path, 'w') as f:
+            f.write(self.lines)
+        status, stdout, stderr = run(['--days', '9', path,
+                                      '--now', '2000-01-10T12:00'])
+        self.assertEqual(stdout, '2000-01-01T01:00:00\n')
+
+    def test_fleet(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        os.mkdir(os.path.join(directory, 'db'))
+        for day in (1, 2, 3):
+            open(os.path.join(directory, 'db', '200001%02d.tar' % day),
+                 'w').close()
+        config = os.path.join(directory, 'fleet.json')
+        with open(config, 'w') as f:
+            json.dump({'sources': {'local': {'path': directory,
+                                             'format': '%Y%m%d.tar'}},
+                       'rules': [{'source': 'local', 'match': 'db/*',
+                                  'policy': {'days': 1}}]}, f)
+        status, stdout, stderr = run(['--fleet', config, '--dry-run',
+                                      '--now', '2000-01-03T12:00'])
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout, 'local: db/20000101.tar\n'
+                                 'local: db/20000102.tar\n')
+        self.assertEqual(len(os.listdir(os.path.join(directory, 'db'))), 3)
+
+    def test_invalid(self):
+        status, stdout, stderr = run(['--days', 'x'], self.lines)
+        self.assertEqual(status, 1)
+        self.assertIn('Invalid number: x', stderr)
+        status, stdout, stderr = run([], 'yesterday\n')
+        self.assertEqual(status, 1)
+        self.assertIn('Invalid datetime: yesterday', stderr)
+        status, stdout, stderr = run(['--bogus'])
+        self.assertEqual(status, 2)
+
+    def test_mixed_tzinfo(self):
+        for now, lines in [('2000-01-10T12:00', '2000-01-01T01:00+00:00\n'),
+                           ('2000-01-10T12:00+00:00', self.lines)]:
+            status, stdout, stderr = run(['--days', '3', '--now', now],
+                                         lines)
+            self.assertEqual(status, 2)
+            self.assertIn('offset-naive and offset-aware', stderr)
+            self.assertIn('usage:', stderr)
+
+    def test_help(self):
+        status, stdout, stderr = run(['-h'])
+        self.assertEqual(status, 0)
+        self.assertTrue(stdout.startswith('usage:'))
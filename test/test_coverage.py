@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+import unittest
+
+from grandfatherson.coverage import Coverage, check
+from grandfatherson.filters import UTC
+
+
+class TestCheck(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 31, 12, 0, 0)
+        # Daily backups, with failed jobs on the 20th, 25th and 26th
+        self.datetimes = [datetime(2000, 1, day, 1, 0, 0)
+                          for day in range(1, 32)
+                          if day not in (20, 25, 26)]
+
+    def test_days(self):
+        self.assertEqual(check(self.datetimes, days=14, now=self.now), [
+            Coverage('Days', 14,
+                     [datetime(2000, 1, 20), datetime(2000, 1, 25),
+                      datetime(2000, 1, 26)],
+                     timedelta(days=3)),
+        ])
+
+    def test_full_coverage(self):
+        coverage, = check(self.datetimes, days=5, now=self.now)
+        self.assertEqual(coverage.empty, [])
+        self.assertEqual(coverage.largest_gap, timedelta(days=1))
+
+    def test_tiers(self):
+        report = check(self.datetimes, months=2, weeks=2, hours=3,
+                       now=self.now)
+        self.assertEqual([c.tier for c in report],
+                         ['Months', 'Weeks', 'Hours'])
+        months, weeks, hours = report
+        self.assertEqual(months.empty, [datetime(1999, 12, 1)])
+        self.assertEqual(months.largest_gap, timedelta(days=31, hours=1))
+        self.assertEqual(weeks.empty, [])
+        self.assertEqual(hours.empty, [datetime(2000, 1, 31, 10),
+                                       datetime(2000, 1, 31, 11),
+                                       datetime(2000, 1, 31, 12)])
+
+    def test_no_input(self):
+        coverage, = check([], weeks=1, now=self.now)
+        self.assertEqual(coverage.empty, [datetime(2000, 1, 29)])
+        self.assertEqual(coverage.largest_gap,
+                         self.now - datetime(2000, 1, 29))
+
+    def test_aware(self):
+        utc = UTC()
+        coverage, = check([dt.replace(tzinfo=utc) for dt in self.datetimes],
+                          days=14, now=self.now.replace(tzinfo=utc))
+        self.assertEqual(len(coverage.empty), 3)
+
+    def test_invalid_number(self):
+        self.assertRaises(ValueError, check, [], days=-1)
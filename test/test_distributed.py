@@ -0,0 +1,174 @@
+from datetime import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from grandfatherson.distributed import (FileLockBackend, HashRing, Worker,
+                                        _Renewal)
+from grandfatherson.stores import S3Store
+from test.test_stores import FakeS3Client
+
+
+class TestHashRing(unittest.TestCase):
+    def setUp(self):
+        self.keys = ['series-%d' % i for i in range(1000)]
+
+    def test_balanced(self):
+        ring = HashRing(['a', 'b', 'c'])
+        counts = {}
+        for key in self.keys:
+            node = ring.node_for(key)
+            counts[node] = counts.get(node, 0) + 1
+        self.assertEqual(sorted(counts), ['a', 'b', 'c'])
+        self.assertTrue(min(counts.values()) > 200)
+
+    def test_consistent(self):
+        before = HashRing(['a', 'b', 'c'])
+        after = HashRing(['a', 'b', 'c', 'd'])
+        for key in self.keys:
+            node = after.node_for(key)
+            if node != 'd':
+                self.assertEqual(node, before.node_for(key))
+
+    def test_no_nodes(self):
+        self.assertRaises(ValueError, HashRing, [])
+
+
+class TestFileLockBackend(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.time = 1000.0
+        self.backend = FileLockBackend(self.directory,
+                                       clock=lambda: self.time)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_exclusive(self):
+        self.assertTrue(self.backend.acquire('db', 'a', 60))
+        self.assertFalse(self.backend.acquire('db', 'b', 60))
+        self.assertTrue(self.backend.acquire('db', 'a', 60))
+        self.assertTrue(self.backend.acquire('other', 'b', 60))
+
+    def test_expiry(self):
+        self.assertTrue(self.backend.acquire('db', 'a', 60))
+        self.time += 61
+        self.assertTrue(self.backend.acquire('db', 'b', 60))
+        self.assertEqual(self.backend.holder('db'), ('b', self.time + 60))
+
+    def test_release(self):
+        self.assertTrue(self.backend.acquire('db', 'a', 60))
+        self.backend.release('db', 'b')
+        self.assertFalse(self.backend.acquire('db', 'b', 60))
+        self.backend.release('db', 'a')
+        self.assertTrue(self.backend.acquire('db', 'b', 60))
+
+    def backend_seeing(self, view):
+        """A backend on the same directory, seeing the lease as ``view``."""
+        backend = FileLockBackend(self.directory, clock=lambda: self.time)
+        backend._last = lambda path: view
+        return backend
+
+    def test_takeover_is_exclusive(self):
+        self.assertTrue(self.backend.acquire('db', 'a', 60))
+        self.time += 61
+        # b and c both see the expired lease before either takes it over
+        view = self.backend._last(self.backend.path('db'))
+        self.assertTrue(self.backend_seeing(view).acquire('db', 'b', 60))
+        self.assertFalse(self.backend_seeing(view).acquire('db', 'c', 60))
+        self.assertEqual(self.backend.holder('db'), ('b', self.time + 60))
+
+    def test_stale_view(self):
+        self.assertTrue(self.backend.acquire('db', 'a', 60))
+        view = self.backend._last(self.backend.path('db'))
+        self.time += 61
+        self.assertTrue(self.backend.acquire('db', 'b', 60))
+        self.assertTrue(self.backend.acquire('db', 'b', 60))
+        # c recreates the removed generation after a's, but b's stands
+        self.assertFalse(self.backend_seeing(view).acquire('db', 'c', 60))
+        self.assertEqual(self.backend.holder('db'), ('b', self.time + 60))
+        self.assertEqual(len(os.listdir(self.backend.path('db'))), 1)
+
+    def test_release_after_takeover(self):
+        self.assertTrue(self.backend.acquire('db', 'a', 60))
+        view = self.backend._last(self.backend.path('db'))
+        self.time += 61
+        self.assertTrue(self.backend.acquire('db', 'b', 60))
+        # a still sees its own lease, but releases nothing of b's
+        self.backend_seeing(view).release('db', 'a')
+        self.assertEqual(self.backend.holder('db'), ('b', self.time + 60))
+
+    def test_renewal(self):
+        self.assertTrue(self.backend.acquire('db', 'a', 60))
+        renewal = _Renewal(self.backend, 'db', 'a', 60)
+        self.time += 50
+        self.assertTrue(renewal.held())
+        self.assertEqual(self.backend.holder('db'), ('a', self.time + 60))
+        self.time += 61
+        self.assertTrue(self.backend.acquire('db', 'b', 60))
+        self.assertFalse(renewal.held())
+
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.now = datetime(2000, 1, 10, 12, 0, 0)
+        self.clients = {}
+        self.stores = {}
+        for i in range(20):
+            name = 'series-%d' % i
+            self.clients[name] = FakeS3Client(
+                ('%d' % day, datetime(2000, 1, day)) for day in range(1, 10))
+            self.stores[name] = S3Store(self.clients[name], name)
+        self.policies = dict((name, {'days': 2, 'now': self.now})
+                             for name in self.stores)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_partitioned(self):
+        nodes = ['a', 'b', 'c']
+        rotated = {}
+        for node in nodes:
+            worker = Worker(node, nodes, FileLockBackend(self.directory))
+            deleted = worker.run(self.stores, self.policies)
+            self.assertEqual(sorted(deleted),
+                             sorted(worker.owned(self.stores)))
+            for name in deleted:
+                self.assertNotIn(name, rotated)
+                rotated[name] = node
+        self.assertEqual(sorted(rotated), sorted(self.stores))
+        for client in self.clients.values():
+            self.assertEqual(sorted(client.objects), ['9'])
+
+    def test_leased_elsewhere(self):
+        backend = FileLockBackend(self.directory)
+        worker = Worker('a', ['a'], backend)
+        backend.acquire('series-0', 'b', 60)
+        deleted = worker.run(self.stores, self.policies.get)
+        self.assertNotIn('series-0', deleted)
+        self.assertEqual(len(deleted), 19)
+
+    def test_lease_lost(self):
+        time = [1000.0]
+        backend = FileLockBackend(self.directory, clock=lambda: time[0])
+        store = self.stores['series-0']
+        entries = store.entries
+
+        def slow_entries():
+            # Listing takes longer than the lease, which b takes over
+            time[0] += 61
+            backend.acquire('series-0', 'b', 60)
+            return entries()
+
+        store.entries = slow_entries
+        worker = Worker('a', ['a'], backend, ttl=60)
+        deleted = worker.run({'series-0': store}, self.policies)
+        self.assertEqual(deleted, {})
+        self.assertEqual(len(self.clients['series-0'].objects), 9)
+        self.assertEqual(backend.holder('series-0'), ('b', time[0] + 60))
+
+    def test_unknown_node(self):
+        self.assertRaises(ValueError, Worker, 'z', ['a'],
+                          FileLockBackend(self.directory))
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+import random
+import unittest
+
+from grandfatherson import FRIDAY, explain, to_keep
+from grandfatherson.filters import UTC
+
+
+class TestExplain(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 3, 1, 12, 0, 0)
+        rng = random.Random(0)
+        self.datetimes = [self.now - timedelta(minutes=rng.randint(-600,
+                                                                   10 ** 6))
+                          for i in range(2000)]
+        self.options = dict(years=2, months=3, weeks=4, days=5, hours=6,
+                            minutes=7, seconds=8, firstweekday=FRIDAY,
+                            now=self.now)
+
+    def test_same_as_to_keep(self):
+        reasons = explain(self.datetimes, **self.options)
+        self.assertEqual(set(reasons), set(self.datetimes))
+        self.assertEqual(set(dt for dt in reasons if reasons[dt]),
+                         to_keep(self.datetimes, **self.options))
+
+    def test_aware(self):
+        utc = UTC()
+        datetimes = [dt.replace(tzinfo=utc) for dt in self.datetimes]
+        self.options['now'] = self.now.replace(tzinfo=utc)
+        reasons = explain(datetimes, **self.options)
+        self.assertEqual(set(dt for dt in reasons if reasons[dt]),
+                         to_keep(datetimes, **self.options))
+
+    def test_reasons(self):
+        datetimes = [datetime(2000, 3, 1, 13, 0),
+                     datetime(2000, 3, 1, 11, 0),
+                     datetime(2000, 3, 1, 10, 0),
+                     datetime(2000, 2, 1, 0, 0)]
+        reasons = explain(datetimes, months=2, days=1, hours=2, now=self.now)
+        self.assertEqual(reasons[datetime(2000, 3, 1, 13, 0)],
+                         [('future', None)])
+        self.assertEqual(reasons[datetime(2000, 3, 1, 11, 0)],
+                         [('Hours', datetime(2000, 3, 1, 11, 0))])
+        self.assertEqual(reasons[datetime(2000, 3, 1, 10, 0)],
+                         [('Months', datetime(2000, 3, 1)),
+                          ('Days', datetime(2000, 3, 1))])
+        self.assertEqual(reasons[datetime(2000, 2, 1, 0, 0)],
+                         [('Months', datetime(2000, 2, 1))])
+
+    def test_invalid_number(self):
+        self.assertRaises(ValueError, explain, [], days=-1)
+        self.assertRaises(ValueError, explain, [], weeks='1')
+
+    def test_no_input(self):
+        self.assertEqual(explain([], days=1), {})
@@ -1,9 +1,11 @@
 from datetime import datetime, date
 import unittest
 
-from grandfatherson import (FRIDAY, SATURDAY, SUNDAY)
+from grandfatherson import (FRIDAY, SATURDAY, SUNDAY, to_keep)
 from grandfatherson.filters import (Seconds, Minutes, Hours, Days, Weeks,
-                                    Months, Years, UTC)
+                                    Months, Years, UTC, observe,
+                                    resolve_now_for, sample_tzinfo,
+                                    tier_numbers, utc)
 
 
 def utcdatetime(*args):
@@ -742,3 +744,74 @@ class TestYears(unittest.TestCase):
                               datetime(1998, 1, 1, 0, 0, 0, 0),
                               datetime(1999, 12, 31, 23, 59, 59, 999999),
                               datetime(2000, 1, 1, 0, 0, 0, 0)]))
+
+
+class TestHelpers(unittest.TestCase):
+    def test_tier_numbers(self):
+        numbers = tier_numbers(weeks=2, days=3)
+        self.assertEqual(numbers['weeks'], 2)
+        self.assertEqual(numbers['days'], 3)
+        self.assertEqual(numbers['years'], 0)
+        self.assertEqual(len(numbers), 7)
+        self.assertRaises(ValueError, tier_numbers, days=-1)
+        self.assertRaises(ValueError, tier_numbers, hours=1.5)
+
+    def test_sample_tzinfo(self):
+        self.assertEqual(sample_tzinfo([]), None)
+        self.assertEqual(sample_tzinfo([datetime(2000, 1, 1)]), None)
+        self.assertTrue(sample_tzinfo([utcdatetime(2000, 1, 1)]) is utc)
+
+    def test_resolve_now_for(self):
+        now = resolve_now_for([utcdatetime(2000, 1, 1)], date(2000, 1, 1))
+        self.assertEqual(now, utcdatetime(2000, 1, 1, 23, 59, 59, 999999))
+        self.assertEqual(resolve_now_for([], date(2000, 1, 1)),
+                         datetime(2000, 1, 1, 23, 59, 59, 999999))
+
+
+class TestObserve(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 1, 0, 0, 1, 1)
+        self.datetimes = [
+            datetime(2000, 1, 2, 0, 0, 0, 0),
+            datetime(2000, 1, 1, 0, 0, 1, 0),
+            datetime(2000, 1, 1, 0, 0, 0, 1),
+            datetime(2000, 1, 1, 0, 0, 0, 0),
+            datetime(1999, 12, 31, 23, 59, 59, 999999),
+        ]
+
+    def test_filter(self):
+        events = []
+        with observe(events.append):
+            Seconds.filter(self.datetimes, number=2, now=self.now)
+        self.assertEqual(len(events), 1)
+        event = events[0]
+        self.assertEqual(event['event'], 'filter')
+        self.assertEqual(event['tier'], 'Seconds')
+        self.assertEqual(event['number'], 2)
+        self.assertEqual(event['input'], 5)
+        self.assertEqual(event['future'], 1)
+        self.assertEqual(event['window'], 3)
+        self.assertEqual(event['kept'], 3)
+        self.assertAlmostEqual(event['seconds'],
+                               event['copy_seconds'] +
+                               event['future_seconds'] +
+                               event['sort_seconds'] +
+                               event['dedupe_seconds'])
+
+    def test_to_keep(self):
+        events = []
+        with observe(events.append):
+            kept = to_keep(self.datetimes, days=1, seconds=2, now=self.now)
+        self.assertEqual([e.get('tier') for e in events],
+                         ['Years', 'Months', 'Weeks', 'Days', 'Hours',
+                          'Minutes', 'Seconds', None])
+        self.assertEqual(events[-1]['event'], 'to_keep')
+        self.assertEqual(events[-1]['input'], 5)
+        self.assertEqual(events[-1]['kept'], len(kept))
+
+    def test_unobserved(self):
+        events = []
+        with observe(events.append):
+            pass
+        Days.filter(self.datetimes, number=1, now=self.now)
+        self.assertEqual(events, [])
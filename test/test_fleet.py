@@ -0,0 +1,134 @@
+from datetime import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from grandfatherson import SUNDAY
+from grandfatherson.fleet import Fleet, Rules, compile_policy, load
+from grandfatherson.stores import DirectoryStore, S3Store
+from test.test_stores import FakeS3Client
+
+
+class TestRules(unittest.TestCase):
+    def setUp(self):
+        self.rules = Rules([
+            {'match': 'db*/*.tar', 'policy': {'days': 1}},
+            {'prefix': 'db1/', 'policy': {'days': 2}},
+            {'prefix': 'web/', 'policy': {'days': 3}},
+        ])
+
+    def test_match(self):
+        self.assertEqual(self.rules.match('db1/x.tar'),
+                         ((0, 'db1'), {'days': 1}))
+        self.assertEqual(self.rules.match('db1/x.gz'),
+                         ((1, 'db1/'), {'days': 2}))
+        self.assertEqual(self.rules.match('web/a/b'),
+                         ((2, 'web/'), {'days': 3}))
+        self.assertEqual(self.rules.match('mail/x.tar'), None)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Rules, [{'policy': {}}])
+        self.assertRaises(ValueError, Rules,
+                          [{'prefix': '', 'policy': {'decades': 1}}])
+
+    def test_firstweekday(self):
+        self.assertEqual(compile_policy({'firstweekday': 'Sunday'}),
+                         {'firstweekday': SUNDAY})
+        self.assertRaises(ValueError, compile_policy,
+                          {'firstweekday': 'Caturday'})
+
+
+class TestFleet(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 10, 12, 0, 0)
+        self.directory = tempfile.mkdtemp()
+        for name in ('db1', 'db2', 'logs'):
+            os.mkdir(os.path.join(self.directory, name))
+            for day in range(1, 10):
+                self.touch(name, '200001%02d.tar' % day)
+        self.config = {
+            'sources': {'local': {'path': self.directory,
+                                  'format': '%Y%m%d.tar'}},
+            'rules': [
+                {'source': 'local', 'match': 'db*/*',
+                 'policy': {'days': 3}},
+                {'source': 's3', 'prefix': 'hostA/',
+                 'policy': {'days': 1}},
+            ],
+        }
+        self.client = FakeS3Client(
+            [('hostA/%d' % day, datetime(2000, 1, day))
+             for day in range(1, 10)] +
+            [('hostB/%d' % day, datetime(2000, 1, day))
+             for day in range(1, 10)])
+        self.stores = {'s3': S3Store(self.client, 'bucket')}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def touch(self, *names):
+        with open(os.path.join(self.directory, *names), 'w'):
+            pass
+
+    def test_execute(self):
+        plan = Fleet(self.config).plan(self.stores)
+        deleted = plan.execute(workers=2, now=self.now)
+        self.assertEqual(deleted['local'],
+                         sorted('%s/200001%02d.tar' % (name, day)
+                                for name in ('db1', 'db2')
+                                for day in range(1, 8)))
+        self.assertEqual(deleted['s3'],
+                         sorted('hostA/%d' % day for day in range(1, 10)))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.directory,
+                                                        'db2'))),
+                         ['20000108.tar', '20000109.tar'])
+        self.assertEqual(len(os.listdir(os.path.join(self.directory,
+                                                     'logs'))), 9)
+        self.assertEqual(len(self.client.objects), 9)
+
+    def test_dry_run(self):
+        plan = Fleet(self.config).plan(self.stores)
+        deleted = plan.execute(dry_run=True, now=self.now)
+        self.assertEqual(len(deleted['local']), 14)
+        self.assertEqual(len(self.client.objects), 18)
+
+    def test_lists_each_source_once(self):
+        self.config['rules'].append({'source': 's3', 'prefix': 'hostB/',
+                                     'policy': {'days': 2}})
+        plan = Fleet(self.config).plan(self.stores)
+        deleted = plan.execute(now=self.now)
+        self.assertEqual(self.client.list_calls, 1)
+        self.assertEqual(len(deleted['s3']), 17)
+
+    def test_unknown_source(self):
+        self.assertRaises(ValueError, Fleet(self.config).plan)
+
+    def test_load(self):
+        path = os.path.join(self.directory, 'fleet.json')
+        with open(path, 'w') as f:
+            json.dump(self.config, f)
+        self.assertEqual(load(path), self.config)
+
+
+class TestDirectoryStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, 'a', '20000101'))
+        with open(os.path.join(self.directory, 'a', '20000101', '20000102'),
+                  'w'):
+            pass
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_entries(self):
+        store = DirectoryStore(self.directory, format='%Y%m%d')
+        self.assertEqual(list(store.entries()),
+                         [('a/20000101', datetime(2000, 1, 1))])
+        store.delete(['a/20000101', 'a/missing'])
+        self.assertEqual(os.listdir(os.path.join(self.directory, 'a')), [])
+
+    def test_arguments(self):
+        self.assertRaises(ValueError, DirectoryStore, self.directory)
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+import unittest
+
+from grandfatherson import to_keep
+from grandfatherson.forecast import Step, forecast
+
+
+class TestForecast(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime(2000, 1, 1, 0, 0, 0)
+        self.policy = dict(days=3, weeks=2, months=2, hours=6)
+
+    def simulate(self, cadence, end, step, existing=()):
+        """The quadratic way: call to_keep at every step."""
+        backups = set(existing)
+        steps = []
+        backup = now = self.start
+        while now <= end:
+            while backup <= now:
+                backups.add(backup)
+                backup += cadence
+            backups = to_keep(backups, now=now, **self.policy)
+            steps.append((now, len(backups)))
+            now += step
+        return steps
+
+    def test_same_as_to_keep(self):
+        cadence = timedelta(hours=5)
+        end = self.start + timedelta(days=90)
+        steps = forecast(self.policy, cadence, self.start, end, size=10)
+        self.assertEqual([(s.now, s.count) for s in steps],
+                         self.simulate(cadence, end, cadence))
+        self.assertEqual([s.bytes for s in steps],
+                         [s.count * 10 for s in steps])
+
+    def test_step_and_existing(self):
+        cadence = timedelta(minutes=30)
+        step = timedelta(days=1)
+        end = self.start + timedelta(days=60)
+        existing = [self.start - timedelta(days=i) for i in range(1, 100)]
+        steps = forecast(self.policy, cadence, self.start, end, step=step,
+                         existing=existing)
+        self.assertEqual([(s.now, s.count) for s in steps],
+                         self.simulate(cadence, end, step, existing))
+
+    def test_size_function(self):
+        steps = forecast({'days': 2}, timedelta(days=1), self.start,
+                         self.start + timedelta(days=3),
+                         size=lambda dt: dt.day)
+        self.assertEqual(steps[-1], Step(datetime(2000, 1, 4), 2, 3 + 4))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, forecast, {}, timedelta(0),
+                          self.start, self.start)
+        self.assertRaises(ValueError, forecast, {}, timedelta(1),
+                          self.start, self.start, step=timedelta(-1))
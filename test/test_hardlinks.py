@@ -0,0 +1,169 @@
+from datetime import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from grandfatherson.hardlinks import (INDEX, JOURNAL, Plan, execute,
+                                      link_tree, plan, recover, scan)
+
+
+NOW = datetime(2000, 1, 11, 12, 0, 0)
+
+ENTRIES = [('daily.0', datetime(2000, 1, 10, 1, 0, 0)),
+           ('daily.1', datetime(2000, 1, 9, 1, 0, 0)),
+           ('weekly.0', datetime(2000, 1, 2, 1, 0, 0)),
+           ('weekly.1', datetime(1999, 12, 26, 1, 0, 0)),
+           ('incoming', datetime(2000, 1, 11, 1, 0, 0))]
+
+
+class TestPlan(unittest.TestCase):
+    def setUp(self):
+        self.now = NOW
+        self.entries = ENTRIES
+
+    def test_promote(self):
+        self.assertEqual(
+            plan(self.entries, days=2, weeks=2, now=self.now),
+            Plan([('daily.0', 'daily.1'), ('daily.1', 'weekly.0'),
+                  ('incoming', 'daily.0'), ('weekly.0', 'weekly.1')],
+                 ['weekly.1'],
+                 {'daily.0': datetime(2000, 1, 11, 1, 0, 0),
+                  'daily.1': datetime(2000, 1, 10, 1, 0, 0),
+                  'weekly.0': datetime(2000, 1, 9, 1, 0, 0),
+                  'weekly.1': datetime(2000, 1, 2, 1, 0, 0)}))
+
+    def test_unchanged(self):
+        entries = self.entries[:3]
+        result = plan(entries, days=2, weeks=2,
+                      now=datetime(2000, 1, 10, 12, 0, 0))
+        self.assertEqual(result.renames, [])
+        self.assertEqual(result.deletes, [])
+
+    def test_future(self):
+        result = plan([('incoming', datetime(2000, 1, 12))], days=1,
+                      now=self.now)
+        self.assertEqual(result.renames, [('incoming', 'future.0')])
+
+    def test_duplicate_datetimes(self):
+        # daily.5 has the datetime of daily.0, which takes the slot
+        entries = self.entries + [('daily.5', self.entries[0][1])]
+        expected = plan(self.entries, days=2, weeks=2, now=self.now)
+        result = plan(entries, days=2, weeks=2, now=self.now)
+        self.assertEqual(result.renames, expected.renames)
+        self.assertEqual(result.deletes,
+                         sorted(expected.deletes + ['daily.5']))
+        self.assertEqual(result.slots, expected.slots)
+
+    def test_duplicate_names(self):
+        self.assertRaises(ValueError, plan,
+                          [('daily.0', self.now), ('daily.0', self.now)],
+                          days=1, now=self.now)
+
+
+class TestExecute(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.now = NOW
+        self.entries = ENTRIES
+        for name, dt in self.entries:
+            self.write(name)
+        self.plan = plan(self.entries, days=2, weeks=2, now=self.now)
+
+    def write(self, name):
+        os.mkdir(os.path.join(self.root, name))
+        with open(os.path.join(self.root, name, 'origin'), 'w') as f:
+            f.write(name)
+
+    def contents(self):
+        contents = {}
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name, 'origin')
+            if os.path.exists(path):
+                with open(path) as f:
+                    contents[name] = f.read()
+        return contents
+
+    def assertRotated(self):
+        self.assertEqual(self.contents(), {'daily.0': 'incoming',
+                                           'daily.1': 'daily.0',
+                                           'weekly.0': 'daily.1',
+                                           'weekly.1': 'weekly.0'})
+        self.assertEqual(sorted(os.listdir(self.root)),
+                         [INDEX, 'daily.0', 'daily.1', 'weekly.0',
+                          'weekly.1'])
+        self.assertEqual(scan(self.root), sorted(self.plan.slots.items()))
+
+    def test_execute(self):
+        execute(self.root, self.plan)
+        self.assertRotated()
+        with open(os.path.join(self.root, INDEX)) as f:
+            self.assertEqual(json.load(f)['daily.0'], '2000-01-11T01:00:00')
+
+    def test_recover(self):
+        original = self.contents()
+        rename = os.rename
+        for crash in range(20):
+            root = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, root)
+            for name in original:
+                shutil.copytree(os.path.join(self.root, name),
+                                os.path.join(root, name))
+            calls = []
+
+            def failing_rename(source, destination):
+                calls.append(source)
+                if len(calls) > crash:
+                    raise OSError('Interrupted')
+                rename(source, destination)
+
+            with mock.patch('os.rename', failing_rename):
+                try:
+                    execute(root, self.plan)
+                except OSError:
+                    pass
+            interrupted = os.path.exists(os.path.join(root, JOURNAL))
+            self.assertEqual(recover(root), interrupted)
+            self.root, previous = root, self.root
+            try:
+                if self.contents() != original:
+                    self.assertRotated()
+            finally:
+                self.root = previous
+        self.assertFalse(recover(self.root))
+
+    def test_taken(self):
+        # weekly.0 is left out of the plan, but still on disk
+        result = plan(self.entries[:2] + self.entries[4:], days=2,
+                      weeks=2, now=self.now)
+        self.assertRaises(ValueError, execute, self.root, result)
+        self.assertFalse(os.path.exists(os.path.join(self.root, JOURNAL)))
+
+    def test_scan_without_index(self):
+        self.assertEqual([name for name, dt in scan(self.root)],
+                         ['daily.0', 'daily.1', 'weekly.0', 'weekly.1'])
+
+
+class TestLinkTree(unittest.TestCase):
+    def test_link_tree(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        source = os.path.join(root, 'daily.0')
+        os.makedirs(os.path.join(source, 'etc', 'app'))
+        with open(os.path.join(source, 'etc', 'app', 'config'), 'w') as f:
+            f.write('x')
+        os.symlink('etc', os.path.join(source, 'config'))
+
+        destination = os.path.join(root, 'incoming')
+        link_tree(source, destination)
+        original = os.stat(os.path.join(source, 'etc', 'app', 'config'))
+        linked = os.stat(os.path.join(destination, 'etc', 'app', 'config'))
+        self.assertEqual(original.st_ino, linked.st_ino)
+        self.assertEqual(linked.st_nlink, 2)
+        self.assertEqual(os.readlink(os.path.join(destination, 'config')),
+                         'etc')
+        self.assertEqual(os.stat(os.path.join(source, 'etc')).st_mtime,
+                         os.stat(os.path.join(destination, 'etc')).st_mtime)
@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta
+import random
+import unittest
+
+from grandfatherson import explain, to_delete, to_keep
+from grandfatherson.batch import to_delete_many
+from grandfatherson.budget import to_delete_within_budget
+from grandfatherson.catalog import Catalog
+from grandfatherson.fleet import Fleet
+from grandfatherson.hardlinks import plan
+from grandfatherson.holds import Holds
+from grandfatherson.migration import plan_migration
+from grandfatherson.replicas import rotate_replicas
+from grandfatherson.series import to_delete_by_series
+from grandfatherson.service import query
+from grandfatherson.stores import S3Store, rotate
+from grandfatherson.timestamps import Timeline
+from test.test_stores import FakeS3Client
+
+
+class TestHolds(unittest.TestCase):
+    def test_merge(self):
+        holds = Holds([(datetime(2000, 1, 5), datetime(2000, 1, 8)),
+                       (datetime(2000, 1, 1), datetime(2000, 1, 3)),
+                       (datetime(2000, 1, 2), datetime(2000, 1, 4)),
+                       (datetime(2000, 1, 6), datetime(2000, 1, 7))])
+        self.assertEqual(len(holds), 2)
+        self.assertEqual(holds.starts, [datetime(2000, 1, 1),
+                                        datetime(2000, 1, 5)])
+        self.assertEqual(holds.ends, [datetime(2000, 1, 4),
+                                      datetime(2000, 1, 8)])
+
+    def test_contains(self):
+        holds = Holds([(datetime(2000, 1, 1), datetime(2000, 1, 3))],
+                      datetimes=[datetime(2000, 2, 1)])
+        self.assertIn(datetime(2000, 1, 1), holds)
+        self.assertIn(datetime(2000, 1, 3), holds)
+        self.assertIn(datetime(2000, 2, 1), holds)
+        self.assertNotIn(datetime(1999, 12, 31), holds)
+        self.assertNotIn(datetime(2000, 1, 3, 0, 0, 1), holds)
+
+    def test_held(self):
+        rng = random.Random(47)
+        start = datetime(2000, 1, 1)
+        ranges = []
+        for i in range(200):
+            begin = start + timedelta(hours=rng.randint(0, 24 * 365))
+            ranges.append((begin, begin + timedelta(hours=rng.randint(0, 48))))
+        datetimes = [start + timedelta(minutes=rng.randint(0, 525600))
+                     for i in range(2000)]
+        ids = datetimes[:10] + [start - timedelta(days=1)]
+        holds = Holds(ranges, ids)
+        expected = set(dt for dt in datetimes
+                       if dt in ids or any(a <= dt <= b for a, b in ranges))
+        self.assertEqual(holds.held(datetimes), expected)
+        self.assertEqual(holds.held(sorted(set(datetimes)), presorted=True),
+                         expected)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Holds,
+                          [(datetime(2000, 1, 2), datetime(2000, 1, 1))])
+
+
+class TestToKeep(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 31, 12, 0, 0)
+        self.datetimes = [datetime(2000, 1, day, 1, 0, 0)
+                          for day in range(1, 32)]
+        self.holds = Holds([(datetime(2000, 1, 10), datetime(2000, 1, 12))],
+                           datetimes=[datetime(2000, 1, 1, 1, 0, 0)])
+        self.held = set([datetime(2000, 1, 1, 1, 0, 0),
+                         datetime(2000, 1, 10, 1, 0, 0),
+                         datetime(2000, 1, 11, 1, 0, 0)])
+
+    def test_to_keep(self):
+        self.assertEqual(to_keep(self.datetimes, days=2, now=self.now,
+                                 holds=self.holds),
+                         self.held | set(self.datetimes[-2:]))
+
+    def test_to_delete(self):
+        deleted = to_delete(self.datetimes, days=2, now=self.now,
+                            holds=self.holds)
+        self.assertEqual(deleted & self.held, set())
+        self.assertEqual(len(deleted), 26)
+
+    def test_tiers(self):
+        self.assertEqual(to_keep(iter(self.datetimes), days=2, now=self.now,
+                                 tiers=[('quarters', 1)], holds=self.holds),
+                         self.held | set(self.datetimes[-2:]))
+
+    def test_plans(self):
+        for plan in ('filters', 'tiers', 'sorted'):
+            self.assertEqual(to_keep(self.datetimes, days=2, now=self.now,
+                                     holds=self.holds, presorted=True,
+                                     plan=plan),
+                             self.held | set(self.datetimes[-2:]))
+
+
+class TestRotations(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 31, 12, 0, 0)
+        self.datetimes = [datetime(2000, 1, day, 1, 0, 0)
+                          for day in range(1, 32)]
+        self.holds = Holds([(datetime(2000, 1, 10), datetime(2000, 1, 12))],
+                           datetimes=[datetime(2000, 1, 1, 1, 0, 0)],
+                           keys=['2000-01-02'])
+        self.held = set([datetime(2000, 1, 1, 1, 0, 0),
+                         datetime(2000, 1, 10, 1, 0, 0),
+                         datetime(2000, 1, 11, 1, 0, 0)])
+        self.kept = self.held | set(self.datetimes[-2:])
+        # Keys are the dates of the datetimes
+        self.entries = [(dt.date().isoformat(), dt) for dt in self.datetimes]
+        self.deleted = sorted(key for key, dt in self.entries
+                              if dt not in self.kept and key != '2000-01-02')
+
+    def test_explain(self):
+        reasons = explain(self.datetimes, days=2, now=self.now,
+                          holds=self.holds)
+        self.assertEqual(set(dt for dt, why in reasons.items() if why),
+                         self.kept)
+        self.assertEqual(reasons[datetime(2000, 1, 10, 1, 0, 0)],
+                         [('hold', None)])
+
+    def test_budget(self):
+        # Held backups stay, even beyond the budget
+        deleted = to_delete_within_budget(self.datetimes, lambda dt: 1, 0,
+                                          days=2, now=self.now,
+                                          holds=self.holds)
+        self.assertEqual(deleted, set(self.datetimes) - self.held)
+
+    def test_migration(self):
+        migration = plan_migration(self.datetimes, {'days': 2},
+                                   {'weeks': 1}, now=self.now,
+                                   holds=self.holds)
+        self.assertEqual(migration.hot, self.kept)
+        self.assertEqual(migration.delete & self.held, set())
+
+    def test_hardlinks(self):
+        result = plan(self.entries, days=2, now=self.now, holds=self.holds)
+        self.assertEqual(
+            sorted(slot for slot in result.slots if slot.startswith('held')),
+            ['held.0', 'held.1', 'held.2'])
+        self.assertEqual(sorted(result.slots.values()), sorted(self.kept))
+
+    def test_service(self):
+        holds = {'ranges': [['2000-01-10T00:00:00', '2000-01-12T00:00:00']],
+                 'datetimes': ['2000-01-01T01:00:00']}
+        for action, expected in [
+                ('keep', self.kept),
+                ('delete', set(self.datetimes) - self.kept)]:
+            result = query(Timeline(self.datetimes), action, {'days': 2},
+                           self.now.isoformat(), holds)
+            self.assertEqual(set(result['datetimes']),
+                             set(dt.isoformat() for dt in expected))
+        self.assertRaises(ValueError, query, Timeline(self.datetimes),
+                          'keep', holds={'ranges': [['2000-01-10']]})
+
+    def test_fleet(self):
+        client = FakeS3Client(dict(self.entries))
+        fleet = Fleet({'rules': [{'source': 's3', 'prefix': '2000',
+                                  'policy': {'days': 2}}]})
+        deleted = fleet.plan({'s3': S3Store(client, 'bucket')}).execute(
+            dry_run=True, now=self.now, holds=self.holds)
+        self.assertEqual(deleted, {'s3': self.deleted})
+
+    def test_batch(self):
+        deleted = to_delete_many({'db': self.datetimes}, {'db': {'days': 2}},
+                                 now=self.now, mode='threads',
+                                 holds=self.holds)
+        self.assertEqual(deleted, {'db': set(self.datetimes) - self.kept})
+
+    def test_catalog(self):
+        catalog = Catalog()
+        catalog.add('db', self.entries)
+        self.assertEqual(catalog.to_delete('db', days=2, now=self.now,
+                                           holds=self.holds),
+                         set(self.deleted))
+        catalog.close()
+
+    def test_series(self):
+        deleted = to_delete_by_series(self.entries, lambda key: 'db',
+                                      {'db': {'days': 2}}, now=self.now,
+                                      holds=self.holds)
+        self.assertEqual(deleted, {'db': self.deleted})
+
+
+class TestRotate(unittest.TestCase):
+    def test_ids(self):
+        client = FakeS3Client({'db/a': datetime(2000, 1, 1),
+                               'db/b': datetime(2000, 1, 2),
+                               'db/c': datetime(2000, 1, 3)})
+        store = S3Store(client, 'bucket', prefix='db/')
+        deleted = rotate(store, days=1, now=datetime(2000, 1, 3, 12),
+                         holds=Holds(datetimes=[datetime(2000, 1, 2)],
+                                     keys=['db/a']))
+        self.assertEqual(deleted, [])
+
+    def test_replica_ids(self):
+        entries = {'db/a': datetime(2000, 1, 1),
+                   'db/b': datetime(2000, 1, 2),
+                   'db/c': datetime(2000, 1, 3)}
+        stores = dict((name, S3Store(FakeS3Client(entries), 'bucket',
+                                     prefix='db/'))
+                      for name in ('eu', 'us'))
+        deleted = rotate_replicas(stores, days=1,
+                                  now=datetime(2000, 1, 3, 12),
+                                  holds=Holds(datetimes=[datetime(2000, 1, 2)],
+                                              keys=['db/a']))
+        self.assertEqual(deleted, {'eu': [], 'us': []})
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+import random
+import unittest
+
+from grandfatherson import SUNDAY, to_delete, to_keep
+from grandfatherson.filters import UTC
+from grandfatherson.incremental import Rotation
+
+
+class TestRotation(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 3, 1, 12, 0, 0)
+        self.rng = random.Random(0)
+        self.datetimes = [
+            self.now - timedelta(minutes=self.rng.randint(-600, 10 ** 6))
+            for i in range(1000)]
+        self.options = dict(years=2, months=3, weeks=4, days=5, hours=6,
+                            minutes=7, seconds=8, firstweekday=SUNDAY)
+
+    def test_same_as_to_keep(self):
+        rotation = Rotation(self.datetimes, **self.options)
+        self.assertEqual(rotation.to_keep(self.now),
+                         to_keep(self.datetimes, now=self.now,
+                                 **self.options))
+        self.assertEqual(rotation.to_delete(self.now),
+                         to_delete(self.datetimes, now=self.now,
+                                   **self.options))
+
+    def test_add_and_remove(self):
+        rotation = Rotation(**self.options)
+        present = set()
+        for dt in self.datetimes:
+            self.assertEqual(rotation.add(dt), dt not in present)
+            present.add(dt)
+        for dt in self.rng.sample(sorted(present), 500):
+            self.assertTrue(rotation.remove(dt))
+            self.assertFalse(rotation.remove(dt))
+            present.discard(dt)
+        self.assertEqual(len(rotation), len(present))
+        self.assertEqual(rotation.to_keep(self.now),
+                         to_keep(present, now=self.now, **self.options))
+
+    def test_moving_now(self):
+        rotation = Rotation(self.datetimes, **self.options)
+        for hours in range(0, 24 * 40, 13):
+            now = self.now + timedelta(hours=hours)
+            self.assertEqual(rotation.to_keep(now),
+                             to_keep(self.datetimes, now=now,
+                                     **self.options))
+
+    def test_aware(self):
+        utc = UTC()
+        datetimes = [dt.replace(tzinfo=utc) for dt in self.datetimes]
+        now = self.now.replace(tzinfo=utc)
+        rotation = Rotation(datetimes, **self.options)
+        self.assertEqual(rotation.to_keep(now),
+                         to_keep(datetimes, now=now, **self.options))
+
+    def test_invalid_number(self):
+        self.assertRaises(ValueError, Rotation, days=-1)
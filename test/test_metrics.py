@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+import os
+import shutil
+import tempfile
+import unittest
+
+from grandfatherson import to_delete
+from grandfatherson.metrics import Metrics, escape
+from grandfatherson.stores import S3Store, rotate
+from test.test_stores import FakeS3Client
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 1, 12, 0, 0)
+        self.datetimes = [self.now - timedelta(hours=i)
+                          for i in range(-2, 100)]
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_computing(self):
+        metrics = Metrics()
+        with metrics.computing():
+            doomed = to_delete(self.datetimes, days=2, hours=6,
+                               now=self.now)
+        self.assertEqual(metrics.entries, 102)
+        self.assertEqual(metrics.deleted, len(doomed))
+        self.assertEqual(metrics.future, 2)
+        self.assertEqual(metrics.kept['Days'], 2)
+        self.assertEqual(metrics.kept['Hours'], 6)
+        self.assertEqual(metrics.kept['Weeks'], 0)
+        self.assertTrue(metrics.compute_seconds > 0)
+
+    def test_render(self):
+        metrics = Metrics(labels={'series': 'db "main"'})
+        metrics.entries = 3
+        metrics.kept['Days'] = 2
+        text = metrics.render()
+        self.assertTrue(text.endswith('\n'))
+        lines = text.splitlines()
+        self.assertIn('# TYPE grandfatherson_entries gauge', lines)
+        self.assertIn('grandfatherson_entries{series="db \\"main\\""} 3',
+                      lines)
+        self.assertIn('grandfatherson_kept{series="db \\"main\\"",'
+                      'tier="Days"} 2', lines)
+        self.assertEqual(
+            len([l for l in lines if l.startswith('# HELP') and
+                 'grandfatherson_kept ' in l]), 1)
+
+    def test_escape(self):
+        self.assertEqual(escape('a\\b\n"c"'), 'a\\\\b\\n\\"c\\"')
+
+    def test_write(self):
+        path = os.path.join(self.directory, 'rotation.prom')
+        metrics = Metrics()
+        metrics.write(path)
+        metrics.deleted = 5
+        metrics.write(path)
+        with open(path) as f:
+            self.assertIn('grandfatherson_deleted 5\n', f.read())
+        self.assertEqual(os.listdir(self.directory), ['rotation.prom'])
+
+    def test_rotate(self):
+        client = FakeS3Client(('%03d' % i, dt)
+                              for i, dt in enumerate(self.datetimes))
+        metrics = Metrics()
+        deleted = rotate(S3Store(client, 'bucket'), days=1, now=self.now,
+                         metrics=metrics)
+        self.assertEqual(metrics.deleted, len(deleted))
+        self.assertEqual(metrics.entries, 102)
+        self.assertEqual(metrics.kept['Days'], 1)
+        self.assertTrue(metrics.delete_seconds > 0)
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+import unittest
+
+from grandfatherson import to_keep
+from grandfatherson.migration import plan_migration
+
+
+class TestPlanMigration(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 3, 1, 12, 0, 0)
+        self.datetimes = [self.now - timedelta(hours=9 * i)
+                          for i in range(-2, 2000)]
+        self.hot = dict(days=7, weeks=4)
+        self.cold = dict(months=12, years=3)
+
+    def test_partition(self):
+        migration = plan_migration(self.datetimes, self.hot, self.cold,
+                                   now=self.now)
+        hot = to_keep(self.datetimes, now=self.now, **self.hot)
+        cold = to_keep(self.datetimes, now=self.now, **self.cold)
+        self.assertEqual(migration.hot, hot)
+        self.assertEqual(migration.cold, cold - hot)
+        self.assertEqual(migration.delete,
+                         set(self.datetimes) - hot - cold)
+
+    def test_default_now(self):
+        datetimes = [datetime.now() - timedelta(days=i) for i in range(60)]
+        migration = plan_migration(datetimes, {'days': 1}, {'months': 1})
+        self.assertEqual(len(migration.hot), 1)
+        self.assertEqual(len(migration.hot | migration.cold |
+                             migration.delete), 60)
+
+    def test_no_input(self):
+        self.assertEqual(plan_migration([], self.hot, self.cold),
+                         (set(), set(), set()))
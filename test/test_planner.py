@@ -0,0 +1,160 @@
+from datetime import date, datetime, timedelta
+import random
+import unittest
+
+from grandfatherson import dates_to_keep, to_delete, to_keep
+from grandfatherson.filters import observe, utc
+from grandfatherson.metrics import Metrics
+from grandfatherson.planner import TIERS_THRESHOLD, choose
+from grandfatherson.timestamps import Timeline
+
+
+class TestChoose(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 1)
+        self.small = [self.now - timedelta(hours=i) for i in range(10)]
+        self.large = [self.now - timedelta(minutes=i)
+                      for i in range(TIERS_THRESHOLD)]
+
+    def test_choose(self):
+        self.assertEqual(choose([]), 'filters')
+        self.assertEqual(choose(self.small), 'filters')
+        self.assertEqual(choose(self.large), 'tiers')
+        self.assertEqual(choose(self.small, tiers=[('quarters', 1)]),
+                         'tiers')
+        self.assertEqual(choose(sorted(self.small), presorted=True),
+                         'sorted')
+        self.assertEqual(choose(Timeline(self.small)), 'sorted')
+        self.assertEqual(choose([dt.date() for dt in self.small]), 'dates')
+        self.assertEqual(choose([dt.date() for dt in self.small],
+                                tiers=[('quarters', 1)]), 'dates')
+
+    def test_windows(self):
+        # Sorted inputs only take the sorted plan when the tiers'
+        # windows hold a small share of them
+        now = datetime(2000, 1, 1, 8, 20)
+        history = [now - timedelta(minutes=i)
+                   for i in range(TIERS_THRESHOLD, 0, -1)]
+        for numbers, plan in [({'hours': 1}, 'sorted'),
+                              ({'minutes': 100}, 'sorted'),
+                              ({'minutes': 300}, 'tiers'),
+                              ({'days': 1}, 'tiers'),
+                              ({'years': 1, 'hours': 1}, 'tiers')]:
+            self.assertEqual(choose(history, presorted=True,
+                                    numbers=numbers, now=now), plan)
+            self.assertEqual(choose(Timeline(history), numbers=numbers,
+                                    now=now), plan)
+        self.assertEqual(choose(history[-10:], presorted=True,
+                                numbers={'days': 1}, now=now),
+                         'filters')
+
+    def test_aware(self):
+        self.assertEqual(choose([dt.replace(tzinfo=utc)
+                                 for dt in self.large]),
+                         'tiers')
+
+
+class TestPlans(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 1, 12, 0, 0)
+        rng = random.Random(50)
+        self.datetimes = [self.now - timedelta(seconds=rng.randint(-600,
+                                                                   10 ** 8))
+                          for i in range(3000)]
+        self.policy = dict(years=2, months=12, weeks=4, days=7, hours=24,
+                           minutes=60, seconds=60, now=self.now)
+
+    def test_same_result(self):
+        expected = to_keep(self.datetimes, plan='filters', **self.policy)
+        self.assertEqual(to_keep(self.datetimes, plan='tiers', **self.policy),
+                         expected)
+        self.assertEqual(to_keep(sorted(self.datetimes), presorted=True,
+                                 **self.policy),
+                         expected)
+        self.assertEqual(to_keep(self.datetimes, **self.policy), expected)
+        self.assertEqual(to_keep(iter(self.datetimes), **self.policy),
+                         expected)
+
+    def test_timeline(self):
+        timeline = Timeline(self.datetimes)
+        self.assertEqual(to_keep(timeline, **self.policy),
+                         to_keep(self.datetimes, **self.policy))
+        self.assertEqual(to_delete(timeline, **self.policy),
+                         to_delete(self.datetimes, **self.policy))
+
+    def test_aware_timeline(self):
+        timeline = Timeline(self.datetimes, tzinfo=utc)
+        policy = dict(self.policy, now=self.now.replace(tzinfo=utc))
+        self.assertEqual(to_keep(timeline, **policy),
+                         to_keep(list(timeline), plan='filters', **policy))
+
+    def test_dates(self):
+        dates = set(dt.date() for dt in self.datetimes)
+        self.assertEqual(to_keep(dates, days=7, weeks=4, months=12,
+                                 now=self.now.date()),
+                         dates_to_keep(dates, days=7, weeks=4, months=12,
+                                       now=self.now.date()))
+        self.assertEqual(to_delete([date(1999, 12, 1), date(1999, 12, 2)],
+                                   days=1, now=date(1999, 12, 2)),
+                         set([date(1999, 12, 1)]))
+
+    def test_shuffled(self):
+        # The sorted plan sorts inputs that are not known to be sorted
+        now = datetime(2000, 1, 1)
+        datetimes = [now - timedelta(hours=i) for i in range(100)]
+        random.Random(50).shuffle(datetimes)
+        for collection in (datetimes, set(datetimes)):
+            doomed = to_delete(collection, days=3, hours=5, now=now,
+                               plan='sorted')
+            self.assertEqual(len(doomed), 93)
+            self.assertEqual(doomed, to_delete(collection, days=3, hours=5,
+                                               now=now, plan='filters'))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, to_keep, [], plan='magic')
+        self.assertRaises(ValueError, to_keep, [], plan='filters',
+                          tiers=[('quarters', 1)])
+        self.assertRaises(ValueError, to_keep, [], days=-1, plan='sorted',
+                          presorted=True)
+
+    def test_wrong_type(self):
+        self.assertRaises(ValueError, to_keep, self.datetimes, days=1,
+                          now=self.now, plan='dates')
+        dates = [dt.date() for dt in self.datetimes]
+        for plan in ('filters', 'tiers', 'sorted'):
+            self.assertRaises(ValueError, to_keep, dates, days=1,
+                              now=self.now.date(), plan=plan)
+
+
+class TestObserve(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 1, 12, 0, 0)
+        self.datetimes = [self.now - timedelta(minutes=i)
+                          for i in range(-2, 2 * TIERS_THRESHOLD)]
+
+    def test_plan(self):
+        for datetimes, presorted, plan in [
+                (self.datetimes[:10], False, 'filters'),
+                (self.datetimes, False, 'tiers'),
+                (sorted(self.datetimes), True, 'tiers'),
+                (sorted(self.datetimes), True, 'sorted'),
+                ([dt.date() for dt in self.datetimes], False, 'dates')]:
+            # Only a few of the datetimes are in the last minute
+            options = dict(minutes=1) if plan == 'sorted' else dict(days=1)
+            events = []
+            with observe(events.append):
+                to_keep(datetimes, presorted=presorted, now=self.now,
+                        **options)
+            self.assertEqual(events[-1]['event'], 'to_keep')
+            self.assertEqual(events[-1]['plan'], plan)
+
+    def test_metrics(self):
+        for plan in ('filters', 'tiers'):
+            metrics = Metrics()
+            with metrics.computing():
+                doomed = to_delete(self.datetimes, hours=6, minutes=30,
+                                   now=self.now, plan=plan)
+            self.assertEqual(metrics.deleted, len(doomed))
+            self.assertEqual(metrics.future, 2)
+            self.assertEqual(metrics.kept['Hours'], 6)
+            self.assertEqual(metrics.kept['Minutes'], 30)
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+import random
+import unittest
+
+from grandfatherson import to_keep
+from grandfatherson.replicas import (merged, rotate_replicas,
+                                     to_delete_by_replica)
+from grandfatherson.stores import S3Store
+from test.test_stores import FakeS3Client
+
+
+class TestMerged(unittest.TestCase):
+    def test_merged(self):
+        self.assertEqual(merged([[1, 3, 5], [2, 3], [], [5, 6]]),
+                         [1, 2, 3, 5, 6])
+
+
+class TestToDeleteByReplica(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 3, 1)
+        rng = random.Random(48)
+        backups = [datetime(2000, 1, 1) + timedelta(hours=6 * i)
+                   for i in range(240)]
+        # Each replica misses a few backups, and is behind by some
+        self.listings = {}
+        for name, lag in (('eu', 0), ('us', 3), ('ap', 9)):
+            self.listings[name] = [dt for dt in backups[:len(backups) - lag]
+                                   if rng.random() > 0.1]
+        self.policy = dict(days=7, weeks=4, months=2, now=self.now)
+
+    def test_consistent(self):
+        deleted = to_delete_by_replica(self.listings, **self.policy)
+        kept = to_keep(set().union(*self.listings.values()), **self.policy)
+        for name, listing in self.listings.items():
+            self.assertEqual(deleted[name],
+                             sorted(set(listing) - kept))
+        # What replicas keep never conflicts: no replica deletes a
+        # backup that another one keeps
+        survivors = set()
+        for name, listing in self.listings.items():
+            survivors |= set(listing) - set(deleted[name])
+        for name in self.listings:
+            self.assertEqual(set(deleted[name]) & survivors, set())
+
+    def test_independent_rotation_differs(self):
+        independent = set()
+        for name, listing in self.listings.items():
+            independent |= to_keep(listing, **self.policy)
+        unified = to_keep(set().union(*self.listings.values()),
+                          **self.policy)
+        self.assertTrue(independent > unified)
+
+    def test_presorted(self):
+        shuffled = dict((name, list(reversed(listing)))
+                        for name, listing in self.listings.items())
+        self.assertEqual(to_delete_by_replica(shuffled, **self.policy),
+                         to_delete_by_replica(self.listings, presorted=True,
+                                              **self.policy))
+
+
+class TestRotateReplicas(unittest.TestCase):
+    def test_rotate(self):
+        def parse(key):
+            return datetime.strptime(key, 'db/%Y%m%d')
+        eu = FakeS3Client({'db/20000103': None, 'db/20000104': None})
+        us = FakeS3Client({'db/20000104': None})
+        stores = {'eu': S3Store(eu, 'eu', parse=parse),
+                  'us': S3Store(us, 'us', parse=parse)}
+        deleted = rotate_replicas(stores, weeks=1, now=datetime(2000, 1, 5))
+        self.assertEqual(deleted, {'eu': ['db/20000104'],
+                                   'us': ['db/20000104']})
+        self.assertEqual(sorted(eu.objects), ['db/20000103'])
+        self.assertEqual(sorted(us.objects), [])
+
+    def test_dry_run(self):
+        client = FakeS3Client({'db/1': datetime(2000, 1, 1),
+                               'db/2': datetime(2000, 1, 2)})
+        deleted = rotate_replicas({'eu': S3Store(client, 'eu')}, days=1,
+                                  dry_run=True, now=datetime(2000, 1, 2, 12))
+        self.assertEqual(deleted, {'eu': ['db/1']})
+        self.assertEqual(len(client.objects), 2)
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+import io
+import unittest
+
+from grandfatherson import explain, to_keep
+from grandfatherson.filters import UTC
+from grandfatherson.restore import RestoreIndex
+
+
+class TestRestoreIndex(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 3, 1, 12, 0, 0)
+        self.datetimes = [self.now - timedelta(hours=5 * i)
+                          for i in range(-1, 1000)]
+        self.options = dict(months=3, weeks=4, days=5, now=self.now)
+        self.index = RestoreIndex.from_explain(
+            explain(self.datetimes, **self.options))
+        self.kept = sorted(to_keep(self.datetimes, **self.options))
+
+    def test_contents(self):
+        self.assertEqual(list(self.index), self.kept)
+        self.assertEqual(len(self.index), len(self.kept))
+
+    def test_before(self):
+        for dt in self.kept:
+            self.assertEqual(self.index.before(dt), dt)
+            self.assertEqual(
+                self.index.before(dt + timedelta(microseconds=1)), dt)
+        self.assertEqual(self.index.before(self.kept[0] -
+                                           timedelta(seconds=1)), None)
+
+    def test_after(self):
+        self.assertEqual(self.index.after(self.kept[0] - timedelta(days=9)),
+                         self.kept[0])
+        self.assertEqual(self.index.after(self.kept[-1] +
+                                          timedelta(seconds=1)), None)
+
+    def test_between(self):
+        self.assertEqual(self.index.between(self.kept[1], self.kept[3]),
+                         self.kept[1:4])
+
+    def test_tier(self):
+        weeks = self.index.tier('Weeks')
+        self.assertEqual(len(weeks), 4)
+        self.assertEqual(weeks.before(self.now).weekday(), 5)
+        self.assertEqual(len(self.index.tier('Years')), 0)
+        self.assertEqual(list(self.index.tier('future')), [self.kept[-1]])
+
+    def test_serialization(self):
+        f = io.BytesIO()
+        self.index.dump(f)
+        f.seek(0)
+        index = RestoreIndex.load(f)
+        self.assertEqual(list(index), self.kept)
+        self.assertEqual(list(index.tier('Days')),
+                         list(self.index.tier('Days')))
+        self.assertRaises(ValueError, RestoreIndex.loads, b'garbage')
+
+    def test_aware(self):
+        utc = UTC()
+        index = RestoreIndex([dt.replace(tzinfo=utc) for dt in self.kept])
+        index = RestoreIndex.loads(index.dumps())
+        self.assertEqual(index.before(self.now.replace(tzinfo=utc)),
+                         self.kept[-2].replace(tzinfo=utc))
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+import random
+import unittest
+from unittest import mock
+
+from grandfatherson import MONDAY, to_delete
+from grandfatherson.filters import UTC
+from grandfatherson.series import to_delete_by_series
+
+
+def series(key):
+    return key.split('-')[0] if '-' in key else None
+
+
+class TestToDeleteBySeries(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 3, 1, 12, 0, 0)
+        rng = random.Random(0)
+        self.entries = []
+        for i in range(3000):
+            host = rng.choice(['hostA/db1', 'hostB/db2', 'hostC/db3'])
+            dt = self.now - timedelta(minutes=rng.randint(-600, 10 ** 5))
+            self.entries.append(('%s-%05d' % (host, i), dt))
+        self.policies = {
+            'hostA/db1': dict(days=7, weeks=4),
+            'hostB/db2': dict(hours=12, months=2, firstweekday=MONDAY),
+            'hostC/db3': dict(minutes=30, years=1),
+        }
+
+    def expected(self, entries, name, now):
+        keys = {}
+        for key, dt in entries:
+            if series(key) == name:
+                keys.setdefault(dt, []).append(key)
+        return sorted(key
+                      for dt in to_delete(keys, now=now,
+                                          **self.policies[name])
+                      for key in keys[dt])
+
+    def test_same_as_to_delete(self):
+        deleted = to_delete_by_series(self.entries, series, self.policies,
+                                      now=self.now)
+        self.assertEqual(sorted(deleted), sorted(self.policies))
+        for name in self.policies:
+            self.assertEqual(deleted[name],
+                             self.expected(self.entries, name, self.now))
+
+    def test_aware(self):
+        utc = UTC()
+        entries = [(key, dt.replace(tzinfo=utc)) for key, dt in self.entries]
+        now = self.now.replace(tzinfo=utc)
+        deleted = to_delete_by_series(entries, series, self.policies,
+                                      now=now)
+        for name in self.policies:
+            self.assertEqual(deleted[name],
+                             self.expected(entries, name, now))
+
+    def test_unmatched(self):
+        entries = self.entries + [('README', self.now)]
+        policies = self.policies.copy()
+        del policies['hostC/db3']
+        deleted = to_delete_by_series(entries, series, policies.get,
+                                      now=self.now)
+        self.assertEqual(sorted(deleted), ['hostA/db1', 'hostB/db2'])
+
+    def test_duplicate_datetimes(self):
+        entries = [('a-1', self.now), ('a-2', self.now),
+                   ('a-3', self.now - timedelta(days=2))]
+        self.assertEqual(to_delete_by_series(entries, series,
+                                             {'a': dict(days=1)},
+                                             now=self.now),
+                         {'a': ['a-3']})
+
+    def test_default_now(self):
+        # The clock is read once, for naive and aware series alike
+        now = self.now.replace(tzinfo=UTC())
+        calls = []
+
+        class Clock(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                calls.append(tz)
+                return now.astimezone(tz)
+
+        entries = self.entries + [('aware-1', now - timedelta(days=2)),
+                                  ('aware-2', now)]
+        policies = dict(self.policies, aware=dict(days=1))
+        with mock.patch('grandfatherson.series.datetime', Clock):
+            deleted = to_delete_by_series(entries, series, policies)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(deleted['aware'], ['aware-1'])
+        local = now.astimezone().replace(tzinfo=None)
+        for name in self.policies:
+            self.assertEqual(deleted[name],
+                             self.expected(self.entries, name, local))
+
+    def test_invalid_policy(self):
+        self.assertRaises(ValueError, to_delete_by_series, self.entries,
+                          series, {'hostA/db1': dict(days=-1)})
+        self.assertRaises(ValueError, to_delete_by_series, self.entries,
+                          series, {'hostA/db1': dict(decades=1)})
+        self.assertRaises(ValueError, to_delete_by_series, self.entries,
+                          series, {'hostA/db1': dict(days=1, now=self.now)})
@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+import json
+import threading
+import unittest
+
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from grandfatherson import to_delete, to_keep
+from grandfatherson.filters import UTC
+from grandfatherson.service import SeriesCache, Server, query
+from grandfatherson.timestamps import Timeline
+
+
+class TestTimeline(unittest.TestCase):
+    def test_sorted_unique(self):
+        datetimes = [datetime(2000, 1, 2), datetime(2000, 1, 1),
+                     datetime(2000, 1, 2, 0, 0, 0, 1), datetime(2000, 1, 1)]
+        timeline = Timeline(datetimes)
+        self.assertEqual(list(timeline), sorted(set(datetimes)))
+        self.assertEqual(timeline[1], datetime(2000, 1, 2))
+        self.assertEqual(timeline[1:], [datetime(2000, 1, 2),
+                                        datetime(2000, 1, 2, 0, 0, 0, 1)])
+
+    def test_update(self):
+        timeline = Timeline([datetime(2000, 1, 2)])
+        timeline.update([datetime(2000, 1, 3), datetime(2000, 1, 4)])
+        timeline.update([datetime(2000, 1, 1), datetime(2000, 1, 3)])
+        self.assertEqual(list(timeline), [datetime(2000, 1, d)
+                                          for d in range(1, 5)])
+
+    def test_aware(self):
+        utc = UTC()
+        timeline = Timeline([datetime(2000, 1, 1, tzinfo=utc)], tzinfo=utc)
+        self.assertEqual(timeline[0], datetime(2000, 1, 1, tzinfo=utc))
+
+
+class TestSeriesCache(unittest.TestCase):
+    def test_eviction(self):
+        cache = SeriesCache(capacity=2)
+        cache.append('a', [datetime(2000, 1, 1)])
+        cache.append('b', [datetime(2000, 1, 1)])
+        cache.get('a')
+        cache.append('c', [datetime(2000, 1, 1)])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('b'), None)
+        self.assertNotEqual(cache.get('a'), None)
+
+    def test_loader(self):
+        loads = []
+
+        def loader(name):
+            loads.append(name)
+            if name == 'known':
+                return [datetime(2000, 1, 1)]
+
+        cache = SeriesCache(capacity=1, loader=loader)
+        self.assertEqual(list(cache.get('known')), [datetime(2000, 1, 1)])
+        self.assertEqual(cache.get('unknown'), None)
+        cache.get('known')
+        self.assertEqual(loads, ['known', 'unknown'])
+
+    def test_concurrent_appends(self):
+        # Both appends load the series at once, then take turns
+        barrier = threading.Barrier(2, timeout=5)
+
+        def loader(name):
+            barrier.wait()
+            return [datetime(2000, 1, 1)]
+
+        cache = SeriesCache(loader=loader)
+        threads = [threading.Thread(target=cache.append,
+                                    args=('db', [datetime(2000, 1, day)]))
+                   for day in (2, 3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(list(cache.get('db')),
+                         [datetime(2000, 1, day) for day in (1, 2, 3)])
+
+
+class TestQuery(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 3, 1, 12, 0, 0)
+        self.datetimes = [self.now - timedelta(hours=7 * i)
+                          for i in range(-2, 300)]
+        self.policy = dict(weeks=3, days=4, hours=5)
+
+    def test_keep_and_delete(self):
+        timeline = Timeline(self.datetimes)
+        now = self.now.isoformat()
+        self.assertEqual(
+            set(query(timeline, 'keep', self.policy, now)['datetimes']),
+            set(dt.isoformat() for dt in
+                to_keep(self.datetimes, now=self.now, **self.policy)))
+        self.assertEqual(
+            set(query(timeline, 'delete', self.policy, now)['datetimes']),
+            set(dt.isoformat() for dt in
+                to_delete(self.datetimes, now=self.now, **self.policy)))
+
+    def test_unknown_action(self):
+        self.assertRaises(ValueError, query, Timeline(), 'frobnicate')
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.server = Server()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://%s:%d' % self.server.server_address
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def request(self, path, body=None, method='POST'):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = Request(self.url + path, data=data, method=method)
+        try:
+            response = urlopen(request)
+        except HTTPError as e:
+            return e.code, json.loads(e.read().decode('utf-8'))
+        return response.status, json.loads(response.read().decode('utf-8'))
+
+    def test_round_trip(self):
+        self.assertEqual(
+            self.request('/series/db/append',
+                         {'datetimes': ['2000-01-01T00:00:00',
+                                        '2000-01-01T12:00:00',
+                                        '2000-01-02T00:00:00']}),
+            (200, {'size': 3}))
+        self.assertEqual(
+            self.request('/series/db/keep', {'policy': {'days': 2},
+                                             'now': '2000-01-02T12:00:00'}),
+            (200, {'datetimes': ['2000-01-01T00:00:00',
+                                 '2000-01-02T00:00:00']}))
+        self.assertEqual(
+            self.request('/series/db/explain',
+                         {'policy': {'days': 1},
+                          'now': '2000-01-01T18:00:00'}),
+            (200, {'reasons': {
+                '2000-01-01T00:00:00': [['Days', '2000-01-01T00:00:00']],
+                '2000-01-01T12:00:00': [],
+                '2000-01-02T00:00:00': [['future', None]]}}))
+        self.assertEqual(self.request('/series/db', method='DELETE'),
+                         (200, {}))
+        self.assertEqual(self.request('/series/db/keep', {})[0], 404)
+
+    def test_quoted_name(self):
+        self.request('/series/host%2Fdb/append',
+                     {'datetimes': ['2000-01-01T00:00:00']})
+        self.assertEqual(len(self.server.cache.get('host/db')), 1)
+        self.assertEqual(self.request('/series/host%2Fdb', method='DELETE'),
+                         (200, {}))
+        self.assertEqual(self.server.cache.get('host/db'), None)
+
+    def test_mixed_tzinfo(self):
+        self.request('/series/db/append',
+                     {'datetimes': ['2000-01-01T00:00:00']})
+        self.assertEqual(
+            self.request('/series/db/append',
+                         {'datetimes': ['2000-01-02T00:00:00+00:00']})[0],
+            400)
+        self.assertEqual(
+            self.request('/series/web/append',
+                         {'datetimes': ['2000-01-01T00:00:00+00:00',
+                                        '2000-01-02T00:00:00']})[0],
+            400)
+        self.assertEqual(len(self.server.cache.get('db')), 1)
+        self.assertEqual(self.server.cache.get('web'), None)
+
+    def test_errors(self):
+        self.assertEqual(self.request('/nowhere', {})[0], 404)
+        self.assertEqual(self.request('/series/db/append', {})[0], 400)
+        self.request('/series/db/append', {'datetimes': ['2000-01-01']})
+        self.assertEqual(
+            self.request('/series/db/keep', {'policy': {'days': -1}})[0],
+            400)
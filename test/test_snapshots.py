@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone
+import os
+import time
+import unittest
+
+from grandfatherson.filters import UTC
+from grandfatherson.snapshots import (btrfs_commands, lvm_commands,
+                                      parse_btrfs, parse_lvm, parse_zfs,
+                                      to_delete_by_dataset, zfs_commands)
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return f.readlines()
+
+
+class TestZFS(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2020, 1, 14, 12, 0, 0, tzinfo=UTC())
+        self.snapshots = list(parse_zfs(fixture('zfs-list.txt')))
+
+    def test_parse(self):
+        self.assertEqual(len(self.snapshots), 28)
+        self.assertEqual(self.snapshots[0],
+                         ('tank/data', 'auto-20200101',
+                          datetime(2020, 1, 1, 3, 0, 0, tzinfo=UTC())))
+
+    def test_parse_tzinfo(self):
+        tzinfo = timezone(timedelta(hours=-5))
+        dataset, name, dt = next(parse_zfs(fixture('zfs-list.txt'), tzinfo))
+        self.assertEqual(dt, datetime(2020, 1, 1, 3, 0, 0, tzinfo=UTC()))
+        self.assertEqual(dt.utcoffset(), timedelta(hours=-5))
+
+    def test_default_now(self):
+        # The current time is taken in UTC, as the snapshots are
+        created = int(time.time())
+        lines = ['tank/data@new\t%d\n' % created,
+                 'tank/data@old\t%d\n' % (created - 3 * 86400)]
+        self.assertEqual(to_delete_by_dataset(parse_zfs(lines), days=2),
+                         {'tank/data': ['old']})
+
+    def test_to_delete(self):
+        deleted = to_delete_by_dataset(self.snapshots, days=3, weeks=2,
+                                       now=self.now)
+        expected = ['auto-202001%02d' % day
+                    for day in range(1, 12) if day not in (4, 11)]
+        self.assertEqual(deleted, {'tank/data': expected,
+                                   'tank/home': expected})
+
+    def test_commands(self):
+        snapshots = ['auto-202001%02d' % day for day in (1, 2, 3, 5, 6)]
+        self.assertEqual(zfs_commands('tank/data', snapshots),
+                         [['zfs', 'destroy', 'tank/data@' +
+                           ','.join(snapshots)]])
+
+    def test_ranges(self):
+        ordered = [name for dataset, name, dt in self.snapshots
+                   if dataset == 'tank/data']
+        snapshots = ['auto-202001%02d' % day for day in (1, 2, 3, 5, 7, 8)]
+        self.assertEqual(zfs_commands('tank/data', snapshots, ordered),
+                         [['zfs', 'destroy',
+                           'tank/data@auto-20200101%auto-20200103,'
+                           'auto-20200105,auto-20200107%auto-20200108']])
+
+    def test_incomplete_ordered(self):
+        # A snapshot missing from ordered would never be destroyed
+        self.assertRaises(ValueError, zfs_commands, 'tank/d',
+                          ['a', 'b', 'x'], ['a', 'b', 'c'])
+        # Only runs of doomed snapshots become ranges, so b, which is
+        # kept, is never between the ends of one
+        self.assertEqual(zfs_commands('tank/d', ['a', 'c'], ['a', 'b', 'c']),
+                         [['zfs', 'destroy', 'tank/d@a,c']])
+
+    def test_max_length(self):
+        snapshots = ['auto-202001%02d' % day for day in range(1, 15)]
+        commands = zfs_commands('tank/data', snapshots, max_length=60)
+        self.assertTrue(len(commands) > 1)
+        self.assertTrue(all(len(' '.join(c)) <= 60 for c in commands))
+        self.assertEqual(
+            sum((c[2].split('@')[1].split(',') for c in commands), []),
+            snapshots)
+
+
+class TestBtrfs(unittest.TestCase):
+    def test_parse(self):
+        snapshots = list(parse_btrfs(fixture('btrfs-list.txt')))
+        self.assertEqual(len(snapshots), 7)
+        self.assertEqual(snapshots[-1],
+                         ('snapshots', 'snapshots/home-2020-01-07',
+                          datetime(2020, 1, 7, 3, 0, 0)))
+
+    def test_commands(self):
+        snapshots = parse_btrfs(fixture('btrfs-list.txt'))
+        deleted = to_delete_by_dataset(snapshots, days=2,
+                                       now=datetime(2020, 1, 7))
+        self.assertEqual(
+            btrfs_commands(deleted['snapshots'], mountpoint='/mnt/'),
+            [['btrfs', 'subvolume', 'delete'] +
+             ['/mnt/snapshots/home-2020-01-%02d' % day
+              for day in range(1, 6)]])
+
+
+class TestLVM(unittest.TestCase):
+    def test_parse(self):
+        snapshots = list(parse_lvm(fixture('lvs.txt')))
+        self.assertEqual(len(snapshots), 5)
+        self.assertEqual(snapshots[0],
+                         ('vg0/home', 'vg0/home-snap1',
+                          datetime(2020, 1, 1, 3, 0, 0,
+                                   tzinfo=timezone.utc)))
+
+    def test_commands(self):
+        snapshots = parse_lvm(fixture('lvs.txt'))
+        deleted = to_delete_by_dataset(
+            snapshots, days=1,
+            now=datetime(2020, 1, 5, 12, tzinfo=timezone(timedelta(0))))
+        self.assertEqual(lvm_commands(deleted['vg0/home']),
+                         [['lvremove', '-y'] +
+                          ['vg0/home-snap%d' % i for i in range(1, 5)]])
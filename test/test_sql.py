@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+import random
+import sqlite3
+import unittest
+
+from grandfatherson import MONDAY, SUNDAY, to_delete
+from grandfatherson.sql import to_delete_query
+
+
+class TestToDeleteQuery(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 3, 1, 12, 0, 0, 500)
+        rng = random.Random(0)
+        self.rows = []
+        for i in range(3000):
+            dt = self.now - timedelta(seconds=rng.randint(-3600, 10 ** 7),
+                                      microseconds=rng.randint(0, 10 ** 6))
+            self.rows.append((i, rng.choice(['a', 'b']), dt))
+        # Rows sharing a timestamp
+        self.rows.append((3000, 'a', self.rows[0][2]))
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.execute('CREATE TABLE backups '
+                                '(id INTEGER, series TEXT, created TEXT)')
+        self.connection.executemany('INSERT INTO backups VALUES (?, ?, ?)',
+                                    ((i, series, str(dt))
+                                     for i, series, dt in self.rows))
+
+    def tearDown(self):
+        self.connection.close()
+
+    def assertSameAsToDelete(self, **options):
+        sql, parameters = to_delete_query('backups', timestamp='created',
+                                          where={'series': 'a'},
+                                          now=self.now, **options)
+        ids = set(i for i, in self.connection.execute(sql, parameters))
+
+        ids_by_datetime = {}
+        for i, series, dt in self.rows:
+            if series == 'a':
+                ids_by_datetime.setdefault(dt, set()).add(i)
+        expected = set()
+        for dt in to_delete(ids_by_datetime, now=self.now, **options):
+            expected.update(ids_by_datetime[dt])
+        self.assertEqual(ids, expected)
+
+    def test_each_tier(self):
+        for name in ('years', 'months', 'weeks', 'days', 'hours',
+                     'minutes', 'seconds'):
+            self.assertSameAsToDelete(**{name: 5})
+
+    def test_all_tiers(self):
+        self.assertSameAsToDelete(years=2, months=3, weeks=4, days=5,
+                                  hours=6, minutes=7, seconds=8)
+
+    def test_firstweekday(self):
+        for firstweekday in (MONDAY, SUNDAY):
+            self.assertSameAsToDelete(weeks=10, firstweekday=firstweekday)
+
+    def test_no_tiers(self):
+        self.assertSameAsToDelete()
+
+    def test_postgresql(self):
+        sql, parameters = to_delete_query('backups', weeks=2, days=1,
+                                          now=self.now,
+                                          dialect='postgresql')
+        self.assertIn("PARTITION BY date_trunc('day', timestamp)", sql)
+        self.assertIn('%(now)s', sql)
+        self.assertNotIn('% 7', sql)
+        self.assertEqual(parameters['now'], self.now)
+        self.assertEqual(parameters['weeks_start'], datetime(2000, 2, 19))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, to_delete_query, 'backups; DROP')
+        self.assertRaises(ValueError, to_delete_query, 'backups',
+                          where={'1=1 OR series': 'a'})
+        self.assertRaises(ValueError, to_delete_query, 'backups', days=-1)
+        self.assertRaises(ValueError, to_delete_query, 'backups',
+                          dialect='oracle')
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+import unittest
+
+from grandfatherson.stores import S3Store, StoreError, rotate
+
+
+class FakeS3Client(object):
+    """An in-process stand-in for the parts of a boto3 S3 client we use."""
+
+    def __init__(self, objects, fail=()):
+        self.objects = dict(objects)
+        self.fail = set(fail)
+        self.list_calls = 0
+        self.delete_calls = []
+
+    def list_objects_v2(self, Bucket, Prefix='', MaxKeys=1000,
+                        ContinuationToken=None):
+        self.list_calls += 1
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))
+        if ContinuationToken is not None:
+            keys = [k for k in keys if k > ContinuationToken]
+        page = keys[:MaxKeys]
+        response = {
+            'Contents': [{'Key': k, 'LastModified': self.objects[k]}
+                         for k in page],
+            'IsTruncated': len(keys) > MaxKeys,
+        }
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = page[-1]
+        return response
+
+    def delete_objects(self, Bucket, Delete):
+        keys = [obj['Key'] for obj in Delete['Objects']]
+        self.delete_calls.append(keys)
+        errors = []
+        for key in keys:
+            if key in self.fail:
+                errors.append({'Key': key, 'Code': 'AccessDenied'})
+            else:
+                self.objects.pop(key, None)
+        return {'Errors': errors} if errors else {}
+
+
+class TestS3Store(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 1, 12, 0, 0)
+        start = self.now - timedelta(seconds=2499)
+        self.objects = dict(
+            ('db/%04d' % i, start + timedelta(seconds=i))
+            for i in range(2500)
+        )
+        self.objects['other/0000'] = start
+
+    def test_paginated_entries(self):
+        client = FakeS3Client(self.objects)
+        store = S3Store(client, 'bucket', prefix='db/', page_size=1000)
+        entries = list(store.entries())
+        self.assertEqual(len(entries), 2500)
+        self.assertEqual(client.list_calls, 3)
+        self.assertEqual(entries[0], ('db/0000', self.objects['db/0000']))
+
+    def test_parse(self):
+        client = FakeS3Client({'db/2000-01-01': self.now,
+                               'db/README': self.now})
+        store = S3Store(client, 'bucket', prefix='db/',
+                        parse=lambda key: (
+                            datetime.strptime(key, 'db/%Y-%m-%d')
+                            if key[3:].startswith('2') else None))
+        self.assertEqual(list(store.entries()),
+                         [('db/2000-01-01', datetime(2000, 1, 1))])
+
+    def test_rotate_batches_deletes(self):
+        client = FakeS3Client(self.objects)
+        store = S3Store(client, 'bucket', prefix='db/')
+        deleted = rotate(store, minutes=2, now=self.now)
+        self.assertEqual(len(deleted), 2498)
+        self.assertEqual([len(keys) for keys in client.delete_calls],
+                         [1000, 1000, 498])
+        self.assertEqual(sorted(client.objects),
+                         ['db/2439', 'db/2499', 'other/0000'])
+
+    def test_rotate_dry_run(self):
+        client = FakeS3Client(self.objects)
+        store = S3Store(client, 'bucket', prefix='db/')
+        deleted = rotate(store, minutes=2, now=self.now, dry_run=True)
+        self.assertEqual(len(deleted), 2498)
+        self.assertEqual(client.delete_calls, [])
+
+    def test_delete_errors(self):
+        client = FakeS3Client(self.objects, fail=['db/0001'])
+        store = S3Store(client, 'bucket', prefix='db/')
+        try:
+            store.delete(['db/0000', 'db/0001'])
+        except StoreError as e:
+            self.assertEqual(e.errors,
+                             [{'Key': 'db/0001', 'Code': 'AccessDenied'}])
+        else:
+            self.fail('StoreError not raised')
+        self.assertNotIn('db/0000', client.objects)
@@ -0,0 +1,171 @@
+from datetime import date, datetime, timedelta, timezone
+import random
+import unittest
+
+from grandfatherson import FRIDAY, MONDAY, SATURDAY, to_delete, to_keep
+from grandfatherson.filters import UTC
+from grandfatherson.tiers import (DAY, TIERS, civil_month, register,
+                                  wall_micros)
+
+
+class TestCivilMonth(unittest.TestCase):
+    def test_civil_month(self):
+        day = date(1600, 1, 1)
+        while day < date(2500, 1, 1):
+            micros = wall_micros(datetime(day.year, day.month, day.day))
+            self.assertEqual(civil_month(micros),
+                             day.year * 12 + day.month - 1)
+            day += timedelta(days=13)
+
+    def test_end_of_month(self):
+        micros = wall_micros(datetime(2000, 2, 29, 23, 59, 59, 999999))
+        self.assertEqual(civil_month(micros), 2000 * 12 + 1)
+        self.assertEqual(civil_month(micros + 1), 2000 * 12 + 2)
+
+
+class TestBuckets(unittest.TestCase):
+    def test_weeks(self):
+        bucket = TIERS['weeks']
+        friday = wall_micros(datetime(2000, 1, 7))
+        saturday = wall_micros(datetime(2000, 1, 8))
+        self.assertEqual(bucket(saturday, SATURDAY),
+                         bucket(friday, SATURDAY) + 1)
+        self.assertEqual(bucket(saturday, FRIDAY),
+                         bucket(friday, FRIDAY))
+        self.assertEqual(bucket(saturday + 6 * DAY, SATURDAY),
+                         bucket(saturday, SATURDAY))
+
+    def test_fortnights(self):
+        bucket = TIERS['fortnights']
+        monday = wall_micros(datetime(2000, 1, 3))
+        buckets = [bucket(monday + i * DAY, MONDAY) for i in range(28)]
+        self.assertEqual(len(set(buckets)), 2)
+        self.assertEqual(buckets, sorted(buckets))
+
+    def test_quarters(self):
+        bucket = TIERS['quarters']
+        self.assertEqual(bucket(wall_micros(datetime(2000, 3, 31)), 0),
+                         bucket(wall_micros(datetime(2000, 1, 1)), 0))
+        self.assertEqual(bucket(wall_micros(datetime(2000, 4, 1)), 0),
+                         bucket(wall_micros(datetime(2000, 1, 1)), 0) + 1)
+
+
+class TestToKeep(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 7, 1, 12, 0, 0)
+        rng = random.Random(44)
+        self.datetimes = [self.now - timedelta(seconds=rng.randint(-3600,
+                                                                   3 * 10**7))
+                          for i in range(2000)]
+
+    def test_same_as_filters(self):
+        policies = [dict(days=7, weeks=4, months=3, years=2),
+                    dict(hours=24, minutes=30, seconds=10),
+                    dict(weeks=10, firstweekday=MONDAY)]
+        for policy in policies:
+            self.assertEqual(to_keep(self.datetimes, now=self.now, tiers=[],
+                                     **policy),
+                             to_keep(self.datetimes, now=self.now, **policy))
+
+    def test_quarters(self):
+        datetimes = [datetime(1999, month, day) for month in range(1, 13)
+                     for day in (1, 15)]
+        self.assertEqual(sorted(to_keep(datetimes, tiers=[('quarters', 3)],
+                                        now=datetime(1999, 12, 31))),
+                         [datetime(1999, 4, 1), datetime(1999, 7, 1),
+                          datetime(1999, 10, 1)])
+
+    def test_quarter_hours_and_six_hours(self):
+        now = datetime(2000, 1, 1, 23, 59)
+        datetimes = [datetime(2000, 1, 1) + timedelta(minutes=5 * i)
+                     for i in range(24 * 12)]
+        self.assertEqual(sorted(to_keep(datetimes,
+                                        tiers=[('six_hours', 2),
+                                               ('quarter_hours', 2)],
+                                        now=now)),
+                         [datetime(2000, 1, 1, 12, 0),
+                          datetime(2000, 1, 1, 18, 0),
+                          datetime(2000, 1, 1, 23, 30),
+                          datetime(2000, 1, 1, 23, 45)])
+
+    def test_combined(self):
+        tiers = [('quarters', 4), ('fortnights', 6)]
+        kept = to_keep(self.datetimes, days=7, now=self.now, tiers=tiers)
+        self.assertEqual(kept,
+                         to_keep(self.datetimes, days=7, now=self.now) |
+                         to_keep(self.datetimes, now=self.now, tiers=tiers))
+        self.assertEqual(to_delete(self.datetimes, days=7, now=self.now,
+                                   tiers=tiers),
+                         set(self.datetimes) - kept)
+
+    def test_future(self):
+        future = self.now + timedelta(days=1)
+        self.assertEqual(to_keep([future], now=self.now, tiers=[]), {future})
+
+    def test_aware(self):
+        utc = UTC()
+        datetimes = [dt.replace(tzinfo=utc) for dt in self.datetimes]
+        now = self.now.replace(tzinfo=utc)
+        self.assertEqual(to_keep(datetimes, days=7, weeks=4, now=now,
+                                 tiers=[]),
+                         to_keep(datetimes, days=7, weeks=4, now=now))
+
+    def test_aware_offset(self):
+        eastern = timezone(timedelta(hours=-5))
+        datetimes = [datetime(2000, 1, 1, hour, tzinfo=eastern)
+                     for hour in range(24)]
+        # now is 21:00 on the 1st in the timezone of the datetimes, so
+        # 22:00 and 23:00 are in the future
+        now = datetime(2000, 1, 2, 2, tzinfo=UTC())
+        kept = to_keep(datetimes, days=1, hours=2, now=now, tiers=[])
+        self.assertEqual(kept, to_keep(datetimes, days=1, hours=2, now=now,
+                                       plan='filters'))
+        self.assertEqual(sorted(kept),
+                         [datetime(2000, 1, 1, hour, tzinfo=eastern)
+                          for hour in range(19, 24)])
+
+    def test_mixed_offsets(self):
+        rng = random.Random(0)
+        zones = [timezone(timedelta(hours=hours, minutes=minutes))
+                 for hours, minutes in ((-11, 0), (-5, 0), (0, 0), (5, 30),
+                                        (14, 0))]
+        now = datetime(2000, 3, 1, 7, 45, tzinfo=zones[1])
+        datetimes = [(now - timedelta(minutes=rng.randrange(-600, 10 ** 6)))
+                     .astimezone(rng.choice(zones)) for i in range(500)]
+        options = dict(years=2, months=5, weeks=3, days=4, hours=7,
+                       minutes=9, now=now)
+        self.assertEqual(to_keep(datetimes, plan='tiers', **options),
+                         to_keep(datetimes, plan='filters', **options))
+
+    def test_daylight_saving(self):
+        try:
+            from zoneinfo import ZoneInfo
+            zones = [ZoneInfo('America/New_York'), ZoneInfo('Europe/London')]
+        except Exception:
+            self.skipTest('No time zone database')
+        rng = random.Random(0)
+        # Around the spring transitions of both zones
+        now = datetime(2000, 4, 3, 7, 45, tzinfo=zones[0])
+        for zone in zones:
+            datetimes = [(now - timedelta(minutes=rng.randrange(-600,
+                                                                10 ** 5)))
+                         .astimezone(zone) for i in range(500)]
+            options = dict(months=3, weeks=3, days=40, now=now)
+            self.assertEqual(to_keep(datetimes, plan='tiers', **options),
+                             to_keep(datetimes, plan='filters', **options))
+
+    def test_register(self):
+        register('biweekly_days', lambda micros, firstweekday:
+                 micros // (2 * DAY))
+        try:
+            kept = to_keep([datetime(2000, 1, 1), datetime(2000, 1, 2)],
+                           tiers=[('biweekly_days', 1)],
+                           now=datetime(2000, 1, 2))
+        finally:
+            del TIERS['biweekly_days']
+        self.assertEqual(len(kept), 1)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, to_keep, [], tiers=[('eons', 1)])
+        self.assertRaises(ValueError, to_keep, [], tiers=[('quarters', -1)])
+        self.assertRaises(ValueError, register, 'eons', None)
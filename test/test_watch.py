@@ -0,0 +1,89 @@
+from datetime import datetime
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from grandfatherson.watch import Inotify, Watcher
+
+
+def parse(name):
+    try:
+        return datetime.strptime(name, 'backup-%Y%m%d.tar')
+    except ValueError:
+        return None
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2000, 1, 10, 12, 0, 0)
+        self.directory = tempfile.mkdtemp()
+        for day in range(1, 10):
+            self.touch('backup-200001%02d.tar' % day)
+        self.touch('README')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def touch(self, name):
+        with open(os.path.join(self.directory, name), 'w'):
+            pass
+
+    def test_rotate(self):
+        watcher = Watcher(self.directory, parse, days=3)
+        watcher.scan()
+        self.assertEqual(watcher.rotate(self.now),
+                         ['backup-200001%02d.tar' % day
+                          for day in range(1, 8)])
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['README', 'backup-20000108.tar',
+                          'backup-20000109.tar'])
+
+    def test_dry_run(self):
+        watcher = Watcher(self.directory, parse, dry_run=True, days=3)
+        watcher.scan()
+        self.assertEqual(len(watcher.rotate(self.now)), 7)
+        self.assertEqual(len(os.listdir(self.directory)), 10)
+        # The index is unchanged, so a dry run can be repeated
+        self.assertEqual(len(watcher.rotation), 9)
+        self.assertEqual(len(watcher.rotate(self.now)), 7)
+
+    def test_overflow(self):
+        class Overflowed(object):
+            def read(self, timeout):
+                return [(-1, Inotify.IN_Q_OVERFLOW, '')]
+
+        watcher = Watcher(self.directory, parse, dry_run=True, days=3)
+        watcher.inotify = Overflowed()
+        # Events for these were lost
+        self.touch('backup-20000110.tar')
+        os.remove(os.path.join(self.directory, 'backup-20000101.tar'))
+        self.assertEqual(watcher.poll(0, now=self.now),
+                         ['backup-200001%02d.tar' % day
+                          for day in range(2, 8)])
+        self.assertEqual(len(watcher.rotation), 9)
+
+    def test_removed(self):
+        watcher = Watcher(self.directory, parse, days=3)
+        watcher.scan()
+        self.assertTrue(watcher.removed('backup-20000109.tar'))
+        self.assertFalse(watcher.removed('backup-20000109.tar'))
+        self.assertFalse(watcher.removed('README'))
+        self.assertEqual(len(watcher.rotate(self.now)), 7)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'needs inotify')
+    def test_poll(self):
+        watcher = Watcher(self.directory, parse, days=3)
+        try:
+            self.assertEqual(len(watcher.poll(0, now=self.now)), 7)
+            self.touch('backup-20000110.tar')
+            tomorrow = datetime(2000, 1, 11, 12, 0, 0)
+            self.assertEqual(watcher.poll(1, now=tomorrow),
+                             ['backup-20000108.tar'])
+            os.remove(os.path.join(self.directory, 'backup-20000110.tar'))
+            self.assertEqual(watcher.poll(1, now=tomorrow), [])
+            self.assertEqual(watcher.rotation.datetimes,
+                             [datetime(2000, 1, 9)])
+        finally:
+            watcher.stop()